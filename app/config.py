@@ -0,0 +1,103 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_str(name: str, default: str = None) -> str:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class Settings:
+    """Runtime settings read from environment variables (and .env)."""
+
+    def __init__(self):
+        # --- Database ---
+        self.postgres_user = _env_str("POSTGRES_USER")
+        self.postgres_password = _env_str("POSTGRES_PASSWORD", "")
+        self.postgres_host = _env_str("POSTGRES_HOST")
+        self.postgres_port = _env_str("POSTGRES_PORT")
+        self.postgres_db = _env_str("POSTGRES_DB")
+
+        # --- Connection pool (áp dụng cho cả engine sync và async) ---
+        self.db_pool_size = _env_int("DB_POOL_SIZE", 10)
+        self.db_max_overflow = _env_int("DB_MAX_OVERFLOW", 20)
+        self.db_pool_timeout = _env_float("DB_POOL_TIMEOUT", 30)
+        self.db_pool_recycle = _env_int("DB_POOL_RECYCLE", 1800)
+        self.db_pool_pre_ping = _env_bool("DB_POOL_PRE_PING", True)
+        # 0 = không giới hạn
+        self.db_statement_timeout_ms = _env_int("DB_STATEMENT_TIMEOUT_MS", 0)
+
+        # --- Cache / registry ---
+        self.cache_maxsize = _env_int("CACHE_MAXSIZE", 2048)
+        # Chu kỳ nạp lại registry (0 = tắt; lookup trượt vẫn tự nạp lại, xem app.services.registry)
+        self.registry_refresh_seconds = _env_int("REGISTRY_REFRESH_SECONDS", 300)
+        # max-age (giây) của Cache-Control trên các endpoint đọc; 0 = client/proxy luôn revalidate
+        self.http_cache_max_age = _env_int("HTTP_CACHE_MAX_AGE", 5)
+
+        # --- Daily rollups ---
+        # Chart/table đọc ngày đã chốt từ bảng rollup; False = luôn tính từ bảng tick
+        self.rollup_reads = _env_bool("ROLLUP_READS", True)
+        # Chu kỳ job rollup chạy trong app (0 = tắt, khi đã chạy python -m app.jobs.rollup bằng cron)
+        self.rollup_refresh_seconds = _env_int("ROLLUP_REFRESH_SECONDS", 300)
+
+        # --- Snapshot giá mới nhất ---
+        # Chu kỳ bắt kịp tick do crawler ghi thẳng vào DB (0 = tắt, khi chỉ ghi qua /ingest)
+        self.snapshot_refresh_seconds = _env_int("SNAPSHOT_REFRESH_SECONDS", 30)
+
+        # --- Partition theo tháng của bảng tick ---
+        self.partition_months_ahead = _env_int("PARTITION_MONTHS_AHEAD", 3)
+        # Kiểu cột giá của gold_prices: "numeric" hoặc "bigint" (VND nguyên); phải khớp schema,
+        # bigint chỉ sau khi chạy nhánh migration tuỳ chọn: alembic upgrade gold_bigint@head
+        self.gold_price_storage = _env_str("GOLD_PRICE_STORAGE", "numeric").lower()
+
+        # --- Instrumentation ---
+        # Một dòng log (key=value) mỗi request: số câu SQL, thời gian DB, số dòng, thời gian serialize
+        self.request_log = _env_bool("REQUEST_LOG", True)
+        # Chẩn đoán truy vấn (app.utils.diagnostics): slow query + EXPLAIN ANALYZE, N+1 theo request
+        self.diagnostics = _env_bool("DIAGNOSTICS", False)
+        self.slow_query_ms = _env_float("SLOW_QUERY_MS", 200)
+        self.n_plus_one_threshold = _env_int("N_PLUS_ONE_THRESHOLD", 10)
+        self.diagnostics_file = _env_str("DIAGNOSTICS_FILE", "logs/diagnostics.jsonl")
+
+        # --- Push feed (/api/v1/stream) ---
+        # Bật broadcaster (LISTEN snapshot thay đổi); tắt thì /stream chỉ gửi keepalive
+        self.stream_enabled = _env_bool("STREAM_ENABLED", True)
+        # Chu kỳ gửi keepalive khi không có cập nhật (giữ kết nối qua proxy)
+        self.stream_heartbeat_seconds = _env_int("STREAM_HEARTBEAT_SECONDS", 15)
+
+        # --- Ingestion ---
+        # Các endpoint /api/v1/ingest yêu cầu header X-API-Key khớp giá trị này; không đặt = trả 503
+        self.ingest_api_key = _env_str("INGEST_API_KEY")
+
+    @property
+    def db_url(self) -> str:
+        return (
+            f"postgresql://{self.postgres_user}:{self.postgres_password}"
+            f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+        )
+
+    @property
+    def async_db_url(self) -> str:
+        return self.db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+settings = Settings()
@@ -1,19 +1,50 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-import os
-from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.config import settings
+from app.utils.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+from app.utils.request_metrics import instrument_engine
+from app.utils import diagnostics
 
-load_dotenv()
+DB_URL = settings.db_url
+ASYNC_DB_URL = settings.async_db_url
 
-DB_URL = (
-    f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-    f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+POOL_OPTIONS = dict(
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
 )
 
+sync_connect_args = {}
+async_connect_args = {}
+if settings.db_statement_timeout_ms > 0:
+    sync_connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    async_connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
 
-engine = create_engine(DB_URL)
+
+# Engine sync (psycopg2): Alembic, scripts
+engine = create_engine(
+    DB_URL, poolclass=InstrumentedQueuePool, connect_args=sync_connect_args, **POOL_OPTIONS
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Engine async (asyncpg): API routes
+async_engine = create_async_engine(
+    ASYNC_DB_URL, poolclass=InstrumentedAsyncQueuePool, connect_args=async_connect_args, **POOL_OPTIONS
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Thời gian / số câu SQL theo request (Server-Timing, /metrics)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if settings.diagnostics:
+    # Đăng ký sau instrument_engine để thời gian EXPLAIN không bị tính vào DB time của request
+    diagnostics.instrument_engine(engine)
+    diagnostics.instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -22,3 +53,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,94 @@
+"""Monthly partition maintenance for the tick tables.
+
+Chạy:
+    python -m app.jobs.partitions                    # tạo trước partition cho PARTITION_MONTHS_AHEAD tháng tới
+    python -m app.jobs.partitions list               # liệt kê partition của từng bảng
+    python -m app.jobs.partitions detach 2024-01     # tách các partition trước tháng 2024-01 để archive
+
+Partition tách ra bằng DETACH ... CONCURRENTLY trở thành bảng độc lập cùng tên
+(vd. gold_prices_p202312): có thể pg_dump rồi DROP. Lệnh này không giữ
+ACCESS EXCLUSIVE trên bảng cha nên không chặn đọc/ghi tháng hiện tại.
+CONCURRENTLY cần PostgreSQL 14+; server cũ hơn dùng DETACH thường (khoá bảng
+cha trong chốc lát), nên chạy lúc ít tải.
+"""
+import sys
+from datetime import date
+from typing import List
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.repository.partition_repo import (
+    PartitionRepository, PARTITIONED_TABLES, add_months, month_start
+)
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def ensure_future_partitions(months_ahead: int = None) -> List[str]:
+    months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+    this_month = month_start(date.today())
+    db = SessionLocal()
+    try:
+        repo = PartitionRepository(db)
+        created = []
+        for table in PARTITIONED_TABLES:
+            created += repo.ensure_months(table, this_month, add_months(this_month, months_ahead))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if created:
+        logger.info("Created partitions: %s", ", ".join(created))
+    return created
+
+
+def detach_before(month: date) -> List[str]:
+    """Detach every partition older than `month` (the current month is never detached)."""
+    month = min(month_start(month), month_start(date.today()))
+    db = SessionLocal()
+    try:
+        old = [
+            (table, name)
+            for table in PARTITIONED_TABLES
+            for name, m in PartitionRepository(db).list_partitions(table)
+            if m < month
+        ]
+    finally:
+        db.close()
+    # DETACH CONCURRENTLY không chạy được trong transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        concurrently = " CONCURRENTLY" if conn.dialect.server_version_info >= (14,) else ""
+        for table, name in old:
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}{concurrently}"))
+            logger.info("Detached %s from %s", name, table)
+    return [name for _, name in old]
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if not args:
+        ensure_future_partitions()
+    elif args[0] == "list":
+        db = SessionLocal()
+        try:
+            for table in PARTITIONED_TABLES:
+                names = [name for name, _ in PartitionRepository(db).list_partitions(table)]
+                print(f"{table}: {', '.join(names) or '-'}")
+        finally:
+            db.close()
+    elif args[0] == "detach" and len(args) == 2:
+        year, month = args[1].split("-")
+        detach_before(date(int(year), int(month), 1))
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
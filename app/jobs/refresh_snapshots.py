@@ -0,0 +1,68 @@
+"""Rebuild the latest-price snapshot tables from the tick tables.
+
+Chạy: python -m app.jobs.refresh_snapshots
+Dùng sau `alembic upgrade head` lần đầu (bảng snapshot còn rỗng) hoặc sau khi sửa
+dữ liệu trực tiếp trong DB. Ingest cập nhật snapshot ngay khi ghi; tick do crawler ghi
+thẳng vào DB được app bắt kịp bằng refresh_stale() mỗi SNAPSHOT_REFRESH_SECONDS.
+"""
+import sys
+
+from app.database import SessionLocal
+from app.repository.snapshot_repo import SnapshotRepository
+from app.services.cached_service import invalidate_cache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EXCHANGE_KINDS = ("central", "market", "index")
+
+
+def refresh_all():
+    db = SessionLocal()
+    try:
+        snapshots = SnapshotRepository(db)
+        snapshots.refresh_gold()
+        for kind in EXCHANGE_KINDS:
+            snapshots.refresh_exchange(kind)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    invalidate_cache()
+    logger.info("Snapshot tables rebuilt")
+
+
+def refresh_stale() -> int:
+    """Refresh only series whose newest tick differs from their snapshot; returns how many."""
+    db = SessionLocal()
+    try:
+        snapshots = SnapshotRepository(db)
+        gold_keys = snapshots.stale_gold_keys()
+        snapshots.refresh_gold(gold_keys)
+        refreshed = len(gold_keys)
+        for kind in EXCHANGE_KINDS:
+            ids = snapshots.stale_exchange_ids(kind)
+            snapshots.refresh_exchange(kind, ids)
+            refreshed += len(ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    # Không có gì đổi thì giữ cache (và ETag) như cũ
+    if refreshed:
+        invalidate_cache()
+        logger.info("Refreshed %d stale snapshots", refreshed)
+    return refreshed
+
+
+def main() -> int:
+    refresh_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
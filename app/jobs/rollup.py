@@ -0,0 +1,41 @@
+"""Incremental refresh of the daily rollup tables.
+
+Chạy: python -m app.jobs.rollup [--full]
+Mỗi bảng rollup chỉ tính lại các ngày từ ngày của watermark tới tick mới nhất, cùng
+các ngày cũ có tick bị ghi/sửa/xoá (trigger ghi vào rollup_dirty_days, kể cả khi
+crawler ghi thẳng vào DB); --full dựng lại toàn bộ (lần chạy đầu, hoặc sau khi ghi
+thẳng vào một partition theo tên, trigger không bắt được).
+App cũng tự chạy job này mỗi ROLLUP_REFRESH_SECONDS giây.
+"""
+import sys
+
+from app.database import SessionLocal
+from app.repository.rollup_repo import RollupRepository, ROLLUP_TARGETS
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def refresh_rollups(full: bool = False):
+    for target in ROLLUP_TARGETS:
+        # Mỗi bảng một transaction để bảng lớn không giữ lock của các bảng khác
+        db = SessionLocal()
+        try:
+            refreshed = RollupRepository(db).refresh_incremental(target, full=full)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if refreshed:
+            logger.info("Rollup %s refreshed for %s..%s and %d earlier changed days", target.table, *refreshed)
+
+
+def main() -> int:
+    refresh_rollups(full="--full" in sys.argv[1:])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,93 @@
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.middleware.error_handler import ExceptionMiddleware
+from fastapi.exceptions import RequestValidationError
+from app.middleware.error_handler import ExceptionMiddleware, validation_exception_handler
+from app.middleware.timing import RequestMetricsMiddleware
 from app.routers.gold import router as gold_router
 from app.routers.exchange import router as exchange_router
+from app.routers.monitoring import router as monitoring_router, get_metrics
+from app.routers.ingest import router as ingest_router
+from app.routers.export import router as export_router
+from app.routers.stream import router as stream_router
+from app.services.broadcaster import broadcaster
+from app.services.registry import registry
+from app.jobs.rollup import refresh_rollups
+from app.jobs.refresh_snapshots import refresh_stale
+from app.jobs.partitions import ensure_future_partitions
+from app.config import settings
+from app.utils.fast_json import TimedJSONResponse
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+async def _refresh_registry_periodically():
+    while True:
+        await asyncio.sleep(settings.registry_refresh_seconds)
+        try:
+            await run_in_threadpool(registry.refresh)
+        except Exception:
+            logger.exception("Dimension registry refresh failed")
+
+
+async def _refresh_rollups_periodically():
+    while True:
+        try:
+            await run_in_threadpool(refresh_rollups)
+        except Exception:
+            logger.exception("Daily rollup refresh failed")
+        await asyncio.sleep(settings.rollup_refresh_seconds)
+
+
+async def _refresh_snapshots_periodically():
+    while True:
+        try:
+            await run_in_threadpool(refresh_stale)
+        except Exception:
+            logger.exception("Snapshot refresh failed")
+        await asyncio.sleep(settings.snapshot_refresh_seconds)
+
+
+async def _ensure_partitions_daily():
+    while True:
+        try:
+            await run_in_threadpool(ensure_future_partitions)
+        except Exception:
+            logger.exception("Partition maintenance failed")
+        await asyncio.sleep(24 * 3600)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await run_in_threadpool(registry.refresh)
+    except Exception:
+        # Không chặn startup; registry sẽ nạp lại ở request đầu tiên
+        logger.exception("Dimension registry initial load failed")
+    tasks = [asyncio.create_task(_ensure_partitions_daily())]
+    if settings.registry_refresh_seconds > 0:
+        tasks.append(asyncio.create_task(_refresh_registry_periodically()))
+    if settings.rollup_refresh_seconds > 0:
+        tasks.append(asyncio.create_task(_refresh_rollups_periodically()))
+    if settings.snapshot_refresh_seconds > 0:
+        tasks.append(asyncio.create_task(_refresh_snapshots_periodically()))
+    if settings.stream_enabled:
+        await broadcaster.start()
+    yield
+    for task in tasks:
+        task.cancel()
+    await broadcaster.stop()
 
 app = FastAPI(
     title="Market Backend API",
     description="Backend hệ thống quản lý giá vàng, tỷ giá, chỉ số tài chính...",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
 app.add_middleware(
@@ -21,8 +100,17 @@ app.add_middleware(
 
 # Middleware handle exception
 app.add_middleware(ExceptionMiddleware)
+app.add_exception_handler(RequestValidationError, validation_exception_handler)
+# Ngoài cùng: đo cả response lỗi do ExceptionMiddleware trả về
+app.add_middleware(RequestMetricsMiddleware)
 
 # Routers 
 app.include_router(gold_router)
 app.include_router(exchange_router)
+app.include_router(monitoring_router)
+app.include_router(ingest_router)
+app.include_router(export_router)
+app.include_router(stream_router)
+# Đường dẫn mặc định Prometheus scrape
+app.add_api_route("/metrics", get_metrics, include_in_schema=False)
 
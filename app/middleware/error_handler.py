@@ -1,86 +1,137 @@
-from fastapi import Request
+import math
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DataError
 from pydantic import ValidationError
 import logging
 import traceback
 
-class ExceptionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+
+def error_response(e: Exception) -> JSONResponse:
+    """Map an exception that escaped the routes to the API's {"status": "error", ...} body.
+
+    Gọi trong khối except (logging.exception / format_exc dùng exception đang xử lý).
+    """
+    if isinstance(e, StarletteHTTPException):
+        # 404, 403, 401...
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"status": "error", "message": e.detail}
+        )
+    if isinstance(e, RequestValidationError):
+        # Lỗi validate input query/body/params
+        return JSONResponse(
+            status_code=422,
+            content={
+                "status": "error",
+                "message": "Validation error",
+                "detail": e.errors()
+            }
+        )
+    if isinstance(e, ValidationError):
+        # Lỗi validate pydantic (response, model custom)
+        return JSONResponse(
+            status_code=422,
+            content={
+                "status": "error",
+                "message": "Validation error",
+                "detail": e.errors()
+            }
+        )
+    if isinstance(e, IntegrityError):
+        # Lỗi constraint SQL (dupe key, unique, not null...)
+        logging.error(f"IntegrityError: {e}")
+        return JSONResponse(
+            status_code=400,
+            content={
+                "status": "error",
+                "message": "Database integrity error",
+                "detail": str(e.orig) if hasattr(e, "orig") else str(e)
+            }
+        )
+    if isinstance(e, DataError):
+        # Lỗi data nhập vào DB sai kiểu, out of range, ...
+        logging.error(f"DataError: {e}")
+        return JSONResponse(
+            status_code=400,
+            content={
+                "status": "error",
+                "message": "Database data error",
+                "detail": str(e.orig) if hasattr(e, "orig") else str(e)
+            }
+        )
+    if isinstance(e, SQLAlchemyError):
+        # Các lỗi SQLAlchemy khác
+        logging.error(f"SQLAlchemyError: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "status": "error",
+                "message": "Database error",
+                "detail": str(e)
+            }
+        )
+    # Lỗi không xác định khác
+    logging.exception("Unhandled Exception")
+    # Ghi rõ traceback cho log, ẩn chi tiết khi trả cho user (hoặc chỉ show trong dev)
+    detail = traceback.format_exc()
+    return JSONResponse(
+        status_code=500,
+        content={
+            "status": "error",
+            "message": str(e),
+            # "detail": detail    # Bỏ comment nếu muốn debug trên dev
+        }
+    )
+
+
+def _json_safe(value):
+    # NaN/Infinity không có trong JSON (JSONResponse dùng allow_nan=False)
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    return value
+
+
+async def validation_exception_handler(request, exc: RequestValidationError) -> JSONResponse:
+    """FastAPI's default 422 body, with rejected NaN/Infinity inputs echoed as strings."""
+    return JSONResponse(status_code=422, content={"detail": _json_safe(jsonable_encoder(exc.errors()))})
+
+
+class ExceptionMiddleware:
+    """Pure ASGI middleware turning unhandled exceptions into JSON error responses.
+
+    Không dùng BaseHTTPMiddleware: request/response đi thẳng qua, không thêm
+    task/stream trung gian (StreamingResponse, SSE không bị ảnh hưởng). Lỗi xảy
+    ra sau khi response đã bắt đầu gửi thì không thể đổi status nữa: raise lại
+    để server đóng kết nối.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
-        except StarletteHTTPException as e:
-            # 404, 403, 401...
-            return JSONResponse(
-                status_code=e.status_code,
-                content={"status": "error", "message": e.detail}
-            )
-        except RequestValidationError as e:
-            # Lỗi validate input query/body/params
-            return JSONResponse(
-                status_code=422,
-                content={
-                    "status": "error",
-                    "message": "Validation error",
-                    "detail": e.errors()
-                }
-            )
-        except ValidationError as e:
-            # Lỗi validate pydantic (response, model custom)
-            return JSONResponse(
-                status_code=422,
-                content={
-                    "status": "error",
-                    "message": "Validation error",
-                    "detail": e.errors()
-                }
-            )
-        except IntegrityError as e:
-            # Lỗi constraint SQL (dupe key, unique, not null...)
-            logging.error(f"IntegrityError: {e}")
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "status": "error",
-                    "message": "Database integrity error",
-                    "detail": str(e.orig) if hasattr(e, "orig") else str(e)
-                }
-            )
-        except DataError as e:
-            # Lỗi data nhập vào DB sai kiểu, out of range, ...
-            logging.error(f"DataError: {e}")
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "status": "error",
-                    "message": "Database data error",
-                    "detail": str(e.orig) if hasattr(e, "orig") else str(e)
-                }
-            )
-        except SQLAlchemyError as e:
-            # Các lỗi SQLAlchemy khác
-            logging.error(f"SQLAlchemyError: {e}")
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "status": "error",
-                    "message": "Database error",
-                    "detail": str(e)
-                }
-            )
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            # Lỗi không xác định khác
-            logging.exception("Unhandled Exception")
-            # Ghi rõ traceback cho log, ẩn chi tiết khi trả cho user (hoặc chỉ show trong dev)
-            detail = traceback.format_exc()
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "status": "error",
-                    "message": str(e),
-                    # "detail": detail    # Bỏ comment nếu muốn debug trên dev
-                }
-            )
+            if response_started:
+                raise
+            await error_response(e)(scope, receive, send)
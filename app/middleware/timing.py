@@ -0,0 +1,61 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.utils.logger import get_logger
+from app.utils.request_metrics import RequestStats, current_request, record
+from app.utils import diagnostics
+
+logger = get_logger("app.requests")
+
+
+def _route(scope: Scope) -> str:
+    # Dùng path template ("/api/v1/export/{kind}") để số label không phụ thuộc URL
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """Per-request DB statements / DB time / rows / serialisation time.
+
+    Gắn header Server-Timing khi response bắt đầu, ghi histogram cho /metrics và
+    (nếu REQUEST_LOG bật) một dòng log key=value khi response đã gửi xong. Với
+    StreamingResponse, SQL chạy trong lúc stream chỉ có trong log/histogram.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["path"])
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            current_request.reset(token)
+            route, method = _route(scope), scope["method"]
+            record(route, method, status, duration, stats)
+            if settings.diagnostics:
+                diagnostics.finish_request(method, route, stats)
+            if settings.request_log:
+                fields = {"method": method, "route": route, "status": status, "ms": round(duration * 1000, 2)}
+                fields.update(stats.log_fields())
+                logger.info(
+                    " ".join(f"{k}={v}" for k, v in fields.items()),
+                    extra={"request": fields, "slowest_statement": stats.slowest_statement},
+                )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, PrimaryKeyConstraint, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -17,25 +17,76 @@ class FinancialIndexMeta(Base):
 
 class CentralExchangeRate(Base):
     __tablename__ = "exchange_central_rates"
-    currency_id = Column(Integer, ForeignKey("currency.id"), primary_key=True, index=True)
+    currency_id = Column(Integer, ForeignKey("currency.id"), primary_key=True)
     date = Column(Date, primary_key=True, index=True)
     rate = Column(Float, nullable=False)
     published_at = Column(DateTime, nullable=True)
     currency = relationship("Currency", back_populates="rates_central")
+    __table_args__ = (PrimaryKeyConstraint("currency_id", "date", postgresql_include=["rate", "published_at"]),)
 
 class MarketExchangeRate(Base):
     __tablename__ = "exchange_market_rates"
-    currency_id = Column(Integer, ForeignKey("currency.id"), primary_key=True, index=True)
+    currency_id = Column(Integer, ForeignKey("currency.id"), primary_key=True)
     timestamp = Column(DateTime, primary_key=True, index=True)
-    source = Column(String, primary_key=True, index=True)
-    type = Column(String, primary_key=True, nullable=True)
+    source = Column(String, primary_key=True)
+    type = Column(String, primary_key=True, nullable=False)
     rate = Column(Float, nullable=False)
     currency = relationship("Currency", back_populates="rates_market")
+    __table_args__ = (
+        # INCLUDE rate: latest / khoảng ngày của một currency đọc bằng Index Only Scan
+        PrimaryKeyConstraint("currency_id", "timestamp", "source", "type", postgresql_include=["rate"]),
+        # Partition theo tháng, xem app.repository.partition_repo
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
 
 class FinancialIndexValue(Base):
     __tablename__ = "financial_index_values"
-    index_id = Column(Integer, ForeignKey("financial_index.id"), primary_key=True, index=True)
+    index_id = Column(Integer, ForeignKey("financial_index.id"), primary_key=True)
     timestamp = Column(DateTime, primary_key=True, index=True)
-    source = Column(String, primary_key=True, index=True)
+    source = Column(String, primary_key=True)
     value = Column(Float, nullable=False)
     index = relationship("FinancialIndexMeta", back_populates="values")
+    __table_args__ = (
+        PrimaryKeyConstraint("index_id", "timestamp", "source", postgresql_include=["value"]),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
+
+# Giá trị mới nhất của mỗi series kèm giá cuối ngày hôm trước, cập nhật khi ingest.
+# kind: 'central' | 'market' (series_id = currency.id) hoặc 'index' (series_id = financial_index.id);
+# với central, timestamp là 00:00 của ngày niêm yết.
+class ExchangeSnapshot(Base):
+    __tablename__ = "exchange_snapshots"
+    kind = Column(String(10), primary_key=True)
+    series_id = Column(Integer, primary_key=True)
+    timestamp = Column(DateTime, nullable=False)
+    value = Column(Float, nullable=False)
+    published_at = Column(DateTime, nullable=True)
+    prev_timestamp = Column(DateTime, nullable=True)
+    prev_value = Column(Float, nullable=True)
+    delta = Column(Float, nullable=True)
+    delta_percent = Column(Float, nullable=True)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+# Rollup theo ngày của exchange_market_rates (gộp mọi source/type của một currency), cập nhật bởi app.jobs.rollup và ingest
+class MarketRateDaily(Base):
+    __tablename__ = "exchange_market_daily"
+    currency_id = Column(Integer, ForeignKey("currency.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    last_timestamp = Column(DateTime, nullable=False)
+    tick_count = Column(Integer, nullable=False)
+
+# Rollup theo ngày của financial_index_values
+class IndexValueDaily(Base):
+    __tablename__ = "financial_index_daily"
+    index_id = Column(Integer, ForeignKey("financial_index.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    last_timestamp = Column(DateTime, nullable=False)
+    tick_count = Column(Integer, nullable=False)
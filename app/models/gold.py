@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, Float, ForeignKey, Index, PrimaryKeyConstraint, func
 from sqlalchemy.orm import relationship, declarative_base
 from app.database import Base 
+from app.models.types import GoldPriceType
 
 class GoldType(Base):
     __tablename__ = "gold_types"
@@ -27,8 +28,8 @@ class Location(Base):
 class GoldPrice(Base):
     __tablename__ = "gold_prices"
     timestamp = Column(DateTime(timezone=False), nullable=False)
-    buy_price = Column(Numeric, nullable=False)
-    sell_price = Column(Numeric, nullable=False)
+    buy_price = Column(GoldPriceType, nullable=False)
+    sell_price = Column(GoldPriceType, nullable=False)
     gold_type_id = Column(Integer, ForeignKey("gold_types.id"), nullable=False)
     unit_id = Column(Integer, ForeignKey("units.id"), nullable=False)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
@@ -36,5 +37,46 @@ class GoldPrice(Base):
     unit = relationship("Unit", back_populates="prices")
     location = relationship("Location", back_populates="prices")
     __table_args__ = (
-        PrimaryKeyConstraint("timestamp", "gold_type_id", "unit_id", "location_id", name="gold_price_pk"),
+        # PK theo series rồi thời gian, INCLUDE giá: latest / khoảng ngày của một series là Index Only Scan
+        PrimaryKeyConstraint(
+            "gold_type_id", "location_id", "unit_id", "timestamp", name="gold_price_pk",
+            postgresql_include=["buy_price", "sell_price"],
+        ),
+        # Query quét một ngày của mọi series (/table, rollup)
+        Index("ix_gold_prices_timestamp", "timestamp"),
+        # Partition theo tháng, xem app.repository.partition_repo
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
     )
+
+# Tick mới nhất của mỗi (gold_type, location, unit) kèm giá cuối ngày hôm trước, cập nhật khi ingest
+class GoldPriceSnapshot(Base):
+    __tablename__ = "gold_price_snapshots"
+    gold_type_id = Column(Integer, ForeignKey("gold_types.id"), primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True)
+    unit_id = Column(Integer, ForeignKey("units.id"), primary_key=True)
+    timestamp = Column(DateTime(timezone=False), nullable=False)
+    buy_price = Column(Numeric, nullable=False)
+    sell_price = Column(Numeric, nullable=False)
+    prev_timestamp = Column(DateTime(timezone=False), nullable=True)
+    prev_buy_price = Column(Numeric, nullable=True)
+    prev_sell_price = Column(Numeric, nullable=True)
+    delta_buy = Column(Float, nullable=True)
+    delta_sell = Column(Float, nullable=True)
+    delta_buy_percent = Column(Float, nullable=True)
+    delta_sell_percent = Column(Float, nullable=True)
+    updated_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+
+# Rollup theo ngày của gold_prices (OHLC theo giá bán + giá mua đóng cửa), do app.jobs.rollup và ingest cập nhật
+class GoldPriceDaily(Base):
+    __tablename__ = "gold_price_daily"
+    gold_type_id = Column(Integer, ForeignKey("gold_types.id"), primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True)
+    unit_id = Column(Integer, ForeignKey("units.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    open = Column(Numeric, nullable=False)
+    high = Column(Numeric, nullable=False)
+    low = Column(Numeric, nullable=False)
+    close = Column(Numeric, nullable=False)
+    buy_close = Column(Numeric, nullable=False)
+    last_timestamp = Column(DateTime(timezone=False), nullable=False)
+    tick_count = Column(Integer, nullable=False)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Date, DateTime, func
+from app.database import Base
+
+# Tick mới nhất (theo timestamp) đã được gộp vào từng bảng rollup theo ngày;
+# các ngày trước date(last_timestamp) coi như đã chốt, từ ngày đó trở đi đọc thẳng từ bảng tick
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+    table_name = Column(String(64), primary_key=True)
+    last_timestamp = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+# Ngày có tick bị ghi/sửa/xoá, do trigger trên bảng tick ghi lại (migration e4a9c7b21f05), kể cả khi
+# crawler/backfill ghi thẳng vào DB; job rollup tính lại các ngày đã chốt trong này rồi xoá dòng
+class RollupDirtyDay(Base):
+    __tablename__ = "rollup_dirty_days"
+    table_name = Column(String(64), primary_key=True)
+    day = Column(Date, primary_key=True)
@@ -0,0 +1,42 @@
+from sqlalchemy import BigInteger, Numeric
+from sqlalchemy.types import TypeDecorator
+from app.config import settings
+
+
+def bigint_gold_prices() -> bool:
+    return settings.gold_price_storage == "bigint"
+
+
+def to_storage_price(value):
+    """A gold price as stored: whole VND (int) in bigint mode, unchanged otherwise.
+
+    Raises ValueError for a fractional price in bigint mode instead of rounding
+    it, like the migration does for existing rows.
+    """
+    if value is None or not bigint_gold_prices():
+        return value
+    if not float(value).is_integer():
+        raise ValueError(f"Gold price {value} is not a whole VND amount (GOLD_PRICE_STORAGE=bigint)")
+    return int(value)
+
+
+class GoldPriceType(TypeDecorator):
+    """Gold price column: NUMERIC, or BIGINT of whole VND when GOLD_PRICE_STORAGE=bigint.
+
+    Cấu hình chỉ chọn kiểu bind, không đổi schema: bigint phải đi cùng nhánh
+    migration tuỳ chọn gold_bigint (b7d4e2a61c38). Giá đọc ra luôn là float
+    thay vì Decimal. BIGINT lưu số tiền thật (không nhân hệ số), nên SQL thô
+    (::float8, rollup, snapshot) chạy giống nhau ở cả hai chế độ.
+    """
+
+    impl = Numeric
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(BigInteger() if bigint_gold_prices() else Numeric())
+
+    def process_bind_param(self, value, dialect):
+        return to_storage_price(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else float(value)
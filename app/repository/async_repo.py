@@ -0,0 +1,42 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Callable
+from app.repository.gold_repo import GoldPriceRepository
+from app.repository.exchange_repo import ExchangeRepository
+
+
+class AsyncRepository:
+    """Async facade over a sync repository bound to an AsyncSession.
+
+    Every call runs the sync repository on the session's underlying Session via
+    `AsyncSession.run_sync`: the ORM code executes in a greenlet and each
+    asyncpg round trip is awaited on the event loop, so no threadpool worker is
+    held while the query is in flight. `await repo.get_latest(...)` calls a
+    single repository method; `await repo.run(fn)` runs `fn(sync_repo)` so that
+    several calls (and lazy loads on the returned objects) share one greenlet.
+    """
+
+    repository_class = None
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def run(self, fn: Callable[[Any], Any]) -> Any:
+        return await self.db.run_sync(lambda session: fn(self.repository_class(session)))
+
+    def __getattr__(self, name: str):
+        method = getattr(self.repository_class, name)
+        if not callable(method) or name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(lambda repo: method(repo, *args, **kwargs))
+
+        return call
+
+
+class AsyncGoldPriceRepository(AsyncRepository):
+    repository_class = GoldPriceRepository
+
+
+class AsyncExchangeRepository(AsyncRepository):
+    repository_class = ExchangeRepository
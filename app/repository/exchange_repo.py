@@ -1,11 +1,19 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import date, datetime, timedelta
 from app.models.exchange import (
     Currency, CentralExchangeRate, MarketExchangeRate,
     FinancialIndexMeta, FinancialIndexValue
 )
+from app.repository.query_utils import between_days, daily_last, on_day
+
+# Cột đọc trên đường nóng (rate/value đã là float8): trả Row thay vì entity để bỏ chi phí identity map
+CENTRAL_COLUMNS = (
+    CentralExchangeRate.currency_id, CentralExchangeRate.date, CentralExchangeRate.rate, CentralExchangeRate.published_at
+)
+MARKET_COLUMNS = (MarketExchangeRate.timestamp, MarketExchangeRate.rate)
+INDEX_COLUMNS = (FinancialIndexValue.timestamp, FinancialIndexValue.value)
+
 
 class ExchangeRepository:
     def __init__(self, db: Session):
@@ -19,17 +27,17 @@ class ExchangeRepository:
         return self.db.query(Currency).all()
 
     # ----------- CENTRAL RATE ----------
-    def get_latest_central(self, currency_id: int) -> Optional[CentralExchangeRate]:
+    def get_latest_central(self, currency_id: int) -> Optional[Tuple]:
         return (
-            self.db.query(CentralExchangeRate)
+            self.db.query(*CENTRAL_COLUMNS)
             .filter_by(currency_id=currency_id)
             .order_by(CentralExchangeRate.date.desc())
             .first()
         )
 
-    def get_prev_central(self, currency_id: int, date_: date) -> Optional[CentralExchangeRate]:
+    def get_prev_central(self, currency_id: int, date_: date) -> Optional[Tuple]:
         return (
-            self.db.query(CentralExchangeRate)
+            self.db.query(*CENTRAL_COLUMNS)
             .filter(
                 CentralExchangeRate.currency_id == currency_id,
                 CentralExchangeRate.date < date_
@@ -38,10 +46,10 @@ class ExchangeRepository:
             .first()
         )
 
-    def get_latest_of_prev_day_central(self, currency_id: int, current_date: date) -> Optional[CentralExchangeRate]:
+    def get_latest_of_prev_day_central(self, currency_id: int, current_date: date) -> Optional[Tuple]:
         prev_day = current_date - timedelta(days=1)
         return (
-            self.db.query(CentralExchangeRate)
+            self.db.query(*CENTRAL_COLUMNS)
             .filter(
                 CentralExchangeRate.currency_id == currency_id,
                 CentralExchangeRate.date == prev_day
@@ -50,24 +58,39 @@ class ExchangeRepository:
             .first()
         )
 
-    def get_central_rates(self, date_: date) -> List[CentralExchangeRate]:
-        return self.db.query(CentralExchangeRate).filter_by(date=date_).all()
+    def get_central_rates(self, date_: date, currency_id: Optional[int] = None) -> List[Tuple]:
+        q = self.db.query(*CENTRAL_COLUMNS).filter(CentralExchangeRate.date == date_)
+        if currency_id is not None:
+            q = q.filter(CentralExchangeRate.currency_id == currency_id)
+        return q.all()
+
+    def get_central_range(self, currency_ids: List[int], start: date, end: date) -> List[Tuple]:
+        return (
+            self.db.query(*CENTRAL_COLUMNS)
+            .filter(
+                CentralExchangeRate.currency_id.in_(currency_ids),
+                CentralExchangeRate.date >= start,
+                CentralExchangeRate.date <= end,
+            )
+            .order_by(CentralExchangeRate.currency_id, CentralExchangeRate.date)
+            .all()
+        )
 
     def get_central_rate_by_currency_and_date(self, currency_id: int, date_: date) -> Optional[CentralExchangeRate]:
         return self.db.query(CentralExchangeRate).filter_by(currency_id=currency_id, date=date_).first()
 
     # -------- MARKET RATE ----------
-    def get_latest_market(self, currency_id: int) -> Optional[MarketExchangeRate]:
+    def get_latest_market(self, currency_id: int) -> Optional[Tuple]:
         return (
-            self.db.query(MarketExchangeRate)
+            self.db.query(*MARKET_COLUMNS)
             .filter_by(currency_id=currency_id)
             .order_by(MarketExchangeRate.timestamp.desc())
             .first()
         )
 
-    def get_prev_market(self, currency_id: int, timestamp: datetime) -> Optional[MarketExchangeRate]:
+    def get_prev_market(self, currency_id: int, timestamp: datetime) -> Optional[Tuple]:
         return (
-            self.db.query(MarketExchangeRate)
+            self.db.query(*MARKET_COLUMNS)
             .filter(
                 MarketExchangeRate.currency_id == currency_id,
                 MarketExchangeRate.timestamp < timestamp
@@ -76,23 +99,39 @@ class ExchangeRepository:
             .first()
         )
 
-    def get_latest_of_prev_day_market(self, currency_id: int, current_timestamp: datetime) -> Optional[MarketExchangeRate]:
+    def get_latest_of_prev_day_market(self, currency_id: int, current_timestamp: datetime) -> Optional[Tuple]:
         prev_day = current_timestamp.date() - timedelta(days=1)
         return (
-            self.db.query(MarketExchangeRate)
+            self.db.query(*MARKET_COLUMNS)
             .filter(
                 MarketExchangeRate.currency_id == currency_id,
-                func.date(MarketExchangeRate.timestamp) == prev_day
+                on_day(MarketExchangeRate.timestamp, prev_day)
             )
             .order_by(MarketExchangeRate.timestamp.desc())
             .first()
         )
 
-    def get_market_rates(self, date_: date) -> List[MarketExchangeRate]:
+    def get_market_daily_range(self, currency_ids: Optional[List[int]], start: date, end: date, ohlc: bool = False) -> List:
+        return daily_last(
+            self.db,
+            MarketExchangeRate.timestamp,
+            [MarketExchangeRate.rate],
+            [MarketExchangeRate.currency_id.in_(currency_ids)] if currency_ids is not None else [],
+            start,
+            end,
+            key_cols=[MarketExchangeRate.currency_id],
+            ohlc_col=MarketExchangeRate.rate if ohlc else None,
+        )
+
+    def get_market_series(self, currency_id: int, start: date, end: date) -> List[Tuple[datetime, float]]:
+        """(timestamp, rate) tuples of one currency, oldest first."""
         return (
-            self.db.query(MarketExchangeRate)
-            .filter(func.date(MarketExchangeRate.timestamp) == date_)
-            .order_by(MarketExchangeRate.currency_id, MarketExchangeRate.timestamp.desc())
+            self.db.query(*MARKET_COLUMNS)
+            .filter(
+                MarketExchangeRate.currency_id == currency_id,
+                between_days(MarketExchangeRate.timestamp, start, end),
+            )
+            .order_by(MarketExchangeRate.timestamp)
             .all()
         )
 
@@ -100,17 +139,17 @@ class ExchangeRepository:
     def get_index_by_code(self, code: str) -> Optional[FinancialIndexMeta]:
         return self.db.query(FinancialIndexMeta).filter_by(code=code).first()
 
-    def get_latest_index(self, index_id: int) -> Optional[FinancialIndexValue]:
+    def get_latest_index(self, index_id: int) -> Optional[Tuple]:
         return (
-            self.db.query(FinancialIndexValue)
+            self.db.query(*INDEX_COLUMNS)
             .filter_by(index_id=index_id)
             .order_by(FinancialIndexValue.timestamp.desc())
             .first()
         )
 
-    def get_prev_index(self, index_id: int, timestamp: datetime) -> Optional[FinancialIndexValue]:
+    def get_prev_index(self, index_id: int, timestamp: datetime) -> Optional[Tuple]:
         return (
-            self.db.query(FinancialIndexValue)
+            self.db.query(*INDEX_COLUMNS)
             .filter(
                 FinancialIndexValue.index_id == index_id,
                 FinancialIndexValue.timestamp < timestamp
@@ -119,22 +158,38 @@ class ExchangeRepository:
             .first()
         )
 
-    def get_latest_of_prev_day_index(self, index_id: int, current_timestamp: datetime) -> Optional[FinancialIndexValue]:
+    def get_latest_of_prev_day_index(self, index_id: int, current_timestamp: datetime) -> Optional[Tuple]:
         prev_day = current_timestamp.date() - timedelta(days=1)
         return (
-            self.db.query(FinancialIndexValue)
+            self.db.query(*INDEX_COLUMNS)
             .filter(
                 FinancialIndexValue.index_id == index_id,
-                func.date(FinancialIndexValue.timestamp) == prev_day
+                on_day(FinancialIndexValue.timestamp, prev_day)
             )
             .order_by(FinancialIndexValue.timestamp.desc())
             .first()
         )
 
-    def get_index_values(self, date_: date) -> List[FinancialIndexValue]:
+    def get_index_daily_range(self, index_ids: Optional[List[int]], start: date, end: date, ohlc: bool = False) -> List:
+        return daily_last(
+            self.db,
+            FinancialIndexValue.timestamp,
+            [FinancialIndexValue.value],
+            [FinancialIndexValue.index_id.in_(index_ids)] if index_ids is not None else [],
+            start,
+            end,
+            key_cols=[FinancialIndexValue.index_id],
+            ohlc_col=FinancialIndexValue.value if ohlc else None,
+        )
+
+    def get_index_series(self, index_id: int, start: date, end: date) -> List[Tuple[datetime, float]]:
+        """(timestamp, value) tuples of one index, oldest first."""
         return (
-            self.db.query(FinancialIndexValue)
-            .filter(func.date(FinancialIndexValue.timestamp) == date_)
-            .order_by(FinancialIndexValue.index_id, FinancialIndexValue.timestamp.desc())
+            self.db.query(*INDEX_COLUMNS)
+            .filter(
+                FinancialIndexValue.index_id == index_id,
+                between_days(FinancialIndexValue.timestamp, start, end),
+            )
+            .order_by(FinancialIndexValue.timestamp)
             .all()
         )
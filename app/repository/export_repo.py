@@ -0,0 +1,99 @@
+from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional
+from datetime import date
+from app.models.gold import GoldPrice, GoldType
+from app.models.exchange import CentralExchangeRate, MarketExchangeRate, FinancialIndexValue
+from app.repository.query_utils import as_float, day_bounds
+
+# Số dòng mỗi lần FETCH từ server-side cursor: bộ nhớ không phụ thuộc độ dài khoảng thời gian
+EXPORT_BATCH_SIZE = 2000
+
+
+def _in_range(q, timestamp_col, start: Optional[date], end: Optional[date]):
+    if start is not None:
+        q = q.filter(timestamp_col >= day_bounds(start)[0])
+    if end is not None:
+        q = q.filter(timestamp_col < day_bounds(end)[1])
+    return q
+
+
+class ExportRepository:
+    """Raw history for bulk export, streamed with `yield_per` (server-side cursor on psycopg2).
+
+    Các hàm iter_* trả về query chưa chạy; câu lệnh chỉ được thực thi khi bắt
+    đầu duyệt, từng lô EXPORT_BATCH_SIZE dòng, theo thứ tự thời gian.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def gold_type_ids_by_source(self, sources: List[str]) -> List[int]:
+        return [id_ for (id_,) in self.db.query(GoldType.id).filter(GoldType.source.in_(sources))]
+
+    def iter_gold(self, gold_type_ids: Optional[List[int]], start: Optional[date], end: Optional[date]) -> Iterator:
+        q = self.db.query(
+            GoldPrice.timestamp,
+            GoldPrice.gold_type_id,
+            GoldPrice.location_id,
+            GoldPrice.unit_id,
+            as_float(GoldPrice.buy_price),
+            as_float(GoldPrice.sell_price),
+        )
+        if gold_type_ids is not None:
+            q = q.filter(GoldPrice.gold_type_id.in_(gold_type_ids))
+        q = _in_range(q, GoldPrice.timestamp, start, end)
+        return q.order_by(
+            GoldPrice.timestamp, GoldPrice.gold_type_id, GoldPrice.unit_id, GoldPrice.location_id
+        ).yield_per(EXPORT_BATCH_SIZE)
+
+    def iter_central(self, currency_ids: Optional[List[int]], start: Optional[date], end: Optional[date]) -> Iterator:
+        q = self.db.query(
+            CentralExchangeRate.currency_id,
+            CentralExchangeRate.date,
+            CentralExchangeRate.rate,
+            CentralExchangeRate.published_at,
+        )
+        if currency_ids is not None:
+            q = q.filter(CentralExchangeRate.currency_id.in_(currency_ids))
+        if start is not None:
+            q = q.filter(CentralExchangeRate.date >= start)
+        if end is not None:
+            q = q.filter(CentralExchangeRate.date <= end)
+        return q.order_by(CentralExchangeRate.date, CentralExchangeRate.currency_id).yield_per(EXPORT_BATCH_SIZE)
+
+    def iter_market(
+        self, currency_ids: Optional[List[int]], sources: Optional[List[str]], start: Optional[date], end: Optional[date]
+    ) -> Iterator:
+        q = self.db.query(
+            MarketExchangeRate.currency_id,
+            MarketExchangeRate.timestamp,
+            MarketExchangeRate.source,
+            MarketExchangeRate.type,
+            MarketExchangeRate.rate,
+        )
+        if currency_ids is not None:
+            q = q.filter(MarketExchangeRate.currency_id.in_(currency_ids))
+        if sources is not None:
+            q = q.filter(MarketExchangeRate.source.in_(sources))
+        q = _in_range(q, MarketExchangeRate.timestamp, start, end)
+        return q.order_by(
+            MarketExchangeRate.timestamp, MarketExchangeRate.currency_id, MarketExchangeRate.source
+        ).yield_per(EXPORT_BATCH_SIZE)
+
+    def iter_index(
+        self, index_ids: Optional[List[int]], sources: Optional[List[str]], start: Optional[date], end: Optional[date]
+    ) -> Iterator:
+        q = self.db.query(
+            FinancialIndexValue.index_id,
+            FinancialIndexValue.timestamp,
+            FinancialIndexValue.source,
+            FinancialIndexValue.value,
+        )
+        if index_ids is not None:
+            q = q.filter(FinancialIndexValue.index_id.in_(index_ids))
+        if sources is not None:
+            q = q.filter(FinancialIndexValue.source.in_(sources))
+        q = _in_range(q, FinancialIndexValue.timestamp, start, end)
+        return q.order_by(
+            FinancialIndexValue.timestamp, FinancialIndexValue.index_id, FinancialIndexValue.source
+        ).yield_per(EXPORT_BATCH_SIZE)
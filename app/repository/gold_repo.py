@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Session
 from app.models.gold import GoldPrice, GoldType, Unit, Location
-from sqlalchemy import func
-from typing import Optional, List
+from app.repository.query_utils import as_float, between_days, daily_last, on_day
+from typing import Optional, List, Tuple
 from datetime import date, datetime, timedelta
 
+# Cột đọc trên đường nóng: chỉ lấy cột, giá cast float8 ngay trong SQL (không dựng entity / Decimal từng dòng)
+PRICE_COLUMNS = (GoldPrice.timestamp, as_float(GoldPrice.buy_price), as_float(GoldPrice.sell_price))
+
+
 class GoldPriceRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -17,9 +21,9 @@ class GoldPriceRepository:
     def get_unit_by_code(self, code: str) -> Optional[Unit]:
         return self.db.query(Unit).filter_by(code=code).first()
 
-    def get_latest(self, gold_type_id: int, location_id: int, unit_id: int) -> Optional[GoldPrice]:
+    def get_latest(self, gold_type_id: int, location_id: int, unit_id: int) -> Optional[Tuple[datetime, float, float]]:
         return (
-            self.db.query(GoldPrice)
+            self.db.query(*PRICE_COLUMNS)
             .filter_by(gold_type_id=gold_type_id, location_id=location_id, unit_id=unit_id)
             .order_by(GoldPrice.timestamp.desc())
             .first()
@@ -28,53 +32,64 @@ class GoldPriceRepository:
     def get_latest_of_previous_day(self, gold_type_id, location_id, unit_id, current_timestamp):
         prev_day = (current_timestamp.date() - timedelta(days=1))
         return (
-            self.db.query(GoldPrice)
+            self.db.query(*PRICE_COLUMNS)
             .filter(
                 GoldPrice.gold_type_id == gold_type_id,
                 GoldPrice.location_id == location_id,
                 GoldPrice.unit_id == unit_id,
-                func.date(GoldPrice.timestamp) == prev_day,
+                on_day(GoldPrice.timestamp, prev_day),
             )
             .order_by(GoldPrice.timestamp.desc())
             .first()
         )
 
-    def get_range(self, gold_type_id: int, location_id: int, unit_id: int, start: date, end: date) -> List[GoldPrice]:
+    def get_range(self, gold_type_id: int, location_id: int, unit_id: int, start: date, end: date) -> List[Tuple[datetime, float, float]]:
+        """(timestamp, buy_price, sell_price) tuples of one series, oldest first."""
         return (
-            self.db.query(GoldPrice)
+            self.db.query(*PRICE_COLUMNS)
             .filter(
                 GoldPrice.gold_type_id == gold_type_id,
                 GoldPrice.location_id == location_id,
                 GoldPrice.unit_id == unit_id,
-                GoldPrice.timestamp >= datetime.combine(start, datetime.min.time()),
-                GoldPrice.timestamp < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+                between_days(GoldPrice.timestamp, start, end),
             )
             .order_by(GoldPrice.timestamp)
             .all()
         )
 
-    def get_latest_group_by_key(self, target_date: date) -> List[GoldPrice]:
-        prices = (
-            self.db.query(GoldPrice)
-            .filter(func.date(GoldPrice.timestamp) == target_date)
-            .order_by(
-                GoldPrice.gold_type_id,
-                GoldPrice.unit_id,
-                GoldPrice.location_id,
-                GoldPrice.timestamp.desc(),
-            )
-            .all()
+    def get_daily_range(self, gold_type_ids: List[int], location_ids: List[int], start: date, end: date, ohlc: bool = False) -> List:
+        return daily_last(
+            self.db,
+            GoldPrice.timestamp,
+            [GoldPrice.buy_price, GoldPrice.sell_price],
+            [
+                GoldPrice.gold_type_id.in_(gold_type_ids),
+                GoldPrice.location_id.in_(location_ids),
+            ],
+            start,
+            end,
+            # Cùng thứ tự (gold_type, unit, location) với rollup_repo.get_gold_daily
+            key_cols=[GoldPrice.gold_type_id, GoldPrice.unit_id, GoldPrice.location_id],
+            ohlc_col=GoldPrice.sell_price if ohlc else None,
+        )
+
+    def get_latest_group_by_key(self, start: date, end: Optional[date] = None) -> List:
+        # Tick cuối ngày của mỗi (gold_type, unit, location) cho từng ngày start..end, tính bằng
+        # DISTINCT ON trong SQL (một round trip cho cả ngày đang xem và ngày trước đó).
+        # Chỉ lấy cột, không trả entity: mã gold_type/unit/location do service lấy từ registry
+        return daily_last(
+            self.db,
+            GoldPrice.timestamp,
+            [GoldPrice.buy_price, GoldPrice.sell_price],
+            [],
+            start,
+            end or start,
+            key_cols=[GoldPrice.gold_type_id, GoldPrice.unit_id, GoldPrice.location_id],
         )
-        latest = {}
-        for p in prices:
-            key = (p.gold_type_id, p.unit_id, p.location_id)
-            if key not in latest:
-                latest[key] = p
-        return list(latest.values())
 
     def get_latest_before(self, gold_type_id, location_id, unit_id, before_ts):
         return (
-            self.db.query(GoldPrice)
+            self.db.query(*PRICE_COLUMNS)
             .filter(
                 GoldPrice.gold_type_id == gold_type_id,
                 GoldPrice.location_id == location_id,
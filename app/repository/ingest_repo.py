@@ -0,0 +1,102 @@
+import io
+from datetime import date, datetime
+from typing import Iterable, List, Sequence, Tuple
+from sqlalchemy.orm import Session
+
+
+class UpsertTarget:
+    def __init__(self, table: str, columns: Sequence[str], key_columns: Sequence[str]):
+        self.table = table
+        self.columns = tuple(columns)
+        self.key_columns = tuple(key_columns)
+        self.update_columns = tuple(c for c in columns if c not in key_columns)
+        self.key_positions = tuple(self.columns.index(c) for c in key_columns)
+
+
+GOLD_PRICES = UpsertTarget(
+    "gold_prices",
+    ["timestamp", "gold_type_id", "unit_id", "location_id", "buy_price", "sell_price"],
+    ["timestamp", "gold_type_id", "unit_id", "location_id"],
+)
+CENTRAL_RATES = UpsertTarget(
+    "exchange_central_rates",
+    ["currency_id", "date", "rate", "published_at"],
+    ["currency_id", "date"],
+)
+MARKET_RATES = UpsertTarget(
+    "exchange_market_rates",
+    ["currency_id", "timestamp", "source", "type", "rate"],
+    ["currency_id", "timestamp", "source", "type"],
+)
+INDEX_VALUES = UpsertTarget(
+    "financial_index_values",
+    ["index_id", "timestamp", "source", "value"],
+    ["index_id", "timestamp", "source"],
+)
+
+
+def _copy_value(v) -> str:
+    # Định dạng text của COPY: \N là NULL, escape \, tab, xuống dòng
+    if v is None:
+        return "\\N"
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    s = str(v)
+    if "\\" in s or "\t" in s or "\n" in s or "\r" in s:
+        s = s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return s
+
+
+class IngestRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[tuple]):
+        buf = io.StringIO()
+        buf.writelines("\t".join(map(_copy_value, row)) + "\n" for row in rows)
+        buf.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+        finally:
+            cursor.close()
+
+    def upsert(self, target: UpsertTarget, rows: List[tuple]) -> Tuple[int, int]:
+        """COPY rows into a temp staging table, then merge them with INSERT ... ON CONFLICT.
+
+        Rows whose values are identical to what is stored are left untouched;
+        within the batch the last row for a key wins. Returns (inserted, updated),
+        the caller derives skipped from the batch size.
+        """
+        if not rows:
+            return 0, 0
+        # Khử trùng khóa trong batch ở Python (ON CONFLICT DO UPDATE không sửa 1 dòng 2 lần trong 1 lệnh)
+        positions = target.key_positions
+        rows = list({tuple(row[i] for i in positions): row for row in rows}.values())
+        staging = f"_stage_{target.table}"
+        cols = ", ".join(target.columns)
+        keys = ", ".join(target.key_columns)
+        self.db.connection().exec_driver_sql(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {target.table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        self.db.connection().exec_driver_sql(f"TRUNCATE {staging}")
+        self.copy_rows(staging, target.columns, rows)
+        update_set = ", ".join(f"{c} = EXCLUDED.{c}" for c in target.update_columns)
+        changed = " OR ".join(f"t.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in target.update_columns)
+        # Bảng tick đã partition không cho RETURNING xmax, nên đếm số khóa đã tồn tại
+        # (CTE cùng snapshot với INSERT nên thấy trạng thái trước khi merge)
+        sql = f"""
+            WITH existing AS (
+                SELECT count(*) AS n FROM {staging} s JOIN {target.table} t USING ({keys})
+            ), merged AS (
+                INSERT INTO {target.table} AS t ({cols})
+                SELECT {cols} FROM {staging}
+                ON CONFLICT ({keys}) DO UPDATE SET {update_set}
+                WHERE {changed}
+                RETURNING 1
+            )
+            SELECT (SELECT n FROM existing), (SELECT count(*) FROM merged)
+        """
+        existing, changed_rows = self.db.connection().exec_driver_sql(sql).one()
+        inserted = len(rows) - existing
+        return inserted, changed_rows - inserted
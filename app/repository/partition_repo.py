@@ -0,0 +1,102 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Tuple
+from datetime import date, datetime
+
+# Bảng tick được partition theo tháng trên cột timestamp (migration 9c1f6a2d4e73)
+PARTITIONED_TABLES = ("gold_prices", "exchange_market_rates", "financial_index_values")
+
+
+class DetachedPartitionError(ValueError):
+    """The partition of a month exists as a standalone (detached, archived) table."""
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, months: int) -> date:
+    m = d.year * 12 + d.month - 1 + months
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def parent_table(relation: str) -> str:
+    """Map a partition name (gold_prices_p202610) back to its parent table."""
+    base, _, suffix = relation.rpartition("_p")
+    return base if base in PARTITIONED_TABLES and suffix.isdigit() else relation
+
+
+class PartitionRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_partitions(self, table: str) -> List[Tuple[str, date]]:
+        """(partition name, first day of month) of the monthly partitions attached to `table`, oldest first."""
+        names = self.db.execute(
+            text("""
+                SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:table AS regclass)
+            """),
+            {"table": table},
+        ).scalars()
+        months = []
+        for name in names:
+            suffix = name.rpartition("_p")[2]
+            if suffix.isdigit() and len(suffix) == 6:
+                months.append((name, date(int(suffix[:4]), int(suffix[4:]), 1)))
+        return sorted(months, key=lambda p: p[1])
+
+    def create_month(self, table: str, month: date) -> str:
+        """Create and attach the partition of `month`.
+
+        Bảng con được tạo rời rồi ATTACH (SHARE UPDATE EXCLUSIVE trên bảng cha)
+        thay vì CREATE TABLE ... PARTITION OF (ACCESS EXCLUSIVE), nên không chặn
+        đọc/ghi đang chạy trên các partition khác.
+
+        Raises DetachedPartitionError if a table of that name exists but is not attached:
+        it is a partition detached for archiving, and silently re-attaching it
+        would bring the archived ticks back; re-attach or drop it by hand.
+        """
+        name = partition_name(table, month)
+        existing = self.db.execute(
+            text("""
+                SELECT c.oid, i.inhparent IS NOT NULL FROM pg_class c
+                LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND i.inhparent = CAST(:table AS regclass)
+                WHERE c.oid = to_regclass(:name)
+            """),
+            {"table": table, "name": name},
+        ).first()
+        if existing is not None:
+            if existing[1]:
+                return name
+            raise DetachedPartitionError(f"{name} tồn tại nhưng không thuộc {table} (partition đã detach để archive?)")
+        self.db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+        self.db.execute(
+            text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+        )
+        return name
+
+    def ensure_months(self, table: str, start: date, end: date) -> List[str]:
+        """Make sure every month from start's to end's has a partition; returns the ones created."""
+        months = []
+        month = month_start(start)
+        while month <= end:
+            months.append(month)
+            month = add_months(month, 1)
+        missing = set(months) - {m for _, m in self.list_partitions(table)}
+        if not missing:
+            return []
+        # Nhiều worker/ingest cùng tạo một tháng: khóa theo bảng rồi kiểm tra lại
+        self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"partitions:{table}"})
+        missing -= {m for _, m in self.list_partitions(table)}
+        return [self.create_month(table, m) for m in sorted(missing)]
+
+    def ensure_for_timestamps(self, table: str, first: datetime, last: datetime) -> List[str]:
+        return self.ensure_months(table, first.date(), last.date())
@@ -0,0 +1,64 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, Double, and_, cast, func
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
+
+
+def day_bounds(d: date) -> Tuple[datetime, datetime]:
+    """Half-open [00:00 of d, 00:00 of d+1) bounds of a calendar day."""
+    start = datetime.combine(d, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def on_day(timestamp_col, d: date):
+    # Thay cho func.date(col) == d: so sánh trực tiếp trên cột để dùng được index
+    start, end = day_bounds(d)
+    return and_(timestamp_col >= start, timestamp_col < end)
+
+
+def between_days(timestamp_col, start: date, end: date):
+    """Sargable filter for `start <= date(col) <= end` (inclusive dates)."""
+    return and_(timestamp_col >= day_bounds(start)[0], timestamp_col < day_bounds(end)[1])
+
+
+def as_float(col):
+    """`col` cast to float8 in SQL, keeping its name: rows carry Python floats instead of Decimal."""
+    return cast(col, Double).label(col.key)
+
+
+def daily_last(
+    db: Session,
+    timestamp_col,
+    value_cols: list,
+    filters: list,
+    start: date,
+    end: date,
+    key_cols: Optional[list] = None,
+    ohlc_col=None,
+) -> List:
+    """Downsample tick rows to one row per series key per day (last tick of the day), in SQL.
+
+    `start`/`end` are inclusive dates. Each returned row carries the `key_cols`,
+    `day`, `timestamp` and the requested value columns, ordered by key then day;
+    when `ohlc_col` is given the row also has `open`, `high`, `low` of that column
+    over the day (the close is the value of the row itself). Values are float8.
+    """
+    key_cols = key_cols or []
+    day = cast(timestamp_col, Date)
+    partition = [*key_cols, day]
+    columns = [*key_cols, day.label("day"), timestamp_col.label("timestamp"), *map(as_float, value_cols)]
+    if ohlc_col is not None:
+        ohlc_col = cast(ohlc_col, Double)
+        columns += [
+            func.first_value(ohlc_col).over(partition_by=partition, order_by=timestamp_col.asc()).label("open"),
+            func.max(ohlc_col).over(partition_by=partition).label("high"),
+            func.min(ohlc_col).over(partition_by=partition).label("low"),
+        ]
+    return (
+        db.query(*columns)
+        .filter(*filters, between_days(timestamp_col, start, end))
+        # DISTINCT ON (key..., day) giữ lại tick cuối cùng của mỗi series mỗi ngày
+        .distinct(*partition)
+        .order_by(*partition, timestamp_col.desc())
+        .all()
+    )
@@ -0,0 +1,245 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Double, cast, text
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from datetime import date, datetime, timedelta
+from app.models.gold import GoldPriceDaily
+from app.models.exchange import MarketRateDaily, IndexValueDaily
+from app.models.rollup import RollupWatermark
+from app.repository.partition_repo import PartitionRepository, PARTITIONED_TABLES, add_months
+from app.repository.query_utils import as_float, day_bounds
+
+
+class RollupTarget:
+    def __init__(
+        self,
+        table: str,
+        source: str,
+        key_columns: Sequence[str],
+        value_column: str,
+        extra_closes: Optional[Dict[str, str]] = None,
+    ):
+        self.table = table
+        self.source = source
+        self.key_columns = tuple(key_columns)
+        self.value_column = value_column
+        # {cột rollup: cột tick} lấy giá trị của tick cuối ngày (vd. buy_close <- buy_price)
+        self.extra_closes = dict(extra_closes or {})
+
+
+GOLD_DAILY = RollupTarget(
+    "gold_price_daily",
+    "gold_prices",
+    ["gold_type_id", "location_id", "unit_id"],
+    "sell_price",
+    {"buy_close": "buy_price"},
+)
+MARKET_DAILY = RollupTarget("exchange_market_daily", "exchange_market_rates", ["currency_id"], "rate")
+INDEX_DAILY = RollupTarget("financial_index_daily", "financial_index_values", ["index_id"], "value")
+
+ROLLUP_TARGETS = (GOLD_DAILY, MARKET_DAILY, INDEX_DAILY)
+
+
+def _day_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Group days into (first, last) runs of consecutive days, oldest first."""
+    runs = []
+    for day in sorted(set(days)):
+        if runs and runs[-1][1] + timedelta(days=1) == day:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+class RollupRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # -------- REFRESH ----------
+    def refresh(self, target: RollupTarget, start: date, end: date, series: Optional[Dict[str, Sequence[int]]] = None):
+        """Recompute the rollup rows of days start..end (inclusive) from the tick table.
+
+        `series` optionally narrows the refresh to some key values, e.g.
+        {"currency_id": [1, 2]}; days without ticks left in range are removed.
+        Days of months whose partition is detached (archived) keep their rollup rows.
+        """
+        keys = ", ".join(target.key_columns)
+        v = target.value_column
+        params = {}
+        where = ""
+        for col, ids in (series or {}).items():
+            where += f" AND {col} = ANY(:{col})"
+            params[col] = sorted(set(ids))
+        extra_cols = "".join(f", {c}" for c in target.extra_closes)
+        extra_vals = "".join(f", (array_agg({src} ORDER BY timestamp DESC))[1]" for src in target.extra_closes.values())
+        delete = text(f"DELETE FROM {target.table} WHERE day >= :start_day AND day <= :end_day{where}")
+        insert = text(f"""
+            INSERT INTO {target.table} ({keys}, day, open, high, low, close{extra_cols}, last_timestamp, tick_count)
+            SELECT {keys}, CAST(timestamp AS date),
+                (array_agg({v} ORDER BY timestamp))[1], max({v}), min({v}),
+                (array_agg({v} ORDER BY timestamp DESC))[1]{extra_vals},
+                max(timestamp), count(*)
+            FROM {target.source}
+            WHERE timestamp >= :start_ts AND timestamp < :end_ts{where}
+            GROUP BY {keys}, CAST(timestamp AS date)
+        """)
+        for span_start, span_end in self._attached_spans(target, start, end):
+            params.update(
+                start_day=span_start, end_day=span_end,
+                start_ts=day_bounds(span_start)[0], end_ts=day_bounds(span_end)[1],
+            )
+            self.db.execute(delete, params)
+            self.db.execute(insert, params)
+
+    def _attached_spans(self, target: RollupTarget, start: date, end: date) -> List[Tuple[date, date]]:
+        """Split start..end into the contiguous spans whose ticks live in attached partitions."""
+        if target.source not in PARTITIONED_TABLES:
+            return [(start, end)]
+        spans = []
+        for _, month in PartitionRepository(self.db).list_partitions(target.source):
+            lo, hi = max(start, month), min(end, add_months(month, 1) - timedelta(days=1))
+            if lo > hi:
+                continue
+            if spans and spans[-1][1] + timedelta(days=1) == lo:
+                spans[-1] = (spans[-1][0], hi)
+            else:
+                spans.append((lo, hi))
+        return spans
+
+    def refresh_settled(self, target: RollupTarget, days: Iterable[date], series: Dict[str, Sequence[int]]):
+        """Recompute settled days (before the watermark's day) touched by a write; later days are read from ticks."""
+        watermark = self.get_watermark(target)
+        if watermark is None:
+            return
+        # Chỉ tính lại đúng các ngày bị ghi, gom thành từng đoạn ngày liên tiếp
+        for run_start, run_end in _day_runs(d for d in days if d < watermark.date()):
+            self.refresh(target, run_start, run_end, series)
+
+    def refresh_incremental(self, target: RollupTarget, full: bool = False) -> Optional[tuple]:
+        """Roll up every day from the watermark's day to the newest tick and advance the watermark.
+
+        The watermark day itself is recomputed because it may have been partial
+        last time; `full` starts from the oldest tick still stored. Settled days
+        recorded in rollup_dirty_days (ticks written, changed or deleted by any
+        writer, including crawlers and backfills) are recomputed as well. Days
+        whose partitions were detached for archiving keep their rollup rows.
+        Returns (start, end, dirty days recomputed before start), None if there
+        are no ticks or another worker is already refreshing this table.
+        """
+        # Nhiều worker cùng chạy job: chỉ một transaction được refresh mỗi bảng
+        locked = self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:table_name))"), {"table_name": target.table}
+        ).scalar()
+        if not locked:
+            return None
+        # Nhận các ngày bẩn trong cùng transaction: ghi đồng thời sau câu này để lại dòng mới cho lần sau
+        dirty = self.db.execute(
+            text("DELETE FROM rollup_dirty_days WHERE table_name = :source RETURNING day"), {"source": target.source}
+        ).scalars().all()
+        newest = self.db.execute(text(f"SELECT max(timestamp) FROM {target.source}")).scalar()
+        if newest is None:
+            # Mọi tick đã bị xoá: bỏ các dòng rollup của những ngày đó
+            for run_start, run_end in _day_runs(dirty):
+                self.refresh(target, run_start, run_end)
+            return None
+        watermark = None if full else self.get_watermark(target)
+        if watermark is None:
+            start = self.db.execute(text(f"SELECT min(timestamp) FROM {target.source}")).scalar().date()
+        else:
+            start = watermark.date()
+        end = newest.date()
+        # Ngày bẩn từ start trở đi đã nằm trong khoảng tính lại bên dưới
+        settled = [d for d in dirty if d < start]
+        for run_start, run_end in _day_runs(settled):
+            self.refresh(target, run_start, run_end)
+        self.refresh(target, start, end)
+        self.db.execute(
+            text("""
+                INSERT INTO rollup_watermarks (table_name, last_timestamp, updated_at)
+                VALUES (:table_name, :last_timestamp, now())
+                ON CONFLICT (table_name) DO UPDATE SET
+                    last_timestamp = EXCLUDED.last_timestamp, updated_at = EXCLUDED.updated_at
+            """),
+            {"table_name": target.table, "last_timestamp": newest},
+        )
+        return start, end, len(settled)
+
+    # -------- READ ----------
+    def get_watermark(self, target: RollupTarget) -> Optional[datetime]:
+        row = self.db.get(RollupWatermark, target.table)
+        return row.last_timestamp if row else None
+
+    def read_daily(
+        self,
+        target: RollupTarget,
+        start: date,
+        end: date,
+        read_rollup: Callable[[date, date], List],
+        read_ticks: Callable[[date, date], List],
+    ) -> List:
+        """Daily rows for start..end: settled days from the rollup table, the rest from ticks.
+
+        Days before the watermark's day are settled; from that day on the tick
+        table is read directly, so a lagging refresh job never hides recent data.
+        Rollup rows come first, both parts are ordered by key then day.
+        """
+        watermark = self.get_watermark(target)
+        settled = watermark.date() if watermark else None
+        if settled is None or settled <= start:
+            return read_ticks(start, end)
+        rows = read_rollup(start, min(end, settled - timedelta(days=1)))
+        if end >= settled:
+            rows += read_ticks(settled, end)
+        return rows
+
+    def get_gold_daily(
+        self, start: date, end: date, gold_type_ids: Optional[List[int]] = None, location_ids: Optional[List[int]] = None
+    ) -> List:
+        # Cùng tên cột với daily_last trên gold_prices để service dùng chung một cách đọc
+        q = self.db.query(
+            GoldPriceDaily.gold_type_id,
+            GoldPriceDaily.location_id,
+            GoldPriceDaily.unit_id,
+            GoldPriceDaily.day,
+            GoldPriceDaily.last_timestamp.label("timestamp"),
+            cast(GoldPriceDaily.buy_close, Double).label("buy_price"),
+            cast(GoldPriceDaily.close, Double).label("sell_price"),
+            as_float(GoldPriceDaily.open),
+            as_float(GoldPriceDaily.high),
+            as_float(GoldPriceDaily.low),
+        ).filter(GoldPriceDaily.day >= start, GoldPriceDaily.day <= end)
+        if gold_type_ids is not None:
+            q = q.filter(GoldPriceDaily.gold_type_id.in_(gold_type_ids))
+        if location_ids is not None:
+            q = q.filter(GoldPriceDaily.location_id.in_(location_ids))
+        # Cùng thứ tự (gold_type, unit, location, day) với get_daily_range/get_latest_group_by_key trên tick
+        return q.order_by(
+            GoldPriceDaily.gold_type_id, GoldPriceDaily.unit_id, GoldPriceDaily.location_id, GoldPriceDaily.day
+        ).all()
+
+    def get_market_daily(self, start: date, end: date, currency_ids: Optional[List[int]] = None) -> List:
+        q = self.db.query(
+            MarketRateDaily.currency_id,
+            MarketRateDaily.day,
+            MarketRateDaily.last_timestamp.label("timestamp"),
+            MarketRateDaily.close.label("rate"),
+            MarketRateDaily.open,
+            MarketRateDaily.high,
+            MarketRateDaily.low,
+        ).filter(MarketRateDaily.day >= start, MarketRateDaily.day <= end)
+        if currency_ids is not None:
+            q = q.filter(MarketRateDaily.currency_id.in_(currency_ids))
+        return q.order_by(MarketRateDaily.currency_id, MarketRateDaily.day).all()
+
+    def get_index_daily(self, start: date, end: date, index_ids: Optional[List[int]] = None) -> List:
+        q = self.db.query(
+            IndexValueDaily.index_id,
+            IndexValueDaily.day,
+            IndexValueDaily.last_timestamp.label("timestamp"),
+            IndexValueDaily.close.label("value"),
+            IndexValueDaily.open,
+            IndexValueDaily.high,
+            IndexValueDaily.low,
+        ).filter(IndexValueDaily.day >= start, IndexValueDaily.day <= end)
+        if index_ids is not None:
+            q = q.filter(IndexValueDaily.index_id.in_(index_ids))
+        return q.order_by(IndexValueDaily.index_id, IndexValueDaily.day).all()
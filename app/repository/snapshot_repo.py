@@ -0,0 +1,241 @@
+import json
+from sqlalchemy.orm import Session
+from sqlalchemy import text, tuple_
+from typing import Iterable, List, Optional, Tuple
+from datetime import datetime
+from app.models.gold import GoldPriceSnapshot
+from app.models.exchange import ExchangeSnapshot
+
+# Các câu refresh nhận danh sách key qua unnest(array): chỉ tính lại series được truyền vào.
+# Tick mới nhất lấy bằng ORDER BY timestamp DESC LIMIT 1, giá "hôm trước" là tick cuối
+# của ngày liền trước ngày của tick mới nhất (giống get_latest_of_previous_day).
+
+_GOLD_REFRESH = """
+INSERT INTO gold_price_snapshots AS s (
+    gold_type_id, location_id, unit_id, timestamp, buy_price, sell_price,
+    prev_timestamp, prev_buy_price, prev_sell_price,
+    delta_buy, delta_sell, delta_buy_percent, delta_sell_percent, updated_at
+)
+SELECT
+    k.gold_type_id, k.location_id, k.unit_id, l.timestamp, l.buy_price, l.sell_price,
+    p.timestamp, p.buy_price, p.sell_price,
+    (l.buy_price - p.buy_price)::float8,
+    (l.sell_price - p.sell_price)::float8,
+    (l.buy_price - p.buy_price)::float8 / NULLIF(p.buy_price, 0)::float8 * 100,
+    (l.sell_price - p.sell_price)::float8 / NULLIF(p.sell_price, 0)::float8 * 100,
+    now()
+FROM unnest(CAST(:gold_type_ids AS integer[]), CAST(:location_ids AS integer[]), CAST(:unit_ids AS integer[]))
+    AS k(gold_type_id, location_id, unit_id)
+CROSS JOIN LATERAL (
+    SELECT g.timestamp, g.buy_price, g.sell_price FROM gold_prices g
+    WHERE g.gold_type_id = k.gold_type_id AND g.location_id = k.location_id AND g.unit_id = k.unit_id
+    ORDER BY g.timestamp DESC LIMIT 1
+) l
+LEFT JOIN LATERAL (
+    SELECT g.timestamp, g.buy_price, g.sell_price FROM gold_prices g
+    WHERE g.gold_type_id = k.gold_type_id AND g.location_id = k.location_id AND g.unit_id = k.unit_id
+      AND g.timestamp >= date_trunc('day', l.timestamp) - interval '1 day'
+      AND g.timestamp < date_trunc('day', l.timestamp)
+    ORDER BY g.timestamp DESC LIMIT 1
+) p ON true
+ON CONFLICT (gold_type_id, location_id, unit_id) DO UPDATE SET
+    timestamp = EXCLUDED.timestamp, buy_price = EXCLUDED.buy_price, sell_price = EXCLUDED.sell_price,
+    prev_timestamp = EXCLUDED.prev_timestamp, prev_buy_price = EXCLUDED.prev_buy_price,
+    prev_sell_price = EXCLUDED.prev_sell_price, delta_buy = EXCLUDED.delta_buy,
+    delta_sell = EXCLUDED.delta_sell, delta_buy_percent = EXCLUDED.delta_buy_percent,
+    delta_sell_percent = EXCLUDED.delta_sell_percent, updated_at = EXCLUDED.updated_at
+"""
+
+_EXCHANGE_UPSERT = """
+ON CONFLICT (kind, series_id) DO UPDATE SET
+    timestamp = EXCLUDED.timestamp, value = EXCLUDED.value, published_at = EXCLUDED.published_at,
+    prev_timestamp = EXCLUDED.prev_timestamp, prev_value = EXCLUDED.prev_value,
+    delta = EXCLUDED.delta, delta_percent = EXCLUDED.delta_percent, updated_at = EXCLUDED.updated_at
+"""
+
+_EXCHANGE_COLUMNS = """
+INSERT INTO exchange_snapshots AS s (
+    kind, series_id, timestamp, value, published_at, prev_timestamp, prev_value, delta, delta_percent, updated_at
+)
+"""
+
+_CENTRAL_REFRESH = _EXCHANGE_COLUMNS + """
+SELECT 'central', k.id, l.date::timestamp, l.rate, l.published_at, p.date::timestamp, p.rate,
+    l.rate - p.rate, (l.rate - p.rate) / NULLIF(p.rate, 0) * 100, now()
+FROM unnest(CAST(:ids AS integer[])) AS k(id)
+CROSS JOIN LATERAL (
+    SELECT c.date, c.rate, c.published_at FROM exchange_central_rates c
+    WHERE c.currency_id = k.id ORDER BY c.date DESC LIMIT 1
+) l
+LEFT JOIN exchange_central_rates p ON p.currency_id = k.id AND p.date = l.date - 1
+""" + _EXCHANGE_UPSERT
+
+
+def _tick_refresh(kind: str, table: str, id_col: str, value_col: str) -> str:
+    return _EXCHANGE_COLUMNS + f"""
+SELECT '{kind}', k.id, l.timestamp, l.{value_col}, NULL, p.timestamp, p.{value_col},
+    l.{value_col} - p.{value_col}, (l.{value_col} - p.{value_col}) / NULLIF(p.{value_col}, 0) * 100, now()
+FROM unnest(CAST(:ids AS integer[])) AS k(id)
+CROSS JOIN LATERAL (
+    SELECT t.timestamp, t.{value_col} FROM {table} t
+    WHERE t.{id_col} = k.id ORDER BY t.timestamp DESC LIMIT 1
+) l
+LEFT JOIN LATERAL (
+    SELECT t.timestamp, t.{value_col} FROM {table} t
+    WHERE t.{id_col} = k.id
+      AND t.timestamp >= date_trunc('day', l.timestamp) - interval '1 day'
+      AND t.timestamp < date_trunc('day', l.timestamp)
+    ORDER BY t.timestamp DESC LIMIT 1
+) p ON true
+""" + _EXCHANGE_UPSERT
+
+
+_EXCHANGE_REFRESH = {
+    "central": (_CENTRAL_REFRESH, "SELECT DISTINCT currency_id FROM exchange_central_rates"),
+    "market": (
+        _tick_refresh("market", "exchange_market_rates", "currency_id", "rate"),
+        "SELECT DISTINCT currency_id FROM exchange_market_rates",
+    ),
+    "index": (
+        _tick_refresh("index", "financial_index_values", "index_id", "value"),
+        "SELECT DISTINCT index_id FROM financial_index_values",
+    ),
+}
+
+# Series có tick mới nhất khác với snapshot (hoặc chưa có snapshot): crawler ghi thẳng vào
+# bảng tick nên snapshot của chúng chỉ được bắt kịp bằng job định kỳ. Ứng viên lấy từ bảng
+# dimension, max(timestamp) của từng series đọc ngược trên PK (key, timestamp).
+_GOLD_STALE = """
+SELECT k.gold_type_id, k.location_id, k.unit_id
+FROM (
+    SELECT gt.id AS gold_type_id, l.id AS location_id, u.id AS unit_id
+    FROM gold_types gt CROSS JOIN locations l CROSS JOIN units u
+) k
+CROSS JOIN LATERAL (
+    SELECT max(g.timestamp) AS timestamp FROM gold_prices g
+    WHERE g.gold_type_id = k.gold_type_id AND g.location_id = k.location_id AND g.unit_id = k.unit_id
+) t
+LEFT JOIN gold_price_snapshots s
+    ON s.gold_type_id = k.gold_type_id AND s.location_id = k.location_id AND s.unit_id = k.unit_id
+WHERE t.timestamp IS NOT NULL AND t.timestamp IS DISTINCT FROM s.timestamp
+"""
+
+
+def _exchange_stale(kind: str, dim_table: str, latest: str) -> str:
+    return f"""
+SELECT d.id FROM {dim_table} d
+CROSS JOIN LATERAL ({latest}) t
+LEFT JOIN exchange_snapshots s ON s.kind = '{kind}' AND s.series_id = d.id
+WHERE t.timestamp IS NOT NULL AND t.timestamp IS DISTINCT FROM s.timestamp
+"""
+
+
+_EXCHANGE_STALE = {
+    "central": _exchange_stale(
+        "central", "currency", "SELECT max(c.date)::timestamp AS timestamp FROM exchange_central_rates c WHERE c.currency_id = d.id"
+    ),
+    "market": _exchange_stale(
+        "market", "currency", "SELECT max(t.timestamp) AS timestamp FROM exchange_market_rates t WHERE t.currency_id = d.id"
+    ),
+    "index": _exchange_stale(
+        "index", "financial_index", "SELECT max(t.timestamp) AS timestamp FROM financial_index_values t WHERE t.index_id = d.id"
+    ),
+}
+
+# Version dữ liệu theo namespace: updated_at của từng key đổi mỗi lần snapshot được refresh
+# (kể cả khi ingest chỉ sửa dữ liệu cũ), nên hash của (key, updated_at) đổi theo mọi lần ghi
+_VERSION = {
+    "gold": (
+        "gold_price_snapshots",
+        "gold_type_id || ':' || location_id || ':' || unit_id",
+        "gold_type_id, location_id, unit_id",
+    ),
+    "exchange": ("exchange_snapshots", "kind || ':' || series_id", "kind, series_id"),
+}
+
+
+# Kênh LISTEN/NOTIFY báo snapshot vừa đổi (app.services.broadcaster nghe kênh này).
+# NOTIFY nằm trong transaction của refresh: chỉ được gửi khi commit, rollback thì không.
+NOTIFY_CHANNEL = "market_snapshots"
+# Payload NOTIFY tối đa 8000 byte; danh sách key dài hơn thì gửi keys = null (= mọi series)
+_NOTIFY_MAX_BYTES = 7900
+
+
+class SnapshotRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_gold(self, gold_type_id: int, location_id: int, unit_id: int) -> Optional[GoldPriceSnapshot]:
+        return self.db.get(GoldPriceSnapshot, (gold_type_id, location_id, unit_id))
+
+    def get_exchange(self, kind: str, series_id: int) -> Optional[ExchangeSnapshot]:
+        return self.db.get(ExchangeSnapshot, (kind, series_id))
+
+    def refresh_gold(self, keys: Optional[Iterable[Tuple[int, int, int]]] = None):
+        """Recompute snapshots for (gold_type_id, location_id, unit_id) keys; None = every series."""
+        if keys is None:
+            keys = self.db.execute(text("SELECT DISTINCT gold_type_id, location_id, unit_id FROM gold_prices")).all()
+        keys = list(keys)
+        if not keys:
+            return
+        gold_type_ids, location_ids, unit_ids = (list(col) for col in zip(*keys))
+        self.db.execute(
+            text(_GOLD_REFRESH),
+            {"gold_type_ids": gold_type_ids, "location_ids": location_ids, "unit_ids": unit_ids},
+        )
+        self._notify("gold", [list(k) for k in keys])
+
+    def refresh_exchange(self, kind: str, ids: Optional[Iterable[int]] = None):
+        """Recompute snapshots of one kind ('central', 'market', 'index'); None = every series."""
+        sql, all_ids = _EXCHANGE_REFRESH[kind]
+        if ids is None:
+            ids = self.db.execute(text(all_ids)).scalars()
+        ids = list(ids)
+        if ids:
+            self.db.execute(text(sql), {"ids": ids})
+            self._notify(kind, ids)
+
+    def stale_gold_keys(self) -> List[Tuple[int, int, int]]:
+        """Gold series whose newest tick is not the one in their snapshot."""
+        return [tuple(row) for row in self.db.execute(text(_GOLD_STALE)).all()]
+
+    def stale_exchange_ids(self, kind: str) -> List[int]:
+        """Series of one kind whose newest tick is not the one in their snapshot."""
+        return list(self.db.execute(text(_EXCHANGE_STALE[kind])).scalars())
+
+    def _notify(self, kind: str, keys: list):
+        payload = json.dumps({"kind": kind, "keys": keys}, separators=(",", ":"))
+        if len(payload) > _NOTIFY_MAX_BYTES:
+            payload = json.dumps({"kind": kind, "keys": None}, separators=(",", ":"))
+        self.db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": payload})
+
+    def list_gold(self, keys: Optional[Iterable[Tuple[int, int, int]]] = None) -> List[GoldPriceSnapshot]:
+        """Snapshots of the given (gold_type_id, location_id, unit_id) keys; None = every series."""
+        q = self.db.query(GoldPriceSnapshot)
+        if keys is not None:
+            q = q.filter(
+                tuple_(GoldPriceSnapshot.gold_type_id, GoldPriceSnapshot.location_id, GoldPriceSnapshot.unit_id)
+                .in_([tuple(k) for k in keys])
+            )
+        return q.all()
+
+    def list_exchange(self, kind: Optional[str] = None, ids: Optional[Iterable[int]] = None) -> List[ExchangeSnapshot]:
+        """Snapshots of one kind (None = every kind), optionally only the given series ids."""
+        q = self.db.query(ExchangeSnapshot)
+        if kind is not None:
+            q = q.filter(ExchangeSnapshot.kind == kind)
+        if ids is not None:
+            q = q.filter(ExchangeSnapshot.series_id.in_(list(ids)))
+        return q.all()
+
+    def version(self, namespace: str) -> Tuple[Optional[datetime], str]:
+        """(last modification in UTC, opaque version tag) of the "gold" or "exchange" data."""
+        table, key, order = _VERSION[namespace]
+        last_modified, tag = self.db.execute(
+            text(f"""
+                SELECT max(updated_at)::timestamptz AT TIME ZONE 'UTC',
+                    md5(coalesce(string_agg({key} || '@' || updated_at, ',' ORDER BY {order}), ''))
+                FROM {table}
+            """)
+        ).one()
+        return last_modified, tag
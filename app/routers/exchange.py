@@ -1,40 +1,66 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
-from typing import List
-from app.database import get_db
-from app.services.exchange_service import ExchangeService
+from typing import List, Literal, Optional, Union
+from app.database import get_async_db
+from app.utils.chart_formats import BINARY_CHART_RESPONSES, binary_media_type, chart_response
+from app.utils.fast_json import FastJSONResponse
+from app.utils.http_cache import conditional_headers
+from app.services.cached_service import CachedExchangeService
+from app.repository.async_repo import AsyncExchangeRepository
+from app.schemas.exchange import ChartResponse, ChartColumnarResponse
 
 router = APIRouter(prefix="/api/v1/exchange", tags=["Exchange"])
 
-def get_service(db: Session = Depends(get_db)):
-    return ExchangeService(db)
+def get_service(db: AsyncSession = Depends(get_async_db)):
+    return CachedExchangeService(AsyncExchangeRepository(db))
 
-@router.get("/latest")
-def get_latest(
+@router.get("/latest", responses={304: {"description": "Dữ liệu chưa đổi"}})
+async def get_latest(
+    request: Request,
+    response: Response,
     type: str = Query(..., description="'central', 'market', hoặc 'index'"),
     code: str = Query(..., description="Mã tiền hoặc mã chỉ số"),
-    service: ExchangeService = Depends(get_service),
+    service: CachedExchangeService = Depends(get_service),
 ):
+    response.headers.update(conditional_headers(request, await service.data_version()))
     try:
-        return service.get_latest(type, code)
+        return await service.get_latest(type, code)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-@router.get("/table")
-def get_table(
+@router.get("/table", response_class=FastJSONResponse, responses={304: {"description": "Dữ liệu chưa đổi"}})
+async def get_table(
+    request: Request,
     type: str = Query(..., description="'central', 'market', hoặc 'index'"),
     date_: date = Query(date.today(), alias="date", description="Ngày cần xem (YYYY-MM-DD)"),
     code: str = Query(None, description="Lọc riêng 1 loại currency/index nếu cần"),
-    service: ExchangeService = Depends(get_service),
+    service: CachedExchangeService = Depends(get_service),
 ):
-    return service.get_table(type, date_, code)
+    headers = conditional_headers(request, await service.data_version())
+    return FastJSONResponse(await service.get_table(type, date_, code), headers=headers)
 
-@router.get("/chart")
-def get_chart(
+@router.get(
+    "/chart",
+    response_model=Union[ChartResponse, ChartColumnarResponse],
+    response_class=FastJSONResponse,
+    responses=BINARY_CHART_RESPONSES,
+)
+async def get_chart(
+    request: Request,
     type: str = Query(..., description="'central', 'market', hoặc 'index'"),
     code: List[str] = Query(..., description="1 hoặc nhiều mã tiền/chỉ số"),
     days: int = Query(30, ge=1, le=3650, description="Số ngày gần nhất"),
-    service: ExchangeService = Depends(get_service),
+    ohlc: bool = Query(False, description="Trả thêm open/high/low theo ngày (market/index)"),
+    format_: Literal["rows", "columnar"] = Query(
+        "rows", alias="format", description="rows: mỗi điểm một object; columnar: {dates: [...], values: [...]} mỗi series"
+    ),
+    accept: Optional[str] = Header(None, include_in_schema=False),
+    service: CachedExchangeService = Depends(get_service),
 ):
-    return service.get_chart(type, code, days)
+    media_type = binary_media_type(accept)
+    headers = conditional_headers(request, await service.data_version(), media_type or "json")
+    headers["Vary"] = "Accept"
+    if media_type:
+        return chart_response(await service.get_chart(type, code, days, ohlc, True), media_type, headers)
+    return FastJSONResponse(await service.get_chart(type, code, days, ohlc, format_ == "columnar"), headers=headers)
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Header, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from datetime import date
+from typing import List, Literal, Optional
+from app.database import SessionLocal
+from app.services.export_service import ExportService, EXPORT_FORMATS, gzip_chunks
+
+router = APIRouter(prefix="/api/v1/export", tags=["Export"])
+
+# Route là def (chạy trong threadpool): đọc bằng server-side cursor của psycopg2 và stream
+# từng chunk; session tự mở/đóng vì dependency yield đã thoát trước khi body được gửi
+
+@router.get("/{kind}", response_class=StreamingResponse)
+def export(
+    kind: Literal["gold", "central", "market", "index"],
+    format_: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    code: Optional[List[str]] = Query(None, description="Mã gold_type / currency / index; bỏ trống = tất cả"),
+    source: Optional[List[str]] = Query(None, description="Lọc theo source (gold: source của gold_type; không áp dụng cho central)"),
+    start: Optional[date] = Query(None, description="Từ ngày (YYYY-MM-DD), tính cả ngày này"),
+    end: Optional[date] = Query(None, description="Đến ngày (YYYY-MM-DD), tính cả ngày này"),
+    accept_encoding: Optional[str] = Header(None, include_in_schema=False),
+):
+    db = SessionLocal()
+    try:
+        chunks = ExportService(db).export(kind, format_, code, source, start, end)
+    except ValueError as e:
+        db.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        db.close()
+        raise
+
+    filename = f"{kind}_{start or 'begin'}_{end or 'latest'}.{format_}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if accept_encoding and "gzip" in accept_encoding.lower():
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    # close() lần nữa khi response kết thúc: phòng khi client ngắt trước khi generator được chạy
+    return StreamingResponse(chunks, media_type=EXPORT_FORMATS[format_], headers=headers, background=BackgroundTask(db.close))
@@ -1,42 +1,74 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from app.schemas.gold import GoldPriceListResponse, GoldChartResponse
-from app.services.gold_service import GoldPriceService
-from app.repository.gold_repo import GoldPriceRepository
-from app.database import get_db
-from typing import List
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.gold import GoldPriceListResponse, GoldChartResponse, GoldChartColumnarResponse
+from app.services.cached_service import CachedGoldPriceService
+from app.repository.async_repo import AsyncGoldPriceRepository
+from app.database import get_async_db
+from app.utils.chart_formats import BINARY_CHART_RESPONSES, binary_media_type, chart_response
+from app.utils.fast_json import FastJSONResponse
+from app.utils.http_cache import conditional_headers
+from typing import List, Literal, Optional, Union
 from datetime import date
 
 router = APIRouter(prefix="/api/v1/gold", tags=["Gold"])
 
-def get_service(db: Session = Depends(get_db)):
-    repo = GoldPriceRepository(db)
-    return GoldPriceService(repo)
+# Các route đọc kiểm tra ETag / Last-Modified trước khi dựng body: client/proxy
+# đang giữ bản mới nhất nhận 304 mà không tốn truy vấn nào ngoài version
 
-@router.get("/current", response_model=GoldPriceListResponse)
-def get_current_gold_price(
+def get_service(db: AsyncSession = Depends(get_async_db)):
+    repo = AsyncGoldPriceRepository(db)
+    return CachedGoldPriceService(repo)
+
+@router.get("/current", response_model=GoldPriceListResponse, responses={304: {"description": "Dữ liệu chưa đổi"}})
+async def get_current_gold_price(
+    request: Request,
+    response: Response,
     gold_type: str = Query(...),
     location: str = Query(...),
     unit: str = Query("tael"),
-    service: GoldPriceService = Depends(get_service),
+    service: CachedGoldPriceService = Depends(get_service),
 ):
+    response.headers.update(conditional_headers(request, await service.data_version()))
     try:
-        return service.get_current_gold_price(gold_type, location, unit)
+        return await service.get_current_gold_price(gold_type, location, unit)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-@router.get("/chart", response_model=GoldChartResponse)
-def get_gold_chart(
+@router.get(
+    "/chart",
+    response_model=Union[GoldChartResponse, GoldChartColumnarResponse],
+    response_model_exclude_none=True,
+    response_class=FastJSONResponse,
+    responses=BINARY_CHART_RESPONSES,
+)
+async def get_gold_chart(
+    request: Request,
     gold_types: List[str] = Query(["sjc"]),
     locations: List[str] = Query(["hcm"]),
     days: int = Query(30, ge=1, le=3650),
-    service: GoldPriceService = Depends(get_service),
+    ohlc: bool = Query(False, description="Trả thêm open/high/low của giá bán theo ngày"),
+    format_: Literal["rows", "columnar"] = Query(
+        "rows", alias="format", description="rows: mỗi điểm một object; columnar: {dates: [...], values: [...]} mỗi series"
+    ),
+    accept: Optional[str] = Header(None, include_in_schema=False),
+    service: CachedGoldPriceService = Depends(get_service),
 ):
-    return service.get_gold_chart(gold_types, locations, days)
+    media_type = binary_media_type(accept)
+    headers = conditional_headers(request, await service.data_version(), media_type or "json")
+    headers["Vary"] = "Accept"
+    if media_type:
+        return chart_response(await service.get_gold_chart(gold_types, locations, days, ohlc, True), media_type, headers)
+    return FastJSONResponse(
+        await service.get_gold_chart(gold_types, locations, days, ohlc, format_ == "columnar"), headers=headers
+    )
 
-@router.get("/table", response_model=GoldPriceListResponse)
-def get_gold_table(
+@router.get(
+    "/table", response_model=GoldPriceListResponse, response_class=FastJSONResponse, responses={304: {"description": "Dữ liệu chưa đổi"}}
+)
+async def get_gold_table(
+    request: Request,
     selected_date: date = Query(date.today()),
-    service: GoldPriceService = Depends(get_service),
+    service: CachedGoldPriceService = Depends(get_service),
 ):
-    return service.get_gold_table(selected_date)
+    headers = conditional_headers(request, await service.data_version())
+    return FastJSONResponse(await service.get_gold_table(selected_date), headers=headers)
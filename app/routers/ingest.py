@@ -0,0 +1,48 @@
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.config import settings
+from app.database import get_db
+from app.repository.partition_repo import DetachedPartitionError
+from app.schemas.ingest import (
+    GoldPriceBatch, CentralRateBatch, MarketRateBatch, IndexValueBatch, IngestResult
+)
+from app.services.ingest_service import IngestService
+
+def require_api_key(x_api_key: Optional[str] = Header(None)):
+    # Chưa cấu hình key thì đóng hẳn endpoint ghi, không mở cho mọi người
+    if not settings.ingest_api_key:
+        raise HTTPException(status_code=503, detail="Ingestion is disabled: INGEST_API_KEY is not set")
+    if x_api_key is None or not hmac.compare_digest(x_api_key.encode(), settings.ingest_api_key.encode()):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+router = APIRouter(prefix="/api/v1/ingest", tags=["Ingest"], dependencies=[Depends(require_api_key)])
+
+def get_service(db: Session = Depends(get_db)):
+    return IngestService(db)
+
+def _ingest(ingest, items):
+    try:
+        return ingest(items)
+    except DetachedPartitionError as e:
+        # Tick rơi vào tháng đã detach để archive
+        raise HTTPException(status_code=409, detail=str(e))
+
+# COPY chạy trên psycopg2 (engine sync) nên các route này là def, chạy trong threadpool
+
+@router.post("/gold", response_model=IngestResult)
+def ingest_gold(batch: GoldPriceBatch, service: IngestService = Depends(get_service)):
+    return _ingest(service.ingest_gold, batch.items)
+
+@router.post("/central", response_model=IngestResult)
+def ingest_central(batch: CentralRateBatch, service: IngestService = Depends(get_service)):
+    return _ingest(service.ingest_central, batch.items)
+
+@router.post("/market", response_model=IngestResult)
+def ingest_market(batch: MarketRateBatch, service: IngestService = Depends(get_service)):
+    return _ingest(service.ingest_market, batch.items)
+
+@router.post("/index", response_model=IngestResult)
+def ingest_index(batch: IndexValueBatch, service: IngestService = Depends(get_service)):
+    return _ingest(service.ingest_index, batch.items)
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from app.services.cached_service import response_cache
+from app.services.registry import registry
+from app.services.broadcaster import broadcaster
+from app.database import engine, async_engine
+from app.routers.ingest import require_api_key
+from app.utils.pool_metrics import pool_stats
+from app.utils.request_metrics import prometheus_text
+
+router = APIRouter(prefix="/api/v1/monitoring", tags=["Monitoring"])
+
+@router.get("/cache")
+def get_cache_stats():
+    return {"status": "success", "data": response_cache.stats()}
+
+@router.get("/registry")
+def get_registry_stats():
+    return {"status": "success", "data": registry.stats()}
+
+# Mỗi lần gọi là một loạt truy vấn DB: dùng chung API key với endpoint ingest
+@router.post("/registry/refresh", dependencies=[Depends(require_api_key)])
+async def refresh_registry():
+    await run_in_threadpool(registry.refresh)
+    return {"status": "success", "data": registry.stats()}
+
+@router.get("/pool")
+def get_pool_stats():
+    return {"status": "success", "data": {"async": pool_stats(async_engine), "sync": pool_stats(engine)}}
+
+@router.get("/stream")
+def get_stream_stats():
+    return {"status": "success", "data": broadcaster.stats()}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Per-route request histograms in the Prometheus text exposition format."""
+    return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
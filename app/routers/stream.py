@@ -0,0 +1,120 @@
+import asyncio
+import json
+from fastapi import APIRouter, Query, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.config import settings
+from app.services.broadcaster import broadcaster, parse_topics, Subscriber
+from app.services.registry import registry
+from app.utils.fast_json import dumps
+
+router = APIRouter(prefix="/api/v1/stream", tags=["Stream"])
+
+TOPIC_DESCRIPTION = (
+    "gold:<gold_type>:<location>[:<unit>] (unit mặc định tael), central:<code>, market:<code>, index:<code>. "
+    "Message: {topic, data} với data giống /gold/current (1 phần tử) và /exchange/latest"
+)
+
+# Client nhận ngay trạng thái hiện tại của từng topic, sau đó một message mỗi khi
+# snapshot của topic đổi; mọi client dùng chung một broadcaster (app.services.broadcaster)
+
+
+async def _topics(raw: List[str]) -> List[str]:
+    if registry.loaded_at is None:
+        await run_in_threadpool(registry.refresh)
+    return parse_topics(raw)
+
+
+@router.get("/sse", response_class=StreamingResponse)
+async def stream_sse(topic: List[str] = Query(..., description=TOPIC_DESCRIPTION)):
+    try:
+        topics = await _topics(topic)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        # Subscribe ngay trong generator: client ngắt trước khi body bắt đầu thì generator
+        # không bao giờ chạy và không để lại subscriber; sau đó Starlette huỷ generator khi
+        # client ngắt kết nối nên finally luôn chạy
+        subscriber = broadcaster.subscribe(topics)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                messages = await subscriber.next(settings.stream_heartbeat_seconds)
+                if not messages:
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"".join(b"data: " + dumps(m) + b"\n\n" for m in messages)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _send(websocket: WebSocket, content: dict):
+    await websocket.send_text(dumps(content).decode("utf-8"))
+
+
+async def _send_updates(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        messages = await subscriber.next(settings.stream_heartbeat_seconds)
+        if not messages:
+            await _send(websocket, {"type": "keepalive"})
+        for message in messages:
+            await _send(websocket, message)
+
+
+COMMAND_ERROR = 'Command phải là {"subscribe": [...]} hoặc {"unsubscribe": [...]} với danh sách topic dạng chuỗi'
+
+
+def _command_topics(command: dict, key: str) -> List[str]:
+    raw = command.get(key) or []
+    if not isinstance(raw, list) or not all(isinstance(t, str) for t in raw):
+        raise ValueError(COMMAND_ERROR)
+    return raw
+
+
+async def _receive_commands(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        text = await websocket.receive_text()
+        try:
+            command = json.loads(text)
+            if not isinstance(command, dict):
+                raise ValueError(COMMAND_ERROR)
+            add = await _topics(_command_topics(command, "subscribe"))
+            remove = await _topics(_command_topics(command, "unsubscribe"))
+        except ValueError as e:
+            await _send(websocket, {"status": "error", "message": str(e)})
+            continue
+        broadcaster.update_topics(subscriber, add, remove)
+
+
+@router.websocket("/ws")
+async def stream_ws(websocket: WebSocket, topic: Optional[List[str]] = Query(None)):
+    """Same feed over a WebSocket; send {"subscribe": [...]} / {"unsubscribe": [...]} to change topics."""
+    await websocket.accept()
+    try:
+        topics = await _topics(topic or [])
+    except ValueError as e:
+        await _send(websocket, {"status": "error", "message": str(e)})
+        await websocket.close(code=1008)
+        return
+    subscriber = broadcaster.subscribe(topics)
+    tasks = [
+        asyncio.create_task(_send_updates(websocket, subscriber)),
+        asyncio.create_task(_receive_commands(websocket, subscriber)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not isinstance(task.exception(), WebSocketDisconnect):
+                task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        broadcaster.unsubscribe(subscriber)
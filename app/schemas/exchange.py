@@ -45,7 +45,23 @@ class ChartSeriesItem(BaseModel):
     date: date
     rate: Optional[float] = None
     value: Optional[float] = None
+    published_at: Optional[datetime] = None
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
 
 class ChartResponse(BaseModel):
     status: str
     data: Dict[str, List[ChartSeriesItem]]
+
+class ChartColumns(BaseModel):
+    dates: List[date]
+    values: List[float]
+    published_at: Optional[List[Optional[datetime]]] = None
+    open: Optional[List[float]] = None
+    high: Optional[List[float]] = None
+    low: Optional[List[float]] = None
+
+class ChartColumnarResponse(BaseModel):
+    status: str
+    data: Dict[str, ChartColumns]
@@ -32,6 +32,9 @@ class GoldPriceResponse(GoldPriceBase):
 class GoldChartItem(BaseModel):
     date: date
     price: float
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
 
 class GoldChartSeries(BaseModel):
     key: str
@@ -41,6 +44,17 @@ class GoldChartResponse(BaseModel):
     status: str
     data: dict[str, List[GoldChartItem]]
 
+class GoldChartColumns(BaseModel):
+    dates: List[date]
+    values: List[float]
+    open: Optional[List[float]] = None
+    high: Optional[List[float]] = None
+    low: Optional[List[float]] = None
+
+class GoldChartColumnarResponse(BaseModel):
+    status: str
+    data: dict[str, GoldChartColumns]
+
 class GoldPriceListResponse(BaseModel):
     status: str
     message: Optional[str] = None
@@ -0,0 +1,62 @@
+from pydantic import BaseModel, Field, FiniteFloat, NaiveDatetime, field_validator
+from datetime import date
+from typing import List, Optional
+from app.models.types import to_storage_price
+
+# Bảng tick lưu giờ địa phương không kèm múi giờ: timestamp có offset bị từ chối (422)
+# thay vì bị bỏ offset khi COPY, hay làm min()/max() lỗi khi batch lẫn naive và aware.
+# Giá/tỷ giá là FiniteFloat: NaN/Infinity bị từ chối (422) trước khi tới DB
+
+class GoldPriceTick(BaseModel):
+    timestamp: NaiveDatetime
+    gold_type: str
+    location: str
+    unit: str
+    buy_price: FiniteFloat
+    sell_price: FiniteFloat
+
+    @field_validator("buy_price", "sell_price")
+    @classmethod
+    def _storable(cls, v: float) -> float:
+        # GOLD_PRICE_STORAGE=bigint: giá lẻ bị từ chối (422) thay vì làm tròn khi ghi
+        to_storage_price(v)
+        return v
+
+class CentralRateTick(BaseModel):
+    code: str
+    date: date
+    rate: FiniteFloat
+    published_at: Optional[NaiveDatetime] = None
+
+class MarketRateTick(BaseModel):
+    code: str
+    timestamp: NaiveDatetime
+    source: str
+    type: str
+    rate: FiniteFloat
+
+class IndexValueTick(BaseModel):
+    code: str
+    timestamp: NaiveDatetime
+    source: str
+    value: FiniteFloat
+
+class GoldPriceBatch(BaseModel):
+    items: List[GoldPriceTick] = Field(..., max_length=100_000)
+
+class CentralRateBatch(BaseModel):
+    items: List[CentralRateTick] = Field(..., max_length=100_000)
+
+class MarketRateBatch(BaseModel):
+    items: List[MarketRateTick] = Field(..., max_length=100_000)
+
+class IndexValueBatch(BaseModel):
+    items: List[IndexValueTick] = Field(..., max_length=100_000)
+
+class IngestResult(BaseModel):
+    status: str
+    received: int
+    inserted: int
+    updated: int
+    skipped: int
+    unknown_codes: List[str] = []
@@ -0,0 +1,52 @@
+from datetime import date
+from typing import List, Optional
+from app.repository.async_repo import AsyncGoldPriceRepository, AsyncExchangeRepository
+from app.repository.snapshot_repo import SnapshotRepository
+from app.services.gold_service import GoldPriceService
+from app.services.exchange_service import ExchangeService
+
+
+class AsyncGoldPriceService:
+    """`async def` counterpart of GoldPriceService for the async routes.
+
+    The business logic stays in GoldPriceService; each call runs it through
+    the async repository in one greenlet (see AsyncRepository.run).
+    """
+
+    def __init__(self, repo: AsyncGoldPriceRepository):
+        self.repo = repo
+
+    async def get_current_gold_price(self, gold_type: str, location: str, unit: str):
+        return await self.repo.run(lambda repo: GoldPriceService(repo).get_current_gold_price(gold_type, location, unit))
+
+    async def get_gold_chart(
+        self, gold_types: List[str], locations: List[str], days: int, ohlc: bool = False, columnar: bool = False
+    ):
+        return await self.repo.run(
+            lambda repo: GoldPriceService(repo).get_gold_chart(gold_types, locations, days, ohlc, columnar)
+        )
+
+    async def get_gold_table(self, selected_date: date):
+        return await self.repo.run(lambda repo: GoldPriceService(repo).get_gold_table(selected_date))
+
+    async def data_version(self):
+        return await self.repo.run(lambda repo: SnapshotRepository(repo.db).version("gold"))
+
+
+class AsyncExchangeService:
+    """`async def` counterpart of ExchangeService for the async routes."""
+
+    def __init__(self, repo: AsyncExchangeRepository):
+        self.repo = repo
+
+    async def get_latest(self, type_: str, code: str):
+        return await self.repo.run(lambda repo: ExchangeService(repo.db).get_latest(type_, code))
+
+    async def get_table(self, type_: str, date_: date, code: Optional[str]):
+        return await self.repo.run(lambda repo: ExchangeService(repo.db).get_table(type_, date_, code))
+
+    async def get_chart(self, type_: str, code: List[str], days: int, ohlc: bool = False, columnar: bool = False):
+        return await self.repo.run(lambda repo: ExchangeService(repo.db).get_chart(type_, code, days, ohlc, columnar))
+
+    async def data_version(self):
+        return await self.repo.run(lambda repo: SnapshotRepository(repo.db).version("exchange"))
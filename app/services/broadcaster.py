@@ -0,0 +1,276 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.repository.snapshot_repo import SnapshotRepository, NOTIFY_CHANNEL
+from app.services.exchange_service import snapshot_data
+from app.services.gold_service import snapshot_response
+from app.services.registry import registry
+from app.utils.logger import get_logger
+
+try:
+    import asyncpg
+except ImportError:  # không có asyncpg thì không LISTEN được: chỉ phát trạng thái đọc lúc khởi động
+    asyncpg = None
+
+logger = get_logger(__name__)
+
+EXCHANGE_KINDS = ("central", "market", "index")
+
+
+def parse_topics(raw: Iterable[str]) -> List[str]:
+    """Validate subscription topics: "gold:<type>:<location>[:<unit>]" or "<central|market|index>:<code>".
+
+    Trả về topic đã chuẩn hoá (unit mặc định "tael"); ValueError nếu sai cú pháp hoặc mã không tồn tại.
+    """
+    topics, unknown = [], []
+    for topic in raw:
+        kind, _, rest = topic.partition(":")
+        if kind == "gold":
+            parts = rest.split(":")
+            if len(parts) == 2:
+                parts.append("tael")
+            if len(parts) != 3 or not all(parts):
+                raise ValueError(f"Topic không hợp lệ: {topic} (gold:<gold_type>:<location>[:<unit>])")
+            gold_type, location, unit = parts
+            for dim, code in ((registry.gold_types, gold_type), (registry.locations, location), (registry.units, unit)):
+                if dim.id_of(code) is None:
+                    unknown.append(code)
+            topics.append(f"gold:{gold_type}:{location}:{unit}")
+        elif kind in EXCHANGE_KINDS and rest:
+            dim = registry.indexes if kind == "index" else registry.currencies
+            if dim.id_of(rest) is None:
+                unknown.append(rest)
+            topics.append(f"{kind}:{rest}")
+        else:
+            raise ValueError(f"Topic không hợp lệ: {topic} (gold:..., central:<code>, market:<code>, index:<code>)")
+    if unknown:
+        raise ValueError(f"Không tìm thấy: {', '.join(unknown)}")
+    return list(dict.fromkeys(topics))
+
+
+class Subscriber:
+    """One SSE/WebSocket client: the latest pending message per topic.
+
+    Client chậm không làm phình bộ nhớ: message mới của cùng topic ghi đè
+    message chưa gửi, client chỉ nhận trạng thái mới nhất.
+    """
+
+    def __init__(self, topics: List[str]):
+        self.topics = set(topics)
+        self._pending: Dict[str, dict] = {}
+        self._event = asyncio.Event()
+
+    def push(self, topic: str, message: dict):
+        self._pending[topic] = message
+        self._event.set()
+
+    async def next(self, timeout: float) -> List[dict]:
+        """Messages waiting for this client; [] after `timeout` seconds without updates."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._event.clear()
+        messages, self._pending = list(self._pending.values()), {}
+        return messages
+
+
+class Broadcaster:
+    """In-process fan-out of snapshot changes to push subscribers.
+
+    Mỗi worker giữ một connection asyncpg LISTEN kênh NOTIFY_CHANNEL (ingest ở
+    worker nào cũng tới được), gom các notification đang chờ rồi đọc lại các
+    snapshot bị đổi bằng một truy vấn, và đẩy message tới subscriber của từng
+    topic. Số subscriber không làm tăng số truy vấn.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        # topic -> message gần nhất (trạng thái ban đầu cho subscriber mới)
+        self._latest: Dict[str, dict] = {}
+        # kind -> set id / key bị đổi (None = mọi series) đang chờ reload
+        self._dirty: Dict[str, Optional[set]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.notifications = self.reloads = self.messages = 0
+        self.connected = False
+
+    # --- subscriber ---
+
+    def subscribe(self, topics: List[str]) -> Subscriber:
+        subscriber = Subscriber(topics)
+        for topic in subscriber.topics:
+            self._subscribers[topic].add(subscriber)
+            if topic in self._latest:
+                subscriber.push(topic, self._latest[topic])
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for topic in subscriber.topics:
+            subs = self._subscribers.get(topic)
+            if subs is not None:
+                subs.discard(subscriber)
+                if not subs:
+                    del self._subscribers[topic]
+
+    def update_topics(self, subscriber: Subscriber, add: List[str] = (), remove: List[str] = ()):
+        self.unsubscribe(subscriber)
+        subscriber.topics = (subscriber.topics | set(add)) - set(remove)
+        for topic in subscriber.topics:
+            self._subscribers[topic].add(subscriber)
+        for topic in add:
+            if topic in self._latest:
+                subscriber.push(topic, self._latest[topic])
+
+    # --- vòng đời ---
+
+    async def start(self):
+        # Event tạo trong event loop đang chạy (mỗi lifespan một loop)
+        self._wakeup = asyncio.Event()
+        self._mark_dirty("gold", None)
+        for kind in EXCHANGE_KINDS:
+            self._mark_dirty(kind, None)
+        self._tasks = [asyncio.create_task(self._reload_loop())]
+        if asyncpg is not None:
+            self._tasks.append(asyncio.create_task(self._listen_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "topics": len(self._subscribers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+            "notifications": self.notifications,
+            "reloads": self.reloads,
+            "messages": self.messages,
+        }
+
+    # --- LISTEN ---
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.notifications += 1
+        try:
+            message = json.loads(payload)
+            keys = message["keys"]
+            if keys is not None:
+                # key gold là [gold_type_id, location_id, unit_id], exchange là series_id
+                keys = {tuple(k) if isinstance(k, list) else k for k in keys}
+            self._mark_dirty(message["kind"], keys)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed %s payload: %r", NOTIFY_CHANNEL, payload)
+
+    def _mark_dirty(self, kind: str, keys: Optional[set]):
+        if kind in self._dirty and (self._dirty[kind] is None or keys is None):
+            self._dirty[kind] = None
+        elif kind in self._dirty:
+            self._dirty[kind] |= keys
+        else:
+            self._dirty[kind] = None if keys is None else set(keys)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _listen_loop(self):
+        delay = 1
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(settings.db_url)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                self.connected, delay = True, 1
+                logger.info("Listening on %s", NOTIFY_CHANNEL)
+                # Có thể đã lỡ notification khi mất kết nối: đọc lại toàn bộ
+                for kind in ("gold",) + EXCHANGE_KINDS:
+                    self._mark_dirty(kind, None)
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), settings.stream_heartbeat_seconds * 4)
+                    except asyncio.TimeoutError:
+                        # Phát hiện kết nối chết im lặng (không có termination)
+                        await connection.fetchval("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN %s failed, retrying in %ds", NOTIFY_CHANNEL, delay)
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    # --- reload + fan-out ---
+
+    async def _reload_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            dirty, self._dirty = self._dirty, {}
+            try:
+                messages = await run_in_threadpool(self._load, dirty)
+            except Exception:
+                logger.exception("Snapshot reload for push subscribers failed")
+                # Giữ lại các key để thử lại sau 1 giây
+                for kind, keys in dirty.items():
+                    self._mark_dirty(kind, keys)
+                await asyncio.sleep(1)
+                continue
+            self.reloads += 1
+            self._publish(messages)
+
+    def _load(self, dirty: Dict[str, Optional[set]]) -> Dict[str, dict]:
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            dims = registry.ensure_loaded(db)
+            snapshots = SnapshotRepository(db)
+            messages = {}
+            if "gold" in dirty:
+                for snap in snapshots.list_gold(dirty["gold"]):
+                    codes = (
+                        dims.gold_types.code_of(snap.gold_type_id),
+                        dims.locations.code_of(snap.location_id),
+                        dims.units.code_of(snap.unit_id),
+                    )
+                    if None in codes:
+                        # Dimension đã bị xoá: không ai có thể subscribe topic này
+                        continue
+                    topic = "gold:" + ":".join(codes)
+                    messages[topic] = {"topic": topic, "data": snapshot_response(snap, *codes).model_dump(mode="json")}
+            for kind in EXCHANGE_KINDS:
+                if kind not in dirty:
+                    continue
+                dim = dims.indexes if kind == "index" else dims.currencies
+                for snap in snapshots.list_exchange(kind, dirty[kind]):
+                    code = dim.code_of(snap.series_id)
+                    if code is None:
+                        continue
+                    topic = f"{kind}:{code}"
+                    messages[topic] = {"topic": topic, "data": snapshot_data(kind, snap, code)}
+            return messages
+        finally:
+            db.close()
+
+    def _publish(self, messages: Dict[str, dict]):
+        for topic, message in messages.items():
+            # updated_at đổi ở mỗi lần refresh; chỉ đẩy khi nội dung thực sự khác
+            if self._latest.get(topic) == message:
+                continue
+            self._latest[topic] = message
+            for subscriber in self._subscribers.get(topic, ()):
+                subscriber.push(topic, message)
+                self.messages += 1
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,87 @@
+from datetime import date
+from functools import partial
+from typing import List, Optional
+from app.services.async_service import AsyncGoldPriceService, AsyncExchangeService
+from app.utils.cache import TTLCache
+from app.config import settings
+
+# TTL (giây) theo endpoint; giá thay đổi tối đa vài phút một lần
+CACHE_TTL = {
+    "gold_current": 30,
+    "gold_table": 60,
+    "gold_chart": 300,
+    "exchange_latest": 30,
+    "exchange_table": 60,
+    "exchange_chart": 300,
+    # Version dữ liệu (ETag) đọc lại tối đa mỗi giây; ingest trên worker này xoá ngay
+    "data_version": 1,
+}
+
+response_cache = TTLCache(maxsize=settings.cache_maxsize)
+
+
+def invalidate_cache(namespace: Optional[str] = None):
+    """Drop cached responses after new data is written ("gold", "exchange" or everything)."""
+    response_cache.invalidate(namespace)
+
+
+def _codes(codes: List[str]) -> tuple:
+    # Giữ nguyên thứ tự request: chart trả series theo đúng thứ tự mã được hỏi
+    return tuple(codes)
+
+
+class CachedGoldPriceService(AsyncGoldPriceService):
+    async def data_version(self):
+        return await response_cache.aget_or_set(("gold", "version"), CACHE_TTL["data_version"], super().data_version)
+
+    async def get_current_gold_price(self, gold_type: str, location: str, unit: str):
+        return await response_cache.aget_or_set(
+            ("gold", "current", gold_type, location, unit, (await self.data_version())[1]),
+            CACHE_TTL["gold_current"],
+            partial(super().get_current_gold_price, gold_type, location, unit),
+        )
+
+    async def get_gold_chart(
+        self, gold_types: List[str], locations: List[str], days: int, ohlc: bool = False, columnar: bool = False
+    ):
+        # Chart tính theo date.today() nên key gồm cả ngày hiện tại
+        return await response_cache.aget_or_set(
+            ("gold", "chart", _codes(gold_types), _codes(locations), days, ohlc, columnar, date.today(), (await self.data_version())[1]),
+            CACHE_TTL["gold_chart"],
+            partial(super().get_gold_chart, gold_types, locations, days, ohlc, columnar),
+        )
+
+    async def get_gold_table(self, selected_date: date):
+        return await response_cache.aget_or_set(
+            ("gold", "table", selected_date, (await self.data_version())[1]),
+            CACHE_TTL["gold_table"],
+            partial(super().get_gold_table, selected_date),
+        )
+
+
+class CachedExchangeService(AsyncExchangeService):
+    async def data_version(self):
+        return await response_cache.aget_or_set(
+            ("exchange", "version"), CACHE_TTL["data_version"], super().data_version
+        )
+
+    async def get_latest(self, type_: str, code: str):
+        return await response_cache.aget_or_set(
+            ("exchange", "latest", type_, code, (await self.data_version())[1]),
+            CACHE_TTL["exchange_latest"],
+            partial(super().get_latest, type_, code),
+        )
+
+    async def get_table(self, type_: str, date_: date, code: Optional[str]):
+        return await response_cache.aget_or_set(
+            ("exchange", "table", type_, date_, code, (await self.data_version())[1]),
+            CACHE_TTL["exchange_table"],
+            partial(super().get_table, type_, date_, code),
+        )
+
+    async def get_chart(self, type_: str, code: List[str], days: int, ohlc: bool = False, columnar: bool = False):
+        return await response_cache.aget_or_set(
+            ("exchange", "chart", type_, _codes(code), days, ohlc, columnar, date.today(), (await self.data_version())[1]),
+            CACHE_TTL["exchange_chart"],
+            partial(super().get_chart, type_, code, days, ohlc, columnar),
+        )
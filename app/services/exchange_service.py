@@ -1,27 +1,60 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import date, timedelta
 from typing import List, Optional
-from app.models.exchange import (
-    Currency, CentralExchangeRate, MarketExchangeRate,
-    FinancialIndexMeta, FinancialIndexValue
-)
 from app.repository.exchange_repo import ExchangeRepository
+from app.repository.snapshot_repo import SnapshotRepository
+from app.repository.rollup_repo import RollupRepository, MARKET_DAILY, INDEX_DAILY
+from app.services.registry import registry
+from app.config import settings
+from app.utils.fast_json import chart_columns
+
+def snapshot_data(kind: str, snap, code: str) -> dict:
+    """`data` of /exchange/latest built from an exchange_snapshots row."""
+    delta_percent = round(snap.delta_percent, 5) if snap.delta_percent is not None else None
+    if kind == "central":
+        return {
+            "code": code,
+            "rate": float(snap.value),
+            "date": snap.timestamp.date().isoformat(),
+            "published_at": snap.published_at.isoformat() if snap.published_at else None,
+            "delta_percent": delta_percent,
+            "previous_date": snap.prev_timestamp.date().isoformat() if snap.prev_timestamp else None
+        }
+    return {
+        "code": code,
+        "rate" if kind == "market" else "value": float(snap.value),
+        "timestamp": snap.timestamp.isoformat(),
+        "delta_percent": delta_percent,
+        "previous_timestamp": snap.prev_timestamp.isoformat() if snap.prev_timestamp else None
+    }
+
 
 class ExchangeService:
     def __init__(self, db: Session):
         self.db = db
         self.repo = ExchangeRepository(db)
+        self.dims = registry.ensure_loaded(db)
+        self.snapshots = SnapshotRepository(db)
+        self.rollups = RollupRepository(db)
+
+    def _latest_from_snapshot(self, kind: str, series_id: int, code: str):
+        snap = self.snapshots.get_exchange(kind, series_id)
+        if not snap:
+            return None
+        return {"status": "success", "data": snapshot_data(kind, snap, code)}
 
     def get_latest(self, type_: str, code: str):
         if type_ == "central":
-            cur = self.repo.get_currency_by_code(code)
-            if not cur:
+            currency_id = self.dims.currencies.id_of(code)
+            if currency_id is None:
                 return {"status": "error", "message": "Không tìm thấy currency"}
-            latest = self.repo.get_latest_central(cur.id)
+            snapshot = self._latest_from_snapshot("central", currency_id, code)
+            if snapshot:
+                return snapshot
+            latest = self.repo.get_latest_central(currency_id)
             if not latest:
                 return {"status": "error", "message": f"Không có tỷ giá trung tâm cho {code}"}
-            prev = self.repo.get_latest_of_prev_day_central(cur.id, latest.date)
+            prev = self.repo.get_latest_of_prev_day_central(currency_id, latest.date)
             delta_percent = (
                 (latest.rate - prev.rate) / prev.rate * 100 if prev and prev.rate else None
             )
@@ -38,13 +71,16 @@ class ExchangeService:
             }
 
         elif type_ == "market":
-            cur = self.repo.get_currency_by_code(code)
-            if not cur:
+            currency_id = self.dims.currencies.id_of(code)
+            if currency_id is None:
                 return {"status": "error", "message": "Không tìm thấy currency"}
-            latest = self.repo.get_latest_market(cur.id)
+            snapshot = self._latest_from_snapshot("market", currency_id, code)
+            if snapshot:
+                return snapshot
+            latest = self.repo.get_latest_market(currency_id)
             if not latest:
                 return {"status": "error", "message": f"Không có tỷ giá thị trường cho {code}"}
-            prev = self.repo.get_latest_of_prev_day_market(cur.id, latest.timestamp)
+            prev = self.repo.get_latest_of_prev_day_market(currency_id, latest.timestamp)
             delta_percent = (
                 (latest.rate - prev.rate) / prev.rate * 100 if prev and prev.rate else None
             )
@@ -60,13 +96,16 @@ class ExchangeService:
             }
 
         elif type_ == "index":
-            idx = self.repo.get_index_by_code(code)
-            if not idx:
+            index_id = self.dims.indexes.id_of(code)
+            if index_id is None:
                 return {"status": "error", "message": "Không tìm thấy index"}
-            latest = self.repo.get_latest_index(idx.id)
+            snapshot = self._latest_from_snapshot("index", index_id, code)
+            if snapshot:
+                return snapshot
+            latest = self.repo.get_latest_index(index_id)
             if not latest:
                 return {"status": "error", "message": f"Không có giá trị chỉ số {code}"}
-            prev = self.repo.get_latest_of_prev_day_index(idx.id, latest.timestamp)
+            prev = self.repo.get_latest_of_prev_day_index(index_id, latest.timestamp)
             delta_percent = (
                 (latest.value - prev.value) / prev.value * 100 if prev and prev.value else None
             )
@@ -84,37 +123,49 @@ class ExchangeService:
         else:
             return {"status": "error", "message": "type phải là central, market, hoặc index"}
 
+    def _market_closes(self, start: date, end: date, currency_id: Optional[int] = None) -> list:
+        """Last market tick of each day start..end per currency (rollup once the day is settled)."""
+        ids = [currency_id] if currency_id is not None else None
+        from_ticks = lambda s, e: self.repo.get_market_daily_range(ids, s, e)
+        if settings.rollup_reads:
+            return self.rollups.read_daily(
+                MARKET_DAILY, start, end, lambda s, e: self.rollups.get_market_daily(s, e, ids), from_ticks
+            )
+        return from_ticks(start, end)
+
+    def _index_closes(self, start: date, end: date, index_id: Optional[int] = None) -> list:
+        """Last value of each day start..end per index (rollup once the day is settled)."""
+        ids = [index_id] if index_id is not None else None
+        from_ticks = lambda s, e: self.repo.get_index_daily_range(ids, s, e)
+        if settings.rollup_reads:
+            return self.rollups.read_daily(
+                INDEX_DAILY, start, end, lambda s, e: self.rollups.get_index_daily(s, e, ids), from_ticks
+            )
+        return from_ticks(start, end)
+
     def get_table(self, type_: str, date_: date, code: Optional[str]):
         data = []
         prev_date = date_ - timedelta(days=1)
 
         if type_ == "central":
-            q = self.repo.db.query(CentralExchangeRate)
+            currency_id = None
             if code:
-                cur = self.repo.get_currency_by_code(code)
-                if not cur:
+                currency_id = self.dims.currencies.id_of(code)
+                if currency_id is None:
                     return {"status": "error", "message": "Không tìm thấy currency"}
-                q = q.filter(CentralExchangeRate.currency_id == cur.id)
-            q = q.filter(CentralExchangeRate.date == date_)
-            id2code = {c.id: c.code for c in self.repo.db.query(Currency).all()}
+            prev_data = {r.currency_id: r for r in self.repo.get_central_rates(prev_date, currency_id)}
 
-            prev_q = self.repo.db.query(CentralExchangeRate)
-            if code:
-                prev_q = prev_q.filter(CentralExchangeRate.currency_id == cur.id)
-            prev_q = prev_q.filter(CentralExchangeRate.date == prev_date)
-            prev_data = {r.currency_id: r for r in prev_q.all()}
-
-            for r in q.all():
+            for r in self.repo.get_central_rates(date_, currency_id):
                 prev = prev_data.get(r.currency_id)
                 delta = delta_percent = None
                 if prev and prev.rate:
                     delta = float(r.rate) - float(prev.rate)
                     delta_percent = (delta / float(prev.rate)) * 100 if prev.rate else None
                 data.append({
-                    "code": id2code.get(r.currency_id, "???"),
+                    "code": self.dims.currencies.code_of(r.currency_id),
                     "rate": float(r.rate),
-                    "date": r.date.isoformat(),
-                    "published_at": r.published_at.isoformat() if r.published_at else None,
+                    "date": r.date,
+                    "published_at": r.published_at,
                     "delta": round(delta, 5) if delta is not None else None,
                     "delta_percent": round(delta_percent, 5) if delta_percent is not None else None,
                     "prev_rate": float(prev.rate) if prev else None,
@@ -122,30 +173,16 @@ class ExchangeService:
             return {"status": "success", "date": date_.isoformat(), "data": data}
 
         elif type_ == "market":
-            q = self.repo.db.query(MarketExchangeRate)
+            currency_id = None
             if code:
-                cur = self.repo.get_currency_by_code(code)
-                if not cur:
+                currency_id = self.dims.currencies.id_of(code)
+                if currency_id is None:
                     return {"status": "error", "message": "Không tìm thấy currency"}
-                q = q.filter(MarketExchangeRate.currency_id == cur.id)
-            q = q.filter(func.date(MarketExchangeRate.timestamp) == date_)
-            id2code = {c.id: c.code for c in self.repo.db.query(Currency).all()}
 
-            latest_today = {}
-            for r in q.order_by(MarketExchangeRate.timestamp.desc()).all():
-                key = r.currency_id
-                if key not in latest_today:
-                    latest_today[key] = r
-
-            prev_q = self.repo.db.query(MarketExchangeRate)
-            if code:
-                prev_q = prev_q.filter(MarketExchangeRate.currency_id == cur.id)
-            prev_q = prev_q.filter(func.date(MarketExchangeRate.timestamp) == prev_date)
-            latest_prev = {}
-            for r in prev_q.order_by(MarketExchangeRate.timestamp.desc()).all():
-                key = r.currency_id
-                if key not in latest_prev:
-                    latest_prev[key] = r
+            # Một lần đọc cho cả ngày đang xem và ngày trước đó
+            closes = self._market_closes(prev_date, date_, currency_id)
+            latest_today = {r.currency_id: r for r in closes if r.day == date_}
+            latest_prev = {r.currency_id: r for r in closes if r.day == prev_date}
 
             for cid, r in latest_today.items():
                 prev = latest_prev.get(cid)
@@ -154,9 +191,9 @@ class ExchangeService:
                     delta = float(r.rate) - float(prev.rate)
                     delta_percent = (delta / float(prev.rate)) * 100 if prev.rate else None
                 data.append({
-                    "code": id2code.get(r.currency_id, "???"),
+                    "code": self.dims.currencies.code_of(r.currency_id),
                     "rate": float(r.rate),
-                    "timestamp": r.timestamp.isoformat(),
+                    "timestamp": r.timestamp,
                     "delta": round(delta, 5) if delta is not None else None,
                     "delta_percent": round(delta_percent, 5) if delta_percent is not None else None,
                     "prev_rate": float(prev.rate) if prev else None,
@@ -164,30 +201,16 @@ class ExchangeService:
             return {"status": "success", "date": date_.isoformat(), "data": data}
 
         elif type_ == "index":
-            q = self.repo.db.query(FinancialIndexValue)
+            index_id = None
             if code:
-                idx = self.repo.get_index_by_code(code)
-                if not idx:
+                index_id = self.dims.indexes.id_of(code)
+                if index_id is None:
                     return {"status": "error", "message": "Không tìm thấy index"}
-                q = q.filter(FinancialIndexValue.index_id == idx.id)
-            q = q.filter(func.date(FinancialIndexValue.timestamp) == date_)
-            id2code = {i.id: i.code for i in self.repo.db.query(FinancialIndexMeta).all()}
 
-            latest_today = {}
-            for r in q.order_by(FinancialIndexValue.timestamp.desc()).all():
-                key = r.index_id
-                if key not in latest_today:
-                    latest_today[key] = r
-
-            prev_q = self.repo.db.query(FinancialIndexValue)
-            if code:
-                prev_q = prev_q.filter(FinancialIndexValue.index_id == idx.id)
-            prev_q = prev_q.filter(func.date(FinancialIndexValue.timestamp) == prev_date)
-            latest_prev = {}
-            for r in prev_q.order_by(FinancialIndexValue.timestamp.desc()).all():
-                key = r.index_id
-                if key not in latest_prev:
-                    latest_prev[key] = r
+            # Một lần đọc cho cả ngày đang xem và ngày trước đó
+            closes = self._index_closes(prev_date, date_, index_id)
+            latest_today = {r.index_id: r for r in closes if r.day == date_}
+            latest_prev = {r.index_id: r for r in closes if r.day == prev_date}
 
             for iid, r in latest_today.items():
                 prev = latest_prev.get(iid)
@@ -196,9 +219,9 @@ class ExchangeService:
                     delta = float(r.value) - float(prev.value)
                     delta_percent = (delta / float(prev.value)) * 100 if prev.value else None
                 data.append({
-                    "code": id2code.get(r.index_id, "???"),
+                    "code": self.dims.indexes.code_of(r.index_id),
                     "value": float(r.value),
-                    "timestamp": r.timestamp.isoformat(),
+                    "timestamp": r.timestamp,
                     "delta": round(delta, 5) if delta is not None else None,
                     "delta_percent": round(delta_percent, 5) if delta_percent is not None else None,
                     "prev_value": float(prev.value) if prev else None,
@@ -208,97 +231,74 @@ class ExchangeService:
         else:
             return {"status": "error", "message": "type phải là central, market, hoặc index"}
 
-    def get_chart(self, type_: str, code: List[str], days: int):
-        from app.models.exchange import (
-            Currency, FinancialIndexMeta, CentralExchangeRate, MarketExchangeRate, FinancialIndexValue
-        )
-        results = {}
+    def get_chart(self, type_: str, code: List[str], days: int, ohlc: bool = False, columnar: bool = False):
         start_date = date.today() - timedelta(days=days - 1)
-        end_date = date.today() + timedelta(days=1)
+        end_date = date.today()
 
-        if type_ == "central":
-            code2id = {c.code: c.id for c in self.repo.db.query(Currency).filter(Currency.code.in_(code)).all()}
-            for code_ in code:
-                if code_ not in code2id:
-                    continue
-                recs = (
-                    self.repo.db.query(CentralExchangeRate)
-                    .filter(
-                        CentralExchangeRate.currency_id == code2id[code_],
-                        CentralExchangeRate.date >= start_date,
-                        CentralExchangeRate.date < end_date,
-                    )
-                    .order_by(CentralExchangeRate.date)
-                    .all()
-                )
-                results[code_] = [
-                    {
-                        "date": r.date.isoformat(),
-                        "rate": float(r.rate),
-                        "published_at": r.published_at.isoformat() if r.published_at else None,
-                    }
-                    for r in recs
-                ]
+        if type_ in ("central", "market"):
+            dim = self.dims.currencies
+        elif type_ == "index":
+            dim = self.dims.indexes
+        else:
+            return {"status": "error", "message": "type phải là central, market, hoặc index"}
 
+        # Giữ thứ tự key theo request, series không có dữ liệu trả []
+        id2code = {dim.id_of(c): c for c in code if dim.id_of(c) is not None}
+        ids = list(id2code)
+        if type_ == "central":
+            id_field, value, extra = "currency_id", "rate", ("published_at",)
+            rows = self.repo.get_central_range(ids, start_date, end_date) if ids else []
         elif type_ == "market":
-            code2id = {c.code: c.id for c in self.repo.db.query(Currency).filter(Currency.code.in_(code)).all()}
-            for code_ in code:
-                if code_ not in code2id:
-                    continue
-                recs = (
-                    self.repo.db.query(MarketExchangeRate)
-                    .filter(
-                        MarketExchangeRate.currency_id == code2id[code_],
-                        MarketExchangeRate.timestamp >= start_date,
-                        MarketExchangeRate.timestamp < end_date,
-                    )
-                    .order_by(MarketExchangeRate.timestamp)
-                    .all()
+            id_field, value, extra = "currency_id", "rate", ()
+            if not ids:
+                rows = []
+            elif settings.rollup_reads:
+                rows = self.rollups.read_daily(
+                    MARKET_DAILY,
+                    start_date,
+                    end_date,
+                    lambda s, e: self.rollups.get_market_daily(s, e, ids),
+                    lambda s, e: self.repo.get_market_daily_range(ids, s, e, ohlc=ohlc),
                 )
-                daily_latest = {}
-                for r in recs:
-                    d = r.timestamp.date()
-                    if d not in daily_latest or r.timestamp > daily_latest[d].timestamp:
-                        daily_latest[d] = r
-                sorted_items = sorted(daily_latest.items())
-                results[code_] = [
-                    {
-                        "date": d.isoformat(),
-                        "rate": float(r.rate),
-                    }
-                    for d, r in sorted_items
-                ]
-
-        elif type_ == "index":
-            code2id = {i.code: i.id for i in self.repo.db.query(FinancialIndexMeta).filter(FinancialIndexMeta.code.in_(code)).all()}
-            for code_ in code:
-                if code_ not in code2id:
-                    continue
-                recs = (
-                    self.repo.db.query(FinancialIndexValue)
-                    .filter(
-                        FinancialIndexValue.index_id == code2id[code_],
-                        FinancialIndexValue.timestamp >= start_date,
-                        FinancialIndexValue.timestamp < end_date,
-                    )
-                    .order_by(FinancialIndexValue.timestamp)
-                    .all()
+            else:
+                rows = self.repo.get_market_daily_range(ids, start_date, end_date, ohlc=ohlc)
+        else:
+            id_field, value, extra = "index_id", "value", ()
+            if not ids:
+                rows = []
+            elif settings.rollup_reads:
+                rows = self.rollups.read_daily(
+                    INDEX_DAILY,
+                    start_date,
+                    end_date,
+                    lambda s, e: self.rollups.get_index_daily(s, e, ids),
+                    lambda s, e: self.repo.get_index_daily_range(ids, s, e, ohlc=ohlc),
                 )
-                daily_latest = {}
-                for r in recs:
-                    d = r.timestamp.date()
-                    if d not in daily_latest or r.timestamp > daily_latest[d].timestamp:
-                        daily_latest[d] = r
-                sorted_items = sorted(daily_latest.items())
-                results[code_] = [
-                    {
-                        "date": d.isoformat(),
-                        "value": float(r.value),
-                    }
-                    for d, r in sorted_items
-                ]
+            else:
+                rows = self.repo.get_index_daily_range(ids, start_date, end_date, ohlc=ohlc)
+        ohlc = ohlc and type_ != "central"
 
+        series = {c: [] for c in id2code.values()}
+        for r in rows:
+            series[id2code[getattr(r, id_field)]].append(r)
+        if columnar:
+            date_field = "date" if type_ == "central" else "day"
+            results = {
+                c: chart_columns(items, value, ohlc, extra, date_field=date_field) for c, items in series.items()
+            }
+        elif type_ == "central":
+            results = {
+                c: [{"date": r.date, "rate": r.rate, "published_at": r.published_at} for r in items]
+                for c, items in series.items()
+            }
         else:
-            return {"status": "error", "message": "type phải là central, market, hoặc index"}
-
+            # rate/value đã là float8; date để FastJSONResponse ghi thẳng, không isoformat từng dòng
+            results = {
+                c: [{"date": r.day, value: getattr(r, value), **(self._ohlc(r) if ohlc else {})} for r in items]
+                for c, items in series.items()
+            }
         return {"status": "success", "data": results}
+
+    @staticmethod
+    def _ohlc(r):
+        return {"open": r.open, "high": r.high, "low": r.low}
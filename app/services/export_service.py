@@ -0,0 +1,147 @@
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+from app.repository.export_repo import ExportRepository
+from app.services.registry import registry, CodeMap
+from app.utils.fast_json import dumps
+
+EXPORT_KINDS = ("gold", "central", "market", "index")
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+# Số dòng gom thành một chunk ghi ra response
+CHUNK_ROWS = 5000
+
+# Tên cột trùng với schema của /api/v1/ingest để file export nạp lại được
+FIELDS = {
+    "gold": ("timestamp", "gold_type", "location", "unit", "buy_price", "sell_price"),
+    "central": ("code", "date", "rate", "published_at"),
+    "market": ("code", "timestamp", "source", "type", "rate"),
+    "index": ("code", "timestamp", "source", "value"),
+}
+
+
+def _batched(records: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    it = iter(records)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _csv_value(v):
+    return v.isoformat() if isinstance(v, (date, datetime)) else v
+
+
+def csv_chunks(fields: Sequence[str], records: Iterable[tuple]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(fields)
+    for batch in _batched(records, CHUNK_ROWS):
+        writer.writerows([_csv_value(v) for v in r] for r in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        # Không có dòng nào: vẫn trả header
+        yield buf.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(fields: Sequence[str], records: Iterable[tuple]) -> Iterator[bytes]:
+    for batch in _batched(records, CHUNK_ROWS):
+        yield b"".join(dumps(dict(zip(fields, r))) + b"\n" for r in batch)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly (one gzip member, compressed chunk by chunk)."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+class ExportService:
+    """Bulk export of raw history as CSV / NDJSON chunks, one DB row batch at a time."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = ExportRepository(db)
+        self.dims = registry.ensure_loaded(db)
+
+    def export(
+        self,
+        kind: str,
+        fmt: str,
+        codes: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Iterator[bytes]:
+        """Validate the filters now (ValueError on unknown codes), return the lazily fetched chunks.
+
+        Session được đóng khi duyệt hết (hoặc khi generator bị đóng giữa chừng).
+        """
+        if kind not in EXPORT_KINDS:
+            raise ValueError(f"kind phải là một trong {', '.join(EXPORT_KINDS)}")
+        if kind == "central" and sources:
+            raise ValueError("central không có source")
+        if start and end and start > end:
+            raise ValueError("start phải trước end")
+        records = getattr(self, f"_{kind}")(codes, sources, start, end)
+        encode = csv_chunks if fmt == "csv" else ndjson_chunks
+        return self._closing(encode(FIELDS[kind], records))
+
+    def _closing(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        try:
+            yield from chunks
+        finally:
+            self.db.close()
+
+    @staticmethod
+    def _ids(dim: CodeMap, codes: Optional[List[str]], label: str) -> Optional[List[int]]:
+        if not codes:
+            return None
+        missing = [c for c in codes if dim.id_of(c) is None]
+        if missing:
+            raise ValueError(f"Không tìm thấy {label}: {', '.join(missing)}")
+        return [dim.id_of(c) for c in codes]
+
+    def _gold(self, codes, sources, start, end) -> Iterator[Tuple]:
+        ids = self._ids(self.dims.gold_types, codes, "gold_type")
+        if sources:
+            by_source = set(self.repo.gold_type_ids_by_source(sources))
+            ids = [i for i in ids if i in by_source] if ids is not None else sorted(by_source)
+        gold_types, locations, units = self.dims.gold_types, self.dims.locations, self.dims.units
+        return (
+            (ts, gold_types.code_of(gt), locations.code_of(loc), units.code_of(un), buy, sell)
+            for ts, gt, loc, un, buy, sell in self.repo.iter_gold(ids, start, end)
+        )
+
+    def _central(self, codes, sources, start, end) -> Iterator[Tuple]:
+        currencies = self.dims.currencies
+        ids = self._ids(currencies, codes, "currency")
+        return (
+            (currencies.code_of(cid), d, rate, published_at)
+            for cid, d, rate, published_at in self.repo.iter_central(ids, start, end)
+        )
+
+    def _market(self, codes, sources, start, end) -> Iterator[Tuple]:
+        currencies = self.dims.currencies
+        ids = self._ids(currencies, codes, "currency")
+        return (
+            (currencies.code_of(cid), ts, source, type_, rate)
+            for cid, ts, source, type_, rate in self.repo.iter_market(ids, sources or None, start, end)
+        )
+
+    def _index(self, codes, sources, start, end) -> Iterator[Tuple]:
+        indexes = self.dims.indexes
+        ids = self._ids(indexes, codes, "index")
+        return (
+            (indexes.code_of(iid), ts, source, value)
+            for iid, ts, source, value in self.repo.iter_index(ids, sources or None, start, end)
+        )
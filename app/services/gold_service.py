@@ -1,26 +1,52 @@
 from app.repository.gold_repo import GoldPriceRepository
-from app.schemas.gold import (
-    GoldPriceResponse, GoldPriceListResponse, GoldChartResponse, GoldChartItem
-)
+from app.repository.snapshot_repo import SnapshotRepository
+from app.repository.rollup_repo import RollupRepository, GOLD_DAILY
+from app.services.registry import registry
+from app.config import settings
+from app.schemas.gold import GoldPriceResponse
+from app.utils.fast_json import chart_columns
 from typing import List
 from datetime import date, timedelta
 
+def snapshot_response(snap, gold_type: str, location: str, unit: str) -> GoldPriceResponse:
+    return GoldPriceResponse(
+        timestamp=snap.timestamp,
+        buy_price=float(snap.buy_price),
+        sell_price=float(snap.sell_price),
+        gold_type=gold_type,
+        unit=unit,
+        location=location,
+        delta_buy=snap.delta_buy,
+        delta_sell=snap.delta_sell,
+        delta_buy_percent=snap.delta_buy_percent,
+        delta_sell_percent=snap.delta_sell_percent,
+    )
+
+
 class GoldPriceService:
     def __init__(self, repo: GoldPriceRepository):
         self.repo = repo
+        self.dims = registry.ensure_loaded(repo.db)
+        self.snapshots = SnapshotRepository(repo.db)
+        self.rollups = RollupRepository(repo.db)
 
     def get_current_gold_price(self, gold_type: str, location: str, unit: str):
-        gt = self.repo.get_gold_type_by_code(gold_type)
-        loc = self.repo.get_location_by_code(location)
-        un = self.repo.get_unit_by_code(unit)
-        if not gt or not loc or not un:
+        gt_id = self.dims.gold_types.id_of(gold_type)
+        loc_id = self.dims.locations.id_of(location)
+        un_id = self.dims.units.id_of(unit)
+        if gt_id is None or loc_id is None or un_id is None:
             raise ValueError("Not found: gold_type, location, or unit.")
 
-        gold_price = self.repo.get_latest(gt.id, loc.id, un.id)
+        # Đọc snapshot (1 lookup theo PK); chưa có snapshot thì tính từ bảng tick như cũ
+        snap = self.snapshots.get_gold(gt_id, loc_id, un_id)
+        if snap:
+            return {"status": "success", "data": [snapshot_response(snap, gold_type, location, unit)]}
+
+        gold_price = self.repo.get_latest(gt_id, loc_id, un_id)
         prev_price = None
         if gold_price:
             prev_price = self.repo.get_latest_of_previous_day(
-                gt.id, loc.id, un.id, gold_price.timestamp
+                gt_id, loc_id, un_id, gold_price.timestamp
             )
 
         delta_buy = delta_sell = delta_buy_percent = delta_sell_percent = None
@@ -37,9 +63,9 @@ class GoldPriceService:
                 timestamp=gold_price.timestamp,
                 buy_price=float(gold_price.buy_price),
                 sell_price=float(gold_price.sell_price),
-                gold_type=gt.code,
-                unit=un.code,
-                location=loc.code,
+                gold_type=gold_type,
+                unit=unit,
+                location=location,
                 delta_buy=delta_buy,
                 delta_sell=delta_sell,
                 delta_buy_percent=delta_buy_percent,
@@ -51,57 +77,102 @@ class GoldPriceService:
 
         return {"status": "success", "data": [response] if response else []}
 
-    def get_gold_chart(self, gold_types: List[str], locations: List[str], days: int):
+    def get_gold_chart(
+        self, gold_types: List[str], locations: List[str], days: int, ohlc: bool = False, columnar: bool = False
+    ):
+        """Daily sell-price series per "gold_type-location", as plain dicts ready for FastJSONResponse.
+
+        `columnar` trả mỗi series dạng {"dates": [...], "values": [...]} (kèm
+        "open"/"high"/"low" khi ohlc) thay vì một dict cho mỗi điểm.
+        """
         data = {}
         today = date.today()
         start = today - timedelta(days=days - 1)
+        # Giữ thứ tự key theo request: gold_types x locations
+        keys = {}
         for gt_code in gold_types:
-            gt = self.repo.get_gold_type_by_code(gt_code)
-            if not gt:
+            gt_id = self.dims.gold_types.id_of(gt_code)
+            if gt_id is None:
                 continue
             for loc_code in locations:
-                loc = self.repo.get_location_by_code(loc_code)
-                if not loc:
+                loc_id = self.dims.locations.id_of(loc_code)
+                if loc_id is None:
                     continue
-                units = self.repo.get_units_by_gold_type_and_location(gt.id, loc.id)
-                for un in units:
-                    series = self.repo.get_range(gt.id, loc.id, un.id, start, today)
-                    daily_latest = {}
-                    for p in series:
-                        d = p.timestamp.date()
-                        if d not in daily_latest or p.timestamp > daily_latest[d].timestamp:
-                            daily_latest[d] = p
-                    key = f"{gt_code}-{loc_code}"
-                    data[key] = [
-                        GoldChartItem(date=day, price=float(p.sell_price))
-                        for day, p in sorted(daily_latest.items())
-                    ]
-        return GoldChartResponse(status="success", data=data)
+                keys[(gt_id, loc_id)] = f"{gt_code}-{loc_code}"
+                data[f"{gt_code}-{loc_code}"] = chart_columns([], "sell_price", ohlc) if columnar else []
+        if not keys:
+            return {"status": "success", "data": data}
+
+        gt_ids = list({gt_id for gt_id, _ in keys})
+        loc_ids = list({loc_id for _, loc_id in keys})
+        if settings.rollup_reads:
+            rows = self.rollups.read_daily(
+                GOLD_DAILY,
+                start,
+                today,
+                lambda s, e: self.rollups.get_gold_daily(s, e, gt_ids, loc_ids),
+                lambda s, e: self.repo.get_daily_range(gt_ids, loc_ids, s, e, ohlc=ohlc),
+            )
+        else:
+            rows = self.repo.get_daily_range(gt_ids, loc_ids, start, today, ohlc=ohlc)
+        # Mỗi (gold_type, location) một series: chọn rõ unit có id lớn nhất trong các unit có dữ liệu
+        # (kết quả cũ khi unit sau ghi đè unit trước), không dựa vào thứ tự dòng của rollup/tick
+        series = {}
+        for r in rows:
+            series.setdefault((r.gold_type_id, r.location_id), {}).setdefault(r.unit_id, []).append(r)
+        for (gt_id, loc_id), by_unit in series.items():
+            key = keys.get((gt_id, loc_id))
+            if not key:
+                continue
+            items = by_unit[max(by_unit)]
+            if columnar:
+                data[key] = chart_columns(items, "sell_price", ohlc)
+            else:
+                # Giá đã là float8 từ SQL; dict thường thay cho GoldChartItem từng điểm
+                data[key] = [
+                    {"date": r.day, "price": r.sell_price, "open": r.open, "high": r.high, "low": r.low}
+                    if ohlc else {"date": r.day, "price": r.sell_price}
+                    for r in items
+                ]
+        return {"status": "success", "data": data}
+
+    def _closes(self, start: date, end: date) -> list:
+        # Tick cuối ngày của mỗi (gold_type, location, unit) cho từng ngày start..end: từ rollup nếu ngày đã chốt
+        if settings.rollup_reads:
+            return self.rollups.read_daily(
+                GOLD_DAILY,
+                start,
+                end,
+                lambda s, e: self.rollups.get_gold_daily(s, e),
+                self.repo.get_latest_group_by_key,
+            )
+        return self.repo.get_latest_group_by_key(start, end)
 
     def get_gold_table(self, selected_date: date):
-        current_data = self.repo.get_latest_group_by_key(selected_date)
-        previous_data = self.repo.get_latest_group_by_key(selected_date - timedelta(days=1))
+        prev_date = selected_date - timedelta(days=1)
+        # Một lần đọc cho cả ngày đang xem và ngày trước đó
+        closes = self._closes(prev_date, selected_date)
+        current_data = [r for r in closes if r.day == selected_date]
+        previous_data = [r for r in closes if r.day == prev_date]
         prev_map = {(p.gold_type_id, p.unit_id, p.location_id): p for p in previous_data}
         result = []
         for cur in current_data:
             prev = prev_map.get((cur.gold_type_id, cur.unit_id, cur.location_id))
             delta_buy = delta_sell = None
             if prev:
-                delta_buy = float(cur.buy_price) - float(prev.buy_price)
-                delta_sell = float(cur.sell_price) - float(prev.sell_price)
-            gt = cur.gold_type
-            un = cur.unit
-            loc = cur.location
-            result.append(
-                GoldPriceResponse(
-                    timestamp=cur.timestamp,
-                    buy_price=float(cur.buy_price),
-                    sell_price=float(cur.sell_price),
-                    gold_type=gt.code,
-                    unit=un.code,
-                    location=loc.code,
-                    delta_buy=delta_buy,
-                    delta_sell=delta_sell,
-                )
-            )
-        return GoldPriceListResponse(status="success", data=result)
+                delta_buy = cur.buy_price - prev.buy_price
+                delta_sell = cur.sell_price - prev.sell_price
+            # Cùng field/thứ tự với GoldPriceResponse
+            result.append({
+                "timestamp": cur.timestamp,
+                "buy_price": cur.buy_price,
+                "sell_price": cur.sell_price,
+                "gold_type": self.dims.gold_types.code_of(cur.gold_type_id),
+                "unit": self.dims.units.code_of(cur.unit_id),
+                "location": self.dims.locations.code_of(cur.location_id),
+                "delta_buy": delta_buy,
+                "delta_sell": delta_sell,
+                "delta_buy_percent": None,
+                "delta_sell_percent": None,
+            })
+        return {"status": "success", "message": None, "data": result}
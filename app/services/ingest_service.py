@@ -0,0 +1,136 @@
+from typing import Callable, List, Tuple
+from sqlalchemy.orm import Session
+from app.repository.ingest_repo import (
+    IngestRepository, UpsertTarget, GOLD_PRICES, CENTRAL_RATES, MARKET_RATES, INDEX_VALUES
+)
+from app.schemas.ingest import (
+    GoldPriceTick, CentralRateTick, MarketRateTick, IndexValueTick, IngestResult
+)
+from app.repository.snapshot_repo import SnapshotRepository
+from app.repository.partition_repo import PartitionRepository, PARTITIONED_TABLES
+from app.repository.rollup_repo import RollupRepository, GOLD_DAILY, MARKET_DAILY, INDEX_DAILY
+from app.services.cached_service import invalidate_cache
+from app.services.registry import registry
+from app.models.types import to_storage_price
+
+
+class IngestService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = IngestRepository(db)
+        self.snapshots = SnapshotRepository(db)
+        self.rollups = RollupRepository(db)
+        self.partitions = PartitionRepository(db)
+        self.dims = registry.ensure_loaded(db)
+
+    def _ingest(
+        self, target: UpsertTarget, items: list, to_row: Callable, namespace: str, on_changed: Callable
+    ) -> IngestResult:
+        rows, unknown = self._resolve(items, to_row)
+        if unknown:
+            # Có thể registry chưa kịp nạp mã mới: nạp lại 1 lần rồi resolve lại
+            self.dims.load(self.db)
+            rows, unknown = self._resolve(items, to_row)
+        if rows and target.table in PARTITIONED_TABLES:
+            # Dữ liệu lịch sử/tương lai có thể rơi vào tháng chưa có partition
+            pos = target.columns.index("timestamp")
+            stamps = [r[pos] for r in rows]
+            self.partitions.ensure_for_timestamps(target.table, min(stamps), max(stamps))
+        inserted, updated = self.repo.upsert(target, rows)
+        if inserted or updated:
+            # Cùng transaction với upsert: snapshot/rollup không bao giờ lệch với bảng tick
+            on_changed(rows)
+        self.db.commit()
+        if inserted or updated:
+            invalidate_cache(namespace)
+        return IngestResult(
+            status="success",
+            received=len(items),
+            inserted=inserted,
+            updated=updated,
+            skipped=len(items) - inserted - updated,
+            unknown_codes=sorted(unknown),
+        )
+
+    @staticmethod
+    def _resolve(items: list, to_row: Callable) -> Tuple[List[tuple], set]:
+        rows, unknown = [], set()
+        for item in items:
+            row, missing = to_row(item)
+            if missing:
+                unknown.update(missing)
+            else:
+                rows.append(row)
+        return rows, unknown
+
+    def ingest_gold(self, items: List[GoldPriceTick]) -> IngestResult:
+        gold_types, units, locations = self.dims.gold_types, self.dims.units, self.dims.locations
+
+        def to_row(t: GoldPriceTick):
+            gt_id = gold_types.id_of(t.gold_type)
+            un_id = units.id_of(t.unit)
+            loc_id = locations.id_of(t.location)
+            if gt_id is None or un_id is None or loc_id is None:
+                missing = [
+                    f"{kind}:{code}"
+                    for kind, code, id_ in (
+                        ("gold_type", t.gold_type, gt_id), ("unit", t.unit, un_id), ("location", t.location, loc_id)
+                    )
+                    if id_ is None
+                ]
+                return None, missing
+            return (t.timestamp, gt_id, un_id, loc_id, to_storage_price(t.buy_price), to_storage_price(t.sell_price)), None
+
+        def on_changed(rows):
+            self.snapshots.refresh_gold({(r[1], r[3], r[2]) for r in rows})
+            self.rollups.refresh_settled(
+                GOLD_DAILY,
+                {r[0].date() for r in rows},
+                {"gold_type_id": {r[1] for r in rows}, "location_id": {r[3] for r in rows}, "unit_id": {r[2] for r in rows}},
+            )
+
+        return self._ingest(GOLD_PRICES, items, to_row, "gold", on_changed)
+
+    def ingest_central(self, items: List[CentralRateTick]) -> IngestResult:
+        currencies = self.dims.currencies
+
+        def to_row(t: CentralRateTick):
+            cid = currencies.id_of(t.code)
+            if cid is None:
+                return None, [f"currency:{t.code}"]
+            return (cid, t.date, t.rate, t.published_at), None
+
+        def on_changed(rows):
+            self.snapshots.refresh_exchange("central", {r[0] for r in rows})
+
+        return self._ingest(CENTRAL_RATES, items, to_row, "exchange", on_changed)
+
+    def ingest_market(self, items: List[MarketRateTick]) -> IngestResult:
+        currencies = self.dims.currencies
+
+        def to_row(t: MarketRateTick):
+            cid = currencies.id_of(t.code)
+            if cid is None:
+                return None, [f"currency:{t.code}"]
+            return (cid, t.timestamp, t.source, t.type, t.rate), None
+
+        def on_changed(rows):
+            self.snapshots.refresh_exchange("market", {r[0] for r in rows})
+            self.rollups.refresh_settled(MARKET_DAILY, {r[1].date() for r in rows}, {"currency_id": {r[0] for r in rows}})
+
+        return self._ingest(MARKET_RATES, items, to_row, "exchange", on_changed)
+
+    def ingest_index(self, items: List[IndexValueTick]) -> IngestResult:
+        indexes = self.dims.indexes
+
+        def to_row(t: IndexValueTick):
+            iid = indexes.id_of(t.code)
+            if iid is None:
+                return None, [f"index:{t.code}"]
+            return (iid, t.timestamp, t.source, t.value), None
+
+        def on_changed(rows):
+            self.snapshots.refresh_exchange("index", {r[0] for r in rows})
+            self.rollups.refresh_settled(INDEX_DAILY, {r[1].date() for r in rows}, {"index_id": {r[0] for r in rows}})
+
+        return self._ingest(INDEX_VALUES, items, to_row, "exchange", on_changed)
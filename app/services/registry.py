@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from app.models.exchange import Currency, FinancialIndexMeta
+from app.models.gold import GoldType, Unit, Location
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Lookup trượt (dimension mới thêm sau lần nạp trước, hoặc code lạ client gửi lên) nạp lại
+# registry tối đa một lần trong khoảng này
+MISS_RELOAD_MIN_SECONDS = 5.0
+
+
+class CodeMap:
+    def __init__(self, rows=(), reload: Optional[Callable[["CodeMap"], "CodeMap"]] = None):
+        self.by_code = {code: id_ for id_, code in rows}
+        self.by_id = {id_: code for id_, code in rows}
+        self._reload = reload
+
+    def _refreshed(self) -> "CodeMap":
+        # Map mới là tập cha của map cũ nên nhận luôn dict của nó; caller đang giữ map này
+        # (vd. vòng lặp export) sẽ không phải nạp lại lần nữa
+        fresh = self._reload(self)
+        self.by_code, self.by_id = fresh.by_code, fresh.by_id
+        return self
+
+    def id_of(self, code: str) -> Optional[int]:
+        id_ = self.by_code.get(code)
+        if id_ is None and self._reload is not None:
+            id_ = self._refreshed().by_code.get(code)
+        return id_
+
+    def code_of(self, id_: int) -> Optional[str]:
+        code = self.by_id.get(id_)
+        if code is None and self._reload is not None:
+            code = self._refreshed().by_id.get(id_)
+        return code
+
+    def __len__(self):
+        return len(self.by_code)
+
+
+class DimensionRegistry:
+    """Process-wide code <-> id maps for the small dimension tables.
+
+    Loaded at startup and refreshed periodically (see app.main lifespan) or on
+    demand via `refresh()`, so request handlers resolve codes without queries.
+    """
+
+    def __init__(self):
+        self.currencies = CodeMap()
+        self.indexes = CodeMap()
+        self.gold_types = CodeMap()
+        self.units = CodeMap()
+        self.locations = CodeMap()
+        self.loaded_at: Optional[datetime] = None
+        self.miss_reloads = 0
+        self._lock = threading.Lock()
+        self._last_miss_reload = 0.0
+
+    def load(self, db: Session):
+        maps = {
+            name: CodeMap(db.query(model.id, model.code).all(), self._reloader(name))
+            for name, model in (
+                ("currencies", Currency),
+                ("indexes", FinancialIndexMeta),
+                ("gold_types", GoldType),
+                ("units", Unit),
+                ("locations", Location),
+            )
+        }
+        # Gán lại từng map (không sửa tại chỗ) để request đang đọc không thấy trạng thái dở dang
+        with self._lock:
+            for name, code_map in maps.items():
+                setattr(self, name, code_map)
+            self.loaded_at = datetime.now()
+
+    def _reloader(self, name: str) -> Callable[[CodeMap], CodeMap]:
+        def reload(stale: CodeMap) -> CodeMap:
+            with self._lock:
+                current = getattr(self, name)
+                if current.by_id is not stale.by_id:
+                    # Đã có lần nạp mới hơn map caller đang giữ: chỉ cần nhận map đó
+                    return current
+                now = time.monotonic()
+                if now - self._last_miss_reload < MISS_RELOAD_MIN_SECONDS:
+                    return current
+                self._last_miss_reload = now
+                self.miss_reloads += 1
+            self.refresh()
+            return getattr(self, name)
+
+        return reload
+
+    def ensure_loaded(self, db: Session) -> "DimensionRegistry":
+        if self.loaded_at is None:
+            self.load(db)
+        return self
+
+    def refresh(self):
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            self.load(db)
+            logger.info(
+                "Dimension registry loaded: %d currencies, %d indexes, %d gold types, %d units, %d locations",
+                len(self.currencies), len(self.indexes), len(self.gold_types), len(self.units), len(self.locations),
+            )
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "miss_reloads": self.miss_reloads,
+            "currencies": len(self.currencies),
+            "indexes": len(self.indexes),
+            "gold_types": len(self.gold_types),
+            "units": len(self.units),
+            "locations": len(self.locations),
+        }
+
+
+registry = DimensionRegistry()
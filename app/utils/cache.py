@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class _LeaderCancelled(Exception):
+    """Set on the shared future when the computing coroutine was cancelled; waiters retry."""
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """Thread-safe TTL + LRU cache with request coalescing.
+
+    Concurrent misses on the same key run `compute` once; the other callers
+    wait for that result. Keys are tuples whose first item is a namespace, so
+    `invalidate("gold")` drops every cached "gold" entry. `get_or_set` is for
+    threads (sync code), `aget_or_set` for coroutines on the event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight = {}
+        self._ainflight = {}
+        self._lock = threading.Lock()
+        # Tăng mỗi lần invalidate để không ghi lại kết quả tính từ dữ liệu cũ
+        self._generation = 0
+        self.hits = self.misses = self.coalesced = self.evictions = self.invalidations = 0
+
+    def _get(self, key: tuple) -> Any:
+        # Gọi khi đang giữ self._lock
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] > time.monotonic():
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        del self._data[key]
+        return _MISSING
+
+    def get_or_set(self, key: tuple, ttl: float, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._get(key)
+            if value is not _MISSING:
+                return value
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if call.error is None and generation == self._generation:
+                    self._set(key, call.value, ttl)
+            call.event.set()
+        return call.value
+
+    async def aget_or_set(self, key: tuple, ttl: float, compute: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            value = self._get(key)
+            if value is not _MISSING:
+                return value
+            future = self._ainflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._ainflight[key] = asyncio.get_running_loop().create_future()
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # Leader bị huỷ (vd. client ngắt kết nối): không huỷ theo, chạy lại và một follower làm leader
+                return await self.aget_or_set(key, ttl, compute)
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(_LeaderCancelled() if isinstance(e, asyncio.CancelledError) else e)
+            # Đánh dấu đã đọc để asyncio không cảnh báo khi không có ai chờ
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._ainflight.pop(key, None)
+                if future.done() and not future.cancelled() and future.exception() is None \
+                        and generation == self._generation:
+                    self._set(key, value, ttl)
+        return value
+
+    def _set(self, key: tuple, value: Any, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, namespace: Optional[str] = None):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if namespace is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k[0] == namespace]:
+                del self._data[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
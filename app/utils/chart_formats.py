@@ -0,0 +1,113 @@
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from app.utils.fast_json import FastJSONResponse
+from app.utils.request_metrics import serialization_timer
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow là tuỳ chọn: thiếu thì Accept Arrow trả 406
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MEDIA_TYPES = {
+    ARROW_MEDIA_TYPE: ARROW_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+}
+
+# Mô tả thêm cho OpenAPI của các route chart
+BINARY_CHART_RESPONSES = {
+    200: {
+        "description": (
+            "JSON mặc định. Accept: application/vnd.apache.arrow.stream trả Arrow IPC stream "
+            "(cột series, date, value[, open, high, low, published_at]); Accept: application/msgpack "
+            "trả MessagePack cùng cấu trúc với format=columnar."
+        ),
+        "content": {ARROW_MEDIA_TYPE: {}, MSGPACK_MEDIA_TYPE: {}},
+    },
+    304: {"description": "If-None-Match / If-Modified-Since khớp: dữ liệu chưa đổi"},
+    406: {"description": "Thư viện cho định dạng được yêu cầu (pyarrow / msgpack) chưa được cài"},
+}
+
+
+def _q(param: str) -> Optional[float]:
+    name, _, value = param.partition("=")
+    if name.strip().lower() != "q":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def binary_media_type(accept: Optional[str]) -> Optional[str]:
+    """The binary chart format asked for in an Accept header, None for JSON (the default)."""
+    if not accept:
+        return None
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        if media_type.lower() not in _MEDIA_TYPES:
+            continue
+        if any(_q(p) == 0 for p in params):
+            continue
+        return _MEDIA_TYPES[media_type.lower()]
+    return None
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def to_msgpack(content: dict) -> bytes:
+    if msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack không khả dụng (chưa cài msgpack)")
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+def to_arrow(content: dict) -> bytes:
+    """Arrow IPC stream of a columnar chart response: one row per (series, date).
+
+    Thứ tự series theo request được ghi trong schema metadata "series" (gồm cả
+    series không có dữ liệu).
+    """
+    if pa is None:
+        raise HTTPException(status_code=406, detail="Arrow không khả dụng (chưa cài pyarrow)")
+    data = content["data"]
+    names = list(data)
+    indices, columns = [], {}
+    for i, series in enumerate(data.values()):
+        indices += [i] * len(series["dates"])
+        for name, values in series.items():
+            columns.setdefault(name, []).extend(values)
+    arrays = {"series": pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(names, pa.string()))}
+    arrays["date"] = pa.array(columns.pop("dates", []), pa.date32())
+    arrays["value"] = pa.array(columns.pop("values", []), pa.float64())
+    for name, values in columns.items():
+        arrays[name] = pa.array(values, pa.timestamp("us") if name == "published_at" else pa.float64())
+    table = pa.table(arrays).replace_schema_metadata({"series": json.dumps(names)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def chart_response(content: dict, media_type: str, headers: Optional[dict] = None) -> Response:
+    """Encode a columnar chart result (service output with columnar=True) as `media_type`."""
+    if content.get("status") != "success":
+        return FastJSONResponse(content, headers=headers)
+    with serialization_timer():
+        body = to_arrow(content) if media_type == ARROW_MEDIA_TYPE else to_msgpack(content)
+    return Response(content=body, media_type=media_type, headers=headers)
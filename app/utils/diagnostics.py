@@ -0,0 +1,175 @@
+"""Opt-in query diagnostics: slow-query log with EXPLAIN plans and an N+1 detector.
+
+Bật bằng DIAGNOSTICS=true. Mỗi sự kiện là một dòng JSON trong DIAGNOSTICS_FILE:
+    {"type": "slow_query", ...}  câu lệnh chạy lâu hơn SLOW_QUERY_MS, kèm plan
+                                 EXPLAIN (ANALYZE, BUFFERS) của chính câu đó (chỉ SELECT)
+    {"type": "n_plus_one", ...}  một request chạy cùng một câu lệnh (đã chuẩn hoá)
+                                 nhiều hơn N_PLUS_ONE_THRESHOLD lần
+
+EXPLAIN ANALYZE chạy lại câu lệnh, nên chế độ này chỉ dùng khi điều tra.
+
+Tổng hợp file: python -m app.utils.diagnostics [logs/diagnostics.jsonl]
+"""
+import json
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.utils.logger import get_logger
+from app.utils.request_metrics import RequestStats, current_request
+
+logger = get_logger(__name__)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_write_lock = threading.Lock()
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with parameters / literals replaced by ? so repeated queries compare equal."""
+    s = _PLACEHOLDER.sub("?", statement)
+    s = _LITERAL.sub("?", s)
+    s = _VALUE_LIST.sub("(?)", s)
+    return _SPACE.sub(" ", s).strip()
+
+
+def write_event(record: dict):
+    record = {"ts": datetime.now(timezone.utc).isoformat(), **record}
+    line = json.dumps(record, default=str, ensure_ascii=False)
+    with _write_lock:
+        with open(settings.diagnostics_file, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _explain(conn, statement: str, parameters) -> dict:
+    # Cursor DBAPI trực tiếp: không kích hoạt lại event của engine. SAVEPOINT để lỗi
+    # của EXPLAIN không làm hỏng transaction của request.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT diagnostics_explain")
+        try:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT diagnostics_explain")
+            return {"plan_error": str(e)}
+        cursor.execute("RELEASE SAVEPOINT diagnostics_explain")
+    finally:
+        cursor.close()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return {"plan": plan[0]}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("diagnostics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("diagnostics_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = current_request.get()
+
+    if stats is not None:
+        key = fingerprint(statement)
+        if stats.fingerprints is None:
+            stats.fingerprints = defaultdict(lambda: [0, 0.0, statement])
+        entry = stats.fingerprints[key]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    if elapsed * 1000 < settings.slow_query_ms:
+        return
+    record = {
+        "type": "slow_query",
+        "path": stats.path if stats is not None else None,
+        "duration_ms": round(elapsed * 1000, 2),
+        "statement": statement,
+        "parameters": parameters,
+        "rowcount": cursor.rowcount,
+    }
+    # Chỉ EXPLAIN SELECT đọc bảng: SELECT không có FROM thường là gọi hàm có tác dụng phụ
+    # (pg_notify, pg_try_advisory_xact_lock) mà EXPLAIN ANALYZE sẽ chạy lại
+    server_side = getattr(context, "_is_server_side", False)
+    sql = statement.lstrip().upper()
+    if not executemany and not server_side and sql.startswith("SELECT") and " FROM " in sql:
+        try:
+            record.update(_explain(conn, statement, parameters))
+        except Exception as e:
+            record["plan_error"] = str(e)
+    try:
+        write_event(record)
+    except OSError:
+        logger.exception("Cannot write %s", settings.diagnostics_file)
+
+
+def finish_request(method: str, route: str, stats: RequestStats):
+    """Write one n_plus_one event per statement the request repeated more than N_PLUS_ONE_THRESHOLD times."""
+    if not stats.fingerprints:
+        return
+    for key, (count, total, example) in stats.fingerprints.items():
+        if count > settings.n_plus_one_threshold:
+            try:
+                write_event({
+                    "type": "n_plus_one",
+                    "method": method,
+                    "route": route,
+                    "count": count,
+                    "total_ms": round(total * 1000, 2),
+                    "fingerprint": key,
+                    "statement": example,
+                })
+            except OSError:
+                logger.exception("Cannot write %s", settings.diagnostics_file)
+
+
+def instrument_engine(engine: Engine):
+    """Attach the diagnostics hooks (call after request_metrics.instrument_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def summarize(path: str) -> list:
+    """Aggregate a diagnostics file: one row per (type, route, fingerprint), slowest first."""
+    groups = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            e = json.loads(line)
+            key = (e["type"], e.get("route") or e.get("path"), e.get("fingerprint") or fingerprint(e["statement"]))
+            g = groups.setdefault(key, {"events": 0, "total_ms": 0.0, "max_ms": 0.0, "max_count": 0})
+            ms = e.get("duration_ms", e.get("total_ms", 0.0))
+            g["events"] += 1
+            g["total_ms"] += ms
+            g["max_ms"] = max(g["max_ms"], ms)
+            g["max_count"] = max(g["max_count"], e.get("count", 1))
+    return sorted(((*k, v) for k, v in groups.items()), key=lambda r: -r[3]["total_ms"])
+
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else settings.diagnostics_file
+    for type_, route, key, g in summarize(path):
+        print(
+            f"{type_:<11} {route or '-':<28} events={g['events']:<5} total_ms={g['total_ms']:<10.1f} "
+            f"max_ms={g['max_ms']:<9.1f} max_count={g['max_count']:<4} {key[:160]}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
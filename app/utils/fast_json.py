@@ -0,0 +1,89 @@
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Iterable, Sequence
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.utils.request_metrics import serialization_timer
+
+try:
+    import orjson
+except ImportError:  # orjson là tuỳ chọn: thiếu thì dùng json chuẩn (chậm hơn, cùng output)
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any):
+    # orjson ghi NaN/Infinity thành null; json chuẩn cần đổi trước để hai nhánh cho cùng output
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def dumps(content: Any) -> bytes:
+    """Serialise dicts/lists of str, numbers, Decimal, date/datetime (and Pydantic models) to JSON bytes.
+
+    NaN/Infinity thành null ở cả hai nhánh.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        _finite(content),
+        default=lambda obj: _finite(_default(obj)),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def chart_columns(rows: Sequence, value: str, ohlc: bool = False, extra: Iterable[str] = (), date_field: str = "day") -> dict:
+    """Columnar chart series {"dates": [...], "values": [...]} from rows ordered by day.
+
+    `ohlc` thêm các cột "open", "high", "low"; `extra` thêm cột theo tên field
+    (vd. "published_at" của tỷ giá trung tâm).
+    """
+    columns = {
+        "dates": list(map(attrgetter(date_field), rows)),
+        "values": list(map(attrgetter(value), rows)),
+    }
+    for name in (("open", "high", "low") if ohlc else ()) + tuple(extra):
+        columns[name] = list(map(attrgetter(name), rows))
+    return columns
+
+
+class TimedJSONResponse(JSONResponse):
+    """Starlette's JSONResponse (same bytes) with the render time counted for the request (Server-Timing)."""
+
+    def render(self, content: Any) -> bytes:
+        with serialization_timer():
+            return super().render(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that writes the content straight to bytes (orjson when installed).
+
+    Route trả về FastJSONResponse(...) trực tiếp thì FastAPI bỏ qua bước
+    jsonable_encoder / validate lại theo response_model; response_model vẫn
+    được giữ trên route để làm tài liệu OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with serialization_timer():
+            return dumps(content)
@@ -0,0 +1,60 @@
+import hashlib
+from datetime import date, datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from app.config import settings
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # So sánh yếu (RFC 9110 13.1.2): bỏ tiền tố W/ ở cả hai phía
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == opaque for t in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+def conditional_headers(request: Request, version: Tuple[Optional[datetime], str], variant: str = "") -> dict:
+    """ETag / Last-Modified / Cache-Control for a read endpoint; raises a 304 when the client copy is fresh.
+
+    `version` là (updated_at lớn nhất theo UTC, tag) của SnapshotRepository.version.
+    Body còn phụ thuộc ngày hiện tại (cửa sổ `days` của chart, ngày mặc định của
+    table) nên ngày cũng nằm trong ETag; `variant` phân biệt các biểu diễn khác
+    nhau của cùng một URL (vd. media type chọn theo Accept).
+    """
+    last_modified, tag = version
+    today = date.today()
+    etag = 'W/"%s"' % hashlib.sha1(f"{tag}|{today}|{variant}".encode()).hexdigest()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.http_cache_max_age}"}
+
+    modified = None
+    if last_modified is not None:
+        # HTTP-date chỉ chính xác tới giây; đầu ngày cũng là một lần "thay đổi" của body
+        modified = max(
+            last_modified.replace(tzinfo=timezone.utc, microsecond=0),
+            datetime.combine(today, time()).astimezone(timezone.utc),
+        )
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Có If-None-Match thì bỏ qua If-Modified-Since (RFC 9110 13.2.2)
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and modified and _not_modified_since(if_modified_since, modified))
+    if fresh:
+        raise HTTPException(status_code=304, headers=headers)
+    return headers
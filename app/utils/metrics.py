@@ -0,0 +1,98 @@
+import threading
+from bisect import bisect_left
+from typing import List, Sequence
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) for latencies in seconds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, n in zip(self.buckets, self._counts):
+                running += n
+                cumulative[str(bound)] = running
+            cumulative["+Inf"] = self.count
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "max": self.max,
+                "avg": self.sum / self.count if self.count else 0.0,
+                "buckets": cumulative,
+            }
+
+
+def _label_str(names: Sequence[str], values: tuple, extra: str = "") -> str:
+    pairs = [
+        '%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class HistogramFamily:
+    """Histograms keyed by label values, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help_, tuple(labelnames), tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def exposition(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, child in sorted(self._children.items()):
+            snap = child.snapshot()
+            for bound, count in snap["buckets"].items():
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, values, le)} {count}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, values)} {snap['sum']}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, values)} {snap['count']}")
+        return lines
+
+
+class CounterFamily:
+    """Monotonic counters keyed by label values (Prometheus text format)."""
+
+    def __init__(self, name: str, help_: str, labelnames: Sequence[str]):
+        self.name, self.help, self.labelnames = name, help_, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def exposition(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{_label_str(self.labelnames, values)} {value}")
+        return lines
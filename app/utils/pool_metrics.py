@@ -0,0 +1,73 @@
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.config import settings
+from app.utils.metrics import Histogram
+
+# Thời gian chờ lấy connection từ pool (giây)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout (including time spent queued for a free connection)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.metrics.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.metrics.invalidations += 1
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            self.metrics.wait.observe(time.perf_counter() - start)
+            raise
+        self.metrics.wait.observe(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        # Cả hai engine tạo pool từ cùng POOL_OPTIONS (app.database)
+        "max_overflow": settings.db_max_overflow,
+        "timeout": pool.timeout(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update({
+            "checkout_wait_seconds": metrics.wait.snapshot(),
+            "checkout_timeouts": metrics.timeouts,
+            "connects": metrics.connects,
+            "invalidations": metrics.invalidations,
+        })
+    return stats
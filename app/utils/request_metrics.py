@@ -0,0 +1,133 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.metrics import CounterFamily, HistogramFamily
+
+# Số câu lệnh / số dòng mỗi request
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+REQUEST_DURATION = HistogramFamily(
+    "http_request_duration_seconds", "Time until the response was fully sent", ("route", "method")
+)
+REQUEST_DB_TIME = HistogramFamily(
+    "http_request_db_seconds", "Time spent executing SQL statements per request", ("route", "method")
+)
+REQUEST_DB_STATEMENTS = HistogramFamily(
+    "http_request_db_statements", "SQL statements executed per request", ("route", "method"), COUNT_BUCKETS
+)
+REQUEST_DB_ROWS = HistogramFamily(
+    "http_request_db_rows", "Rows fetched from the database per request", ("route", "method"), ROW_BUCKETS
+)
+REQUEST_SERIALIZATION = HistogramFamily(
+    "http_request_serialization_seconds", "Time spent rendering the response body", ("route", "method")
+)
+REQUESTS_TOTAL = CounterFamily("http_requests_total", "Requests by final status code", ("route", "method", "status"))
+
+FAMILIES = (
+    REQUEST_DURATION, REQUEST_DB_TIME, REQUEST_DB_STATEMENTS, REQUEST_DB_ROWS, REQUEST_SERIALIZATION, REQUESTS_TOTAL
+)
+
+
+class RequestStats:
+    """Counters of one request, filled by the SQLAlchemy hooks and the JSON renderers."""
+
+    __slots__ = (
+        "path", "statements", "db_time", "rows", "slowest_time", "slowest_statement", "serialization_time",
+        "fingerprints",
+    )
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.serialization_time = 0.0
+        # fingerprint -> [số lần, tổng thời gian, câu mẫu]; chỉ dùng khi DIAGNOSTICS bật
+        self.fingerprints = None
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} statements, {self.rows} rows", '
+            f"db-slowest;dur={self.slowest_time * 1000:.2f}, "
+            f"serialize;dur={self.serialization_time * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+
+    def log_fields(self) -> dict:
+        return {
+            "db_statements": self.statements,
+            "db_ms": round(self.db_time * 1000, 2),
+            "db_rows": self.rows,
+            "db_slowest_ms": round(self.slowest_time * 1000, 2),
+            "serialize_ms": round(self.serialization_time * 1000, 2),
+        }
+
+
+# Stats của request đang xử lý; None ngoài request (job nền, broadcaster, script).
+# Context được copy sang greenlet của AsyncSession.run_sync và sang threadpool,
+# nên câu SQL chạy ở đó vẫn được tính cho đúng request.
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats.statements += 1
+    stats.db_time += elapsed
+    # rowcount = -1 với server-side cursor (export): số dòng không biết trước
+    if cursor.rowcount and cursor.rowcount > 0 and cursor.description is not None:
+        stats.rows += cursor.rowcount
+    if elapsed > stats.slowest_time:
+        stats.slowest_time = elapsed
+        stats.slowest_statement = statement
+
+
+def instrument_engine(engine: Engine):
+    """Attribute SQL time / statement count / rows of `engine` to the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def serialization_timer():
+    stats = current_request.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialization_time += time.perf_counter() - start
+
+
+def record(route: str, method: str, status: int, duration: float, stats: RequestStats):
+    REQUEST_DURATION.labels(route, method).observe(duration)
+    REQUEST_DB_TIME.labels(route, method).observe(stats.db_time)
+    REQUEST_DB_STATEMENTS.labels(route, method).observe(stats.statements)
+    REQUEST_DB_ROWS.labels(route, method).observe(stats.rows)
+    REQUEST_SERIALIZATION.labels(route, method).observe(stats.serialization_time)
+    REQUESTS_TOTAL.inc(route, method, str(status))
+
+
+def prometheus_text() -> str:
+    lines = []
+    for family in FAMILIES:
+        lines.extend(family.exposition())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,53 @@
+"""Compare two benchmarks.load result files.
+
+Chạy: python -m benchmarks.compare BASE.json NEW.json [--threshold 10]
+
+In p50/p95/p99 và throughput của từng endpoint ở hai lần chạy kèm % thay đổi;
+dòng có p95 chậm hơn quá --threshold % được đánh dấu "!" và exit code là 1,
+để dùng được trong script so sánh giữa các commit.
+"""
+import argparse
+import json
+import sys
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "     -"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def compare(base: dict, new: dict, threshold: float) -> int:
+    for name, report in (("base", base), ("new", new)):
+        meta = report["meta"]
+        print(f"{name}: {meta['git_commit'] or '?'}{' (dirty)' if meta['git_dirty'] else ''} "
+              f"{meta['label']} {meta['started_at']} rss={report['peak_rss_mb']}MB")
+    print(f"{'endpoint':<26} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18} {'rps':>18}")
+    regressions = 0
+    rows = [(n, base["endpoints"].get(n), new["endpoints"].get(n)) for n in sorted(set(base["endpoints"]) | set(new["endpoints"]))]
+    for name, old, cur in [*rows, ("TOTAL", base["total"], new["total"])]:
+        if old is None or cur is None:
+            print(f"{name:<26} only in {'new' if old is None else 'base'}")
+            continue
+        cells = [f"{cur[k]:>9.2f} {_change(old[k], cur[k])}" for k in ("p50_ms", "p95_ms", "p99_ms", "rps")]
+        slower = old["p95_ms"] and (cur["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 > threshold
+        regressions += bool(slower)
+        print(f"{name:<26} {' '.join(cells)}{'  !' if slower else ''}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10, help="% p95 chậm hơn thì coi là regression")
+    args = parser.parse_args()
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    return compare(base, new, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
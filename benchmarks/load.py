@@ -0,0 +1,294 @@
+"""Concurrent load driver for every read endpoint of the gold and exchange routers.
+
+Chạy: python -m benchmarks.load [--concurrency 16] [--duration 30 | --requests 5000] [--warmup 3]
+                                [--prefix BX] [--cold] [--base-url http://localhost:8000] [--label ...]
+
+Mặc định app chạy trong cùng process qua httpx.ASGITransport (có lifespan, không
+socket); --base-url để đo một server thật. --concurrency worker cùng lấy request
+từ một bộ URL sinh ngẫu nhiên (theo --seed) trên các series có trong snapshot
+(chỉ series có mã --prefix nếu cho, ví dụ dữ liệu của benchmarks.seed):
+    gold.current    gold.chart (json / columnar / ohlc / msgpack / arrow, 7..3650 ngày)   gold.table
+    exchange.latest exchange.chart (central / market / index, như trên)                  exchange.table
+--cold xoá response cache trước mỗi request (chỉ in-process) để đo đường DB.
+
+In p50/p95/p99/mean/max (ms), throughput và peak RSS, rồi ghi JSON vào
+benchmarks/results/<git sha>-<label>.json để so sánh giữa các commit bằng
+python -m benchmarks.compare A.json B.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.registry import registry
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+CHART_DAYS = (7, 30, 90, 365, 1825, 3650)
+CHART_FORMATS = (
+    ("json", {}, {}),
+    ("columnar", {"format": "columnar"}, {}),
+    ("ohlc", {"ohlc": "true"}, {}),
+    ("msgpack", {}, {"Accept": "application/msgpack"}),
+    ("arrow", {}, {"Accept": "application/vnd.apache.arrow.stream"}),
+)
+TABLE_COUNTS = ("gold_prices", "exchange_market_rates", "financial_index_values", "exchange_central_rates")
+
+Request = Tuple[str, str, dict, dict]  # (endpoint, path, params, headers)
+
+
+def _series(prefix: Optional[str]) -> dict:
+    """Codes of every series that has a snapshot, optionally only those whose code starts with prefix."""
+    registry.refresh()
+    db = SessionLocal()
+    try:
+        gold = db.execute(text("SELECT gold_type_id, location_id, unit_id FROM gold_price_snapshots")).all()
+        exchange = db.execute(text("SELECT kind, series_id FROM exchange_snapshots")).all()
+        dataset = {
+            table: db.execute(text(f"SELECT count(*) FROM {table}")).scalar() for table in TABLE_COUNTS
+        }
+    finally:
+        db.close()
+
+    def keep(code: Optional[str]) -> bool:
+        return code is not None and (not prefix or code.lower().startswith(prefix.lower()))
+
+    series = {"gold": [], "central": [], "market": [], "index": [], "dataset": dataset}
+    for gt, loc, un in gold:
+        codes = (registry.gold_types.code_of(gt), registry.locations.code_of(loc), registry.units.code_of(un))
+        if all(keep(c) for c in codes):
+            series["gold"].append(codes)
+    for kind, series_id in exchange:
+        code = (registry.indexes if kind == "index" else registry.currencies).code_of(series_id)
+        if keep(code):
+            series[kind].append(code)
+    return series
+
+
+def _chart_variant(rng: random.Random) -> Tuple[str, dict, dict]:
+    name, params, headers = rng.choice(CHART_FORMATS)
+    return name, {**params, "days": rng.choice(CHART_DAYS)}, headers
+
+
+def _table_date(rng: random.Random, table_days: int) -> str:
+    return (date.today() - timedelta(days=rng.randrange(table_days))).isoformat()
+
+
+def build_requests(series: dict, count: int, seed: int, table_days: int) -> List[Request]:
+    """A reproducible, evenly mixed list of `count` requests over the six endpoints."""
+    rng = random.Random(seed)
+    kinds = [k for k in ("central", "market", "index") if series[k]]
+    makers: List[Callable[[], Request]] = []
+    if series["gold"]:
+        def gold_current():
+            gt, loc, un = rng.choice(series["gold"])
+            return "gold.current", "/api/v1/gold/current", {"gold_type": gt, "location": loc, "unit": un}, {}
+
+        def gold_chart():
+            picked = rng.sample(series["gold"], min(len(series["gold"]), rng.randint(1, 3)))
+            name, params, headers = _chart_variant(rng)
+            params.update({"gold_types": sorted({p[0] for p in picked}), "locations": sorted({p[1] for p in picked})})
+            return f"gold.chart.{name}", "/api/v1/gold/chart", params, headers
+
+        def gold_table():
+            return "gold.table", "/api/v1/gold/table", {"selected_date": _table_date(rng, table_days)}, {}
+
+        makers += [gold_current, gold_chart, gold_table]
+    if kinds:
+        def exchange_latest():
+            kind = rng.choice(kinds)
+            return "exchange.latest", "/api/v1/exchange/latest", {"type": kind, "code": rng.choice(series[kind])}, {}
+
+        def exchange_chart():
+            kind = rng.choice(kinds)
+            name, params, headers = _chart_variant(rng)
+            params.update({"type": kind, "code": rng.sample(series[kind], min(len(series[kind]), rng.randint(1, 3)))})
+            return f"exchange.chart.{name}", "/api/v1/exchange/chart", params, headers
+
+        def exchange_table():
+            kind = rng.choice(kinds)
+            return "exchange.table", "/api/v1/exchange/table", {"type": kind, "date": _table_date(rng, table_days)}, {}
+
+        makers += [exchange_latest, exchange_chart, exchange_table]
+    if not makers:
+        raise SystemExit("No series to request (run python -m benchmarks.seed first, or check --prefix)")
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    # Nearest-rank, đủ cho so sánh giữa các lần chạy
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: KB trên Linux, byte trên macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _drive(client: httpx.AsyncClient, requests: List[Request], concurrency: int, duration: Optional[float],
+                 cold: bool) -> Tuple[Dict[str, list], float]:
+    """Run the requests with `concurrency` workers; returns ({endpoint: [latencies, errors, statuses]}, elapsed)."""
+    from app.services.cached_service import invalidate_cache
+
+    results: Dict[str, list] = {}
+    position = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal position
+        while True:
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            elif position >= len(requests):
+                return
+            endpoint, path, params, headers = requests[position % len(requests)]
+            position += 1
+            if cold:
+                invalidate_cache()
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, params=params, headers=headers)
+                await response.aread()
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            entry = results.setdefault(endpoint, [[], 0, {}])
+            entry[2][str(status)] = entry[2].get(str(status), 0) + 1
+            if status == 200:
+                entry[0].append(elapsed)
+            else:
+                entry[1] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+async def run(args) -> dict:
+    series = await asyncio.to_thread(_series, args.prefix)
+    requests = build_requests(series, args.requests or 20000, args.seed, args.table_days)
+
+    async def measure(client):
+        if args.warmup:
+            await _drive(client, requests, args.concurrency, args.warmup, False)
+        return await _drive(client, requests, args.concurrency, None if args.requests else args.duration, args.cold)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            results, elapsed = await measure(client)
+    else:
+        from app.main import app
+
+        # Log mỗi request sẽ chiếm phần lớn thời gian đo
+        settings.request_log = args.request_log
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                results, elapsed = await measure(client)
+
+    endpoints = {
+        name: {**summarize(latencies, errors, elapsed), "statuses": statuses}
+        for name, (latencies, errors, statuses) in sorted(results.items())
+    }
+    all_latencies = [value for latencies, _, _ in results.values() for value in latencies]
+    return {
+        "meta": {
+            "label": args.label,
+            "git_commit": _git("rev-parse", "HEAD"),
+            "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "mode": args.base_url or "in-process",
+            "args": vars(args),
+            "dataset": {
+                **series["dataset"],
+                "gold_series": len(series["gold"]),
+                **{f"{kind}_series": len(series[kind]) for kind in ("central", "market", "index")},
+            },
+        },
+        "total": summarize(all_latencies, sum(errors for _, errors, _ in results.values()), elapsed),
+        "elapsed_seconds": round(elapsed, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict):
+    print(f"{'endpoint':<26} {'count':>7} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for name, r in [*report["endpoints"].items(), ("TOTAL", report["total"])]:
+        print(
+            f"{name:<26} {r['count']:>7} {r['errors']:>5} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}"
+        )
+    print(f"elapsed {report['elapsed_seconds']}s, peak RSS {report['peak_rss_mb']} MB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="Giây đo (bỏ qua nếu có --requests)")
+    parser.add_argument("--requests", type=int, default=None, help="Số request cố định thay cho --duration")
+    parser.add_argument("--warmup", type=float, default=3, help="Giây chạy trước khi đo (không tính)")
+    parser.add_argument("--prefix", default=None, help="Chỉ dùng series có mã bắt đầu bằng prefix")
+    parser.add_argument("--table-days", type=int, default=365, help="Ngày của /table chọn trong N ngày gần nhất")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cold", action="store_true", help="Xoá response cache trước mỗi request")
+    parser.add_argument("--base-url", default=None, help="Đo server thật thay vì app trong process")
+    parser.add_argument("--request-log", action="store_true", help="Giữ REQUEST_LOG khi chạy in-process")
+    parser.add_argument("--label", default="load")
+    parser.add_argument("--out", default=RESULTS_DIR, help="Thư mục ghi JSON kết quả")
+    args = parser.parse_args()
+    if args.cold and args.base_url:
+        parser.error("--cold chỉ dùng được khi chạy in-process")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    os.makedirs(args.out, exist_ok=True)
+    sha = (report["meta"]["git_commit"] or "nogit")[:10]
+    path = os.path.join(args.out, f"{sha}-{args.label}-{datetime.now():%Y%m%d%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Micro-benchmark: per-request cost of the exception middleware.
+
+Chạy: python -m benchmarks.middleware_overhead [--requests 20000] [--chunks 20000]
+
+So sánh ba cách dựng cùng một app FastAPI nhỏ (không chạm DB):
+    none        không có middleware
+    base_http   ExceptionMiddleware kiểu cũ (BaseHTTPMiddleware + try/except call_next)
+    asgi        app.middleware.error_handler.ExceptionMiddleware (ASGI thuần)
+Mỗi request được gọi thẳng qua giao diện ASGI (không socket, không server) nên
+chênh lệch đo được là chi phí của riêng middleware. In ra:
+    µs/request của GET /ping (JSON nhỏ), µs/chunk của một StreamingResponse
+    `--chunks` chunk, thời điểm nhận chunk đầu tiên của stream có độ trễ giữa
+    các chunk (stream có bị gom lại hay không), và kết quả map lỗi
+    (SQLAlchemyError -> 500 JSON) để chắc hai middleware trả cùng body.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.error_handler import ExceptionMiddleware, error_response
+
+
+class BaseHTTPExceptionMiddleware(BaseHTTPMiddleware):
+    # Cách cài cũ, giữ lại chỉ để so sánh
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as e:
+            return error_response(e)
+
+
+def _app(middleware) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "success"}
+
+    @app.get("/stream")
+    async def stream(n: int, delay: float = 0):
+        async def chunks():
+            for _ in range(n):
+                if delay:
+                    await asyncio.sleep(delay)
+                yield b"x" * 64
+
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    @app.get("/db-error")
+    async def db_error():
+        raise SQLAlchemyError("boom")
+
+    return app
+
+
+async def _call(app, path: str, query: str = ""):
+    """Run one request through the ASGI app; returns (status, [(t_received, body_chunk), ...])."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80), "root_path": "",
+    }
+    sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    status, chunks = None, []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append((time.perf_counter(), message.get("body", b"")))
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return status, chunks
+
+
+async def _bench(name: str, app, requests: int, n_chunks: int):
+    for _ in range(200):  # warm-up
+        await _call(app, "/ping")
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await _call(app, "/ping")
+    per_request = (time.perf_counter() - started) / requests * 1e6
+
+    started = time.perf_counter()
+    _, chunks = await _call(app, "/stream", f"n={n_chunks}")
+    per_chunk = (time.perf_counter() - started) / n_chunks * 1e6
+
+    started = time.perf_counter()
+    _, chunks = await _call(app, "/stream", "n=5&delay=0.05")
+    first_chunk_ms = (next(t for t, body in chunks if body) - started) * 1000
+
+    try:
+        status, chunks = await _call(app, "/db-error")
+        body = b"".join(body for _, body in chunks).decode()
+    except SQLAlchemyError as e:
+        # Không có middleware: ServerErrorMiddleware trả 500 text rồi raise lại
+        status, body = "raised", repr(e)
+    print(f"{name:<10} {per_request:>10.1f} {per_chunk:>10.2f} {first_chunk_ms:>14.1f}   {status} {body}")
+
+
+async def main(requests: int, n_chunks: int):
+    print(f"{'middleware':<10} {'µs/request':>10} {'µs/chunk':>10} {'first chunk ms':>14}   error mapping")
+    for name, middleware in (("none", None), ("base_http", BaseHTTPExceptionMiddleware), ("asgi", ExceptionMiddleware)):
+        await _bench(name, _app(middleware), requests, n_chunks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--chunks", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.chunks))
@@ -0,0 +1,141 @@
+"""Micro-benchmark: per-row cost of ORM entities vs column projections.
+
+Chạy: python -m benchmarks.projection_rows [--repeat 50]
+
+Đọc toàn bộ tick của mỗi bảng theo hai cách rồi đổi giá trị sang float như
+service vẫn làm:
+    entity      db.query(GoldPrice) ... float(p.sell_price)          (identity map + Decimal)
+    projection  repo.get_range / get_market_series / get_index_series (Row, float8 từ SQL)
+và in thời gian trung bình mỗi dòng (µs/row). Mỗi vòng dùng session mới để
+identity map không được tái sử dụng giữa các lần đo.
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from typing import Callable, Tuple
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.exchange import MarketExchangeRate, FinancialIndexValue
+from app.models.gold import GoldPrice
+from app.repository.exchange_repo import ExchangeRepository
+from app.repository.gold_repo import GoldPriceRepository
+from app.repository.query_utils import between_days
+
+
+def _time_per_row(read: Callable, repeat: int) -> Tuple[float, int]:
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            rows = read(db)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return (best / rows * 1e6 if rows else 0.0), rows
+
+
+def _cases(start: date, end: date):
+    # Hai cách đọc cùng một truy vấn theo từng series, chỉ khác phần SELECT
+    def gold_entities(db):
+        n = 0
+        for gt_id, loc_id, unit_id in db.query(GoldPrice.gold_type_id, GoldPrice.location_id, GoldPrice.unit_id).distinct():
+            for p in (
+                db.query(GoldPrice)
+                .filter(
+                    GoldPrice.gold_type_id == gt_id,
+                    GoldPrice.location_id == loc_id,
+                    GoldPrice.unit_id == unit_id,
+                    between_days(GoldPrice.timestamp, start, end),
+                )
+                .order_by(GoldPrice.timestamp)
+            ):
+                float(p.buy_price), float(p.sell_price), p.timestamp
+                n += 1
+        return n
+
+    def gold_projection(db):
+        repo = GoldPriceRepository(db)
+        n = 0
+        for key in db.query(GoldPrice.gold_type_id, GoldPrice.location_id, GoldPrice.unit_id).distinct():
+            for ts, buy, sell in repo.get_range(*key, start, end):
+                float(buy), float(sell), ts
+                n += 1
+        return n
+
+    def tick_entities(model, id_col, value_col):
+        def read(db):
+            n = 0
+            for (series_id,) in db.query(id_col).distinct():
+                for r in (
+                    db.query(model)
+                    .filter(id_col == series_id, between_days(model.timestamp, start, end))
+                    .order_by(model.timestamp)
+                ):
+                    float(getattr(r, value_col)), r.timestamp
+                    n += 1
+            return n
+        return read
+
+    def tick_projection(id_col, series):
+        def read(db):
+            n = 0
+            for (series_id,) in db.query(id_col).distinct():
+                for ts, value in series(ExchangeRepository(db), series_id, start, end):
+                    float(value), ts
+                    n += 1
+            return n
+        return read
+
+    return [
+        ("gold_prices", gold_entities, gold_projection),
+        (
+            "exchange_market_rates",
+            tick_entities(MarketExchangeRate, MarketExchangeRate.currency_id, "rate"),
+            tick_projection(MarketExchangeRate.currency_id, ExchangeRepository.get_market_series),
+        ),
+        (
+            "financial_index_values",
+            tick_entities(FinancialIndexValue, FinancialIndexValue.index_id, "value"),
+            tick_projection(FinancialIndexValue.index_id, ExchangeRepository.get_index_series),
+        ),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        first, last = db.query(func.min(GoldPrice.timestamp), func.max(GoldPrice.timestamp)).one()
+        for model in (MarketExchangeRate, FinancialIndexValue):
+            lo, hi = db.query(func.min(model.timestamp), func.max(model.timestamp)).one()
+            first = min(filter(None, (first, lo)), default=None)
+            last = max(filter(None, (last, hi)), default=None)
+    finally:
+        db.close()
+    if first is None:
+        print("No tick data")
+        return 1
+
+    print(f"{'table':<24}{'rows':>8}{'entity µs/row':>16}{'projection µs/row':>20}{'speedup':>10}")
+    for table, entities, projection in _cases(first.date(), last.date()):
+        entity_cost, rows = _time_per_row(entities, args.repeat)
+        projection_cost, projected = _time_per_row(projection, args.repeat)
+        if rows != projected:
+            print(f"{table}: row count mismatch ({rows} vs {projected})")
+            return 1
+        speedup = entity_cost / projection_cost if projection_cost else 0.0
+        print(f"{table:<24}{rows:>8}{entity_cost:>16.2f}{projection_cost:>20.2f}{speedup:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
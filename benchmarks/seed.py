@@ -0,0 +1,243 @@
+"""Seed the configured Postgres with reproducible synthetic market history.
+
+Chạy: python -m benchmarks.seed [--currencies 50] [--indexes 20] [--gold-types 10 --locations 3 --units 1]
+                                [--years 1] [--interval-minutes 60] [--seed 42] [--drop]
+
+Tạo dimension có mã bắt đầu bằng --prefix (mặc định "BX": currency BX001, index
+BXI01, gold type bx-gt01, location bx-loc1, unit bx-u1) rồi nạp bằng COPY:
+    gold_prices              mỗi (gold_type, location, unit) một tick mỗi --interval-minutes
+    exchange_market_rates    mỗi currency một tick mỗi --interval-minutes (source "bench")
+    financial_index_values   mỗi index một tick mỗi --interval-minutes (source "bench")
+    exchange_central_rates   mỗi currency một giá trị mỗi ngày
+Giá là random walk sinh từ --seed nên hai lần chạy cùng tham số cho cùng dữ liệu.
+Sau khi nạp: tạo partition tháng còn thiếu, ANALYZE, dựng lại snapshot và rollup.
+
+Cấu hình của yêu cầu gốc (50 currency, 20 index, 30 series vàng, tick mỗi phút
+trong 10 năm) là --years 10 --interval-minutes 1, khoảng 526 triệu dòng; mặc định
+nhỏ hơn (1 năm, mỗi giờ, ~880 nghìn dòng) để chạy được trên máy dev.
+
+--drop xoá toàn bộ dữ liệu có mã --prefix (không nạp lại nếu kèm --only-drop).
+"""
+import argparse
+import io
+import math
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.jobs.refresh_snapshots import refresh_all
+from app.jobs.rollup import refresh_rollups
+from app.repository.partition_repo import PartitionRepository, PARTITIONED_TABLES
+
+# Biến động mỗi tick của random walk (log-return) và giá khởi điểm
+TICK_VOLATILITY = 0.0008
+GOLD_START = 80_000_000.0
+GOLD_SPREAD = 2_000_000.0
+RATE_START = 25_000.0
+INDEX_START = 1_200.0
+
+
+class _LineReader(io.RawIOBase):
+    """File-like view of an iterator of text lines, for COPY ... FROM STDIN without buffering everything."""
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines).encode("utf-8")
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def _walk(rng: random.Random, start: float, steps: int) -> Iterator[float]:
+    value = start * math.exp(rng.gauss(0, 0.1))
+    for _ in range(steps):
+        value *= math.exp(rng.gauss(0, TICK_VOLATILITY))
+        yield value
+
+
+def _timestamps(start: datetime, steps: int, interval: timedelta) -> Iterator[datetime]:
+    for i in range(steps):
+        yield start + i * interval
+
+
+def _copy(table: str, columns: List[str], lines: Iterator[str]) -> int:
+    counter = {"rows": 0}
+
+    def counted():
+        for line in lines:
+            counter["rows"] += 1
+            yield line
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", _LineReader(counted()))
+        raw.commit()
+    finally:
+        raw.close()
+    return counter["rows"]
+
+
+def _insert_dims(db, table: str, rows: List[dict]) -> List[int]:
+    columns = list(rows[0])
+    # Dữ liệu nạp tay với id cố định không đẩy sequence lên; đồng bộ lại trước khi dùng nextval
+    db.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT max(id) FROM {table}), 1))"
+    ))
+    ids = []
+    for row in rows:
+        ids.append(db.execute(
+            text(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+                f"ON CONFLICT (code) DO UPDATE SET code = EXCLUDED.code RETURNING id"
+            ),
+            row,
+        ).scalar())
+    return ids
+
+
+def drop(prefix: str):
+    """Delete every synthetic series (and its dimensions) whose code starts with `prefix`."""
+    like = {"currency": f"{prefix}%", "gold": f"{prefix.lower()}-%"}
+    statements = [
+        "DELETE FROM gold_prices WHERE gold_type_id IN (SELECT id FROM gold_types WHERE code LIKE :gold)",
+        "DELETE FROM gold_price_snapshots WHERE gold_type_id IN (SELECT id FROM gold_types WHERE code LIKE :gold)",
+        "DELETE FROM gold_price_daily WHERE gold_type_id IN (SELECT id FROM gold_types WHERE code LIKE :gold)",
+        "DELETE FROM exchange_market_rates WHERE currency_id IN (SELECT id FROM currency WHERE code LIKE :currency)",
+        "DELETE FROM exchange_market_daily WHERE currency_id IN (SELECT id FROM currency WHERE code LIKE :currency)",
+        "DELETE FROM exchange_central_rates WHERE currency_id IN (SELECT id FROM currency WHERE code LIKE :currency)",
+        "DELETE FROM financial_index_values WHERE index_id IN (SELECT id FROM financial_index WHERE code LIKE :currency)",
+        "DELETE FROM financial_index_daily WHERE index_id IN (SELECT id FROM financial_index WHERE code LIKE :currency)",
+        """DELETE FROM exchange_snapshots WHERE (kind IN ('central', 'market') AND series_id IN
+            (SELECT id FROM currency WHERE code LIKE :currency)) OR (kind = 'index' AND series_id IN
+            (SELECT id FROM financial_index WHERE code LIKE :currency))""",
+        "DELETE FROM gold_types WHERE code LIKE :gold",
+        "DELETE FROM locations WHERE code LIKE :gold",
+        "DELETE FROM units WHERE code LIKE :gold",
+        "DELETE FROM currency WHERE code LIKE :currency",
+        "DELETE FROM financial_index WHERE code LIKE :currency",
+    ]
+    db = SessionLocal()
+    try:
+        for sql in statements:
+            db.execute(text(sql), like)
+        db.commit()
+    finally:
+        db.close()
+
+
+def seed(args) -> dict:
+    rng = random.Random(args.seed)
+    interval = timedelta(minutes=args.interval_minutes)
+    end = datetime.combine(date.today(), datetime.min.time())
+    start = end - timedelta(days=round(365.25 * args.years))
+    steps = int((end - start) / interval)
+    days = (end - start).days
+    p, g = args.prefix, args.prefix.lower()
+
+    db = SessionLocal()
+    try:
+        currency_ids = _insert_dims(db, "currency", [{"code": f"{p}{i:03d}"} for i in range(1, args.currencies + 1)])
+        index_ids = _insert_dims(db, "financial_index", [{"code": f"{p}I{i:02d}"} for i in range(1, args.indexes + 1)])
+        gold_type_ids = _insert_dims(db, "gold_types", [
+            {"code": f"{g}-gt{i:02d}", "name": f"Bench {i}", "source": "bench"} for i in range(1, args.gold_types + 1)
+        ])
+        location_ids = _insert_dims(db, "locations", [
+            {"code": f"{g}-loc{i}", "name": f"Bench {i}"} for i in range(1, args.locations + 1)
+        ])
+        unit_ids = _insert_dims(db, "units", [{"code": f"{g}-u{i}", "name": f"Bench {i}"} for i in range(1, args.units + 1)])
+        partitions = PartitionRepository(db)
+        for table in PARTITIONED_TABLES:
+            partitions.ensure_months(table, start.date(), end.date())
+        db.commit()
+    finally:
+        db.close()
+
+    def gold_lines():
+        for gt in gold_type_ids:
+            for loc in location_ids:
+                for un in unit_ids:
+                    for ts, sell in zip(_timestamps(start, steps, interval), _walk(rng, GOLD_START, steps)):
+                        sell = round(sell, -3)
+                        yield f"{ts},{gt},{loc},{un},{sell - GOLD_SPREAD:.0f},{sell:.0f}\n"
+
+    def market_lines():
+        for cid in currency_ids:
+            for ts, rate in zip(_timestamps(start, steps, interval), _walk(rng, RATE_START, steps)):
+                yield f"{cid},{ts},bench,transfer,{rate:.4f}\n"
+
+    def index_lines():
+        for iid in index_ids:
+            for ts, value in zip(_timestamps(start, steps, interval), _walk(rng, INDEX_START, steps)):
+                yield f"{iid},{ts},bench,{value:.4f}\n"
+
+    def central_lines():
+        for cid in currency_ids:
+            for i, rate in enumerate(_walk(rng, RATE_START, days)):
+                day = start.date() + timedelta(days=i)
+                yield f"{cid},{day},{rate:.4f},{day} 08:00:00\n"
+
+    counts = {}
+    for table, columns, lines in (
+        ("gold_prices", ["timestamp", "gold_type_id", "location_id", "unit_id", "buy_price", "sell_price"], gold_lines()),
+        ("exchange_market_rates", ["currency_id", "timestamp", "source", "type", "rate"], market_lines()),
+        ("financial_index_values", ["index_id", "timestamp", "source", "value"], index_lines()),
+        ("exchange_central_rates", ["currency_id", "date", "rate", "published_at"], central_lines()),
+    ):
+        started = time.perf_counter()
+        counts[table] = _copy(table, columns, lines)
+        print(f"{table:<24} {counts[table]:>12,} rows  {time.perf_counter() - started:8.1f}s", flush=True)
+
+    with engine.connect() as conn:
+        for table in counts:
+            conn.exec_driver_sql(f"ANALYZE {table}")
+        conn.commit()
+    refresh_all()
+    refresh_rollups(full=True)
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prefix", default="BX")
+    parser.add_argument("--currencies", type=int, default=50)
+    parser.add_argument("--indexes", type=int, default=20)
+    parser.add_argument("--gold-types", type=int, default=10)
+    parser.add_argument("--locations", type=int, default=3)
+    parser.add_argument("--units", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--interval-minutes", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="Xoá dữ liệu --prefix trước khi nạp")
+    parser.add_argument("--only-drop", action="store_true", help="Chỉ xoá, không nạp")
+    args = parser.parse_args()
+
+    if args.drop or args.only_drop:
+        drop(args.prefix)
+        print(f"Dropped synthetic data with prefix {args.prefix}")
+    if args.only_drop:
+        return 0
+    started = time.perf_counter()
+    counts = seed(args)
+    print(f"Seeded {sum(counts.values()):,} rows in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -36,16 +36,27 @@ if config.config_file_name is not None:
 # --- Import models' metadata ---
 from app.models.gold import Base as GoldBase
 from app.models.exchange import Base as ExchangeBase
+from app.models.rollup import Base as RollupBase
 
 # Merge metadata từ nhiều Base
 metadata = MetaData()
-for m in (GoldBase.metadata, ExchangeBase.metadata):
+for m in (GoldBase.metadata, ExchangeBase.metadata, RollupBase.metadata):
     for t in m.tables.values():
         if t.name not in metadata.tables:
             t.tometadata(metadata)
 
 target_metadata = metadata
 
+from app.repository.partition_repo import parent_table
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Partition theo tháng (gold_prices_p202610, ...) do app.jobs.partitions quản lý, không thuộc model
+    table_name = name if type_ == "table" else getattr(getattr(object, "table", None), "name", None)
+    if reflected and table_name and parent_table(table_name) != table_name:
+        return False
+    return True
+
 # Debug: In URL (mask password)
 try:
     from sqlalchemy.engine.url import make_url
@@ -62,6 +73,7 @@ def run_migrations_offline():
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -77,7 +89,7 @@ def run_migrations_online():
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
         with context.begin_transaction():
             context.run_migrations()
 
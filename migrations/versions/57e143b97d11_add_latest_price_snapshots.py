@@ -0,0 +1,61 @@
+"""add latest price snapshots
+
+Revision ID: 57e143b97d11
+Revises: 56bd6ae6b120
+Create Date: 2026-10-18 09:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '57e143b97d11'
+down_revision: Union[str, Sequence[str], None] = '56bd6ae6b120'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('gold_price_snapshots',
+    sa.Column('gold_type_id', sa.Integer(), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('unit_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('buy_price', sa.Numeric(), nullable=False),
+    sa.Column('sell_price', sa.Numeric(), nullable=False),
+    sa.Column('prev_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('prev_buy_price', sa.Numeric(), nullable=True),
+    sa.Column('prev_sell_price', sa.Numeric(), nullable=True),
+    sa.Column('delta_buy', sa.Float(), nullable=True),
+    sa.Column('delta_sell', sa.Float(), nullable=True),
+    sa.Column('delta_buy_percent', sa.Float(), nullable=True),
+    sa.Column('delta_sell_percent', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['gold_type_id'], ['gold_types.id'], ),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+    sa.ForeignKeyConstraint(['unit_id'], ['units.id'], ),
+    sa.PrimaryKeyConstraint('gold_type_id', 'location_id', 'unit_id')
+    )
+    op.create_table('exchange_snapshots',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('series_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.Column('prev_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('prev_value', sa.Float(), nullable=True),
+    sa.Column('delta', sa.Float(), nullable=True),
+    sa.Column('delta_percent', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'series_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('exchange_snapshots')
+    op.drop_table('gold_price_snapshots')
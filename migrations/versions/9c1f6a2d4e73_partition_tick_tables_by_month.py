@@ -0,0 +1,134 @@
+"""partition tick tables by month
+
+Revision ID: 9c1f6a2d4e73
+Revises: d8acd5bff2fe
+Create Date: 2026-10-18 12:05:31.402117
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1f6a2d4e73'
+down_revision: Union[str, Sequence[str], None] = 'd8acd5bff2fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Số tháng tương lai tạo sẵn partition; phần còn lại do app.jobs.partitions tạo dần
+MONTHS_AHEAD = 3
+
+
+def _add_months(d, months):
+    m = d.year * 12 + d.month - 1 + months
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def _columns(table):
+    if table == 'gold_prices':
+        return [
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('buy_price', sa.Numeric(), nullable=False),
+            sa.Column('sell_price', sa.Numeric(), nullable=False),
+            sa.Column('gold_type_id', sa.Integer(), nullable=False),
+            sa.Column('unit_id', sa.Integer(), nullable=False),
+            sa.Column('location_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['gold_type_id'], ['gold_types.id'], ),
+            sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+            sa.ForeignKeyConstraint(['unit_id'], ['units.id'], ),
+            sa.PrimaryKeyConstraint('timestamp', 'gold_type_id', 'unit_id', 'location_id', name='gold_price_pk'),
+        ]
+    if table == 'exchange_market_rates':
+        return [
+            sa.Column('currency_id', sa.Integer(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('source', sa.String(), nullable=False),
+            sa.Column('type', sa.String(), nullable=False),
+            sa.Column('rate', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['currency_id'], ['currency.id'], ),
+            sa.PrimaryKeyConstraint('currency_id', 'timestamp', 'source', 'type'),
+        ]
+    return [
+        sa.Column('index_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['index_id'], ['financial_index.id'], ),
+        sa.PrimaryKeyConstraint('index_id', 'timestamp', 'source'),
+    ]
+
+
+# index phụ (ngoài PK) của từng bảng: (tên, cột)
+_INDEXES = {
+    'gold_prices': [],
+    'exchange_market_rates': [
+        ('ix_exchange_market_rates_currency_id', 'currency_id'),
+        ('ix_exchange_market_rates_source', 'source'),
+        ('ix_exchange_market_rates_timestamp', 'timestamp'),
+    ],
+    'financial_index_values': [
+        ('ix_financial_index_values_index_id', 'index_id'),
+        ('ix_financial_index_values_source', 'source'),
+        ('ix_financial_index_values_timestamp', 'timestamp'),
+    ],
+}
+
+_PK_NAMES = {
+    'gold_prices': 'gold_price_pk',
+    'exchange_market_rates': 'exchange_market_rates_pkey',
+    'financial_index_values': 'financial_index_values_pkey',
+}
+
+
+def _rename_old(table):
+    op.rename_table(table, f'{table}_old')
+    for name in [_PK_NAMES[table]] + [n for n, _ in _INDEXES[table]]:
+        op.execute(f'ALTER INDEX {name} RENAME TO {name}_old')
+    # Giữ tên FK mặc định ({table}_{column}_fkey) cho bảng mới
+    for fk in _columns(table):
+        if isinstance(fk, sa.ForeignKeyConstraint):
+            name = f'{table}_{fk.column_keys[0]}_fkey'
+            op.execute(f'ALTER TABLE {table}_old RENAME CONSTRAINT {name} TO {name}_old')
+
+
+def _create(table, **kw):
+    op.create_table(table, *_columns(table), **kw)
+    for name, column in _INDEXES[table]:
+        op.create_index(name, table, [column], unique=False)
+
+
+def _copy_and_drop_old(table):
+    names = ', '.join(f'"{c.name}"' for c in _columns(table) if isinstance(c, sa.Column))
+    op.execute(f'INSERT INTO {table} ({names}) SELECT {names} FROM {table}_old')
+    op.drop_table(f'{table}_old')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    this_month = date.today().replace(day=1)
+    for table in _INDEXES:
+        first, last = bind.execute(sa.text(f'SELECT min("timestamp"), max("timestamp") FROM {table}')).one()
+        month = first.date().replace(day=1) if first else this_month
+        last_month = max(_add_months(this_month, MONTHS_AHEAD), last.date().replace(day=1) if last else this_month)
+        _rename_old(table)
+        _create(table, postgresql_partition_by='RANGE ("timestamp")')
+        while month <= last_month:
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            )
+            month = _add_months(month, 1)
+        _copy_and_drop_old(table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _INDEXES:
+        # Partition đã detach (archive) không được gộp lại
+        _rename_old(table)
+        _create(table)
+        _copy_and_drop_old(table)
@@ -0,0 +1,77 @@
+"""covering indexes for series queries
+
+Revision ID: b3e7d1c94a52
+Revises: 9c1f6a2d4e73
+Create Date: 2026-10-18 13:02:11.284530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7d1c94a52'
+down_revision: Union[str, Sequence[str], None] = '9c1f6a2d4e73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Query nóng đều lọc theo key của series rồi theo thời gian (latest / ngày trước / khoảng ngày),
+# nên PK xếp (key..., thời gian) và INCLUDE cột giá trị để đọc được bằng Index Only Scan.
+# Query quét cả ngày cho mọi series (/table, rollup) dùng index riêng trên cột thời gian.
+# Đổi PK trên bảng partition giữ ACCESS EXCLUSIVE và build lại index của mọi partition.
+# (bảng, tên PK, PK cũ, PK mới, INCLUDE)
+_PRIMARY_KEYS = [
+    ('gold_prices', 'gold_price_pk',
+     ['timestamp', 'gold_type_id', 'unit_id', 'location_id'],
+     ['gold_type_id', 'location_id', 'unit_id', 'timestamp'],
+     ['buy_price', 'sell_price']),
+    ('exchange_market_rates', 'exchange_market_rates_pkey',
+     ['currency_id', 'timestamp', 'source', 'type'],
+     ['currency_id', 'timestamp', 'source', 'type'],
+     ['rate']),
+    ('financial_index_values', 'financial_index_values_pkey',
+     ['index_id', 'timestamp', 'source'],
+     ['index_id', 'timestamp', 'source'],
+     ['value']),
+    ('exchange_central_rates', 'exchange_central_rates_pkey',
+     ['currency_id', 'date'],
+     ['currency_id', 'date'],
+     ['rate', 'published_at']),
+]
+
+# Index một cột thừa: cột đầu của PK (currency_id, index_id) hoặc không query nào lọc riêng (source)
+_REDUNDANT = [
+    ('ix_exchange_market_rates_currency_id', 'exchange_market_rates', 'currency_id'),
+    ('ix_exchange_market_rates_source', 'exchange_market_rates', 'source'),
+    ('ix_financial_index_values_index_id', 'financial_index_values', 'index_id'),
+    ('ix_financial_index_values_source', 'financial_index_values', 'source'),
+    ('ix_exchange_central_rates_currency_id', 'exchange_central_rates', 'currency_id'),
+]
+
+
+def _replace_pk(table, name, columns, include=None):
+    # op.create_primary_key không nhận INCLUDE
+    op.drop_constraint(name, table, type_='primary')
+    columns = ', '.join(f'"{c}"' for c in columns)
+    include = f" INCLUDE ({', '.join(include)})" if include else ''
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} PRIMARY KEY ({columns}){include}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, name, _, columns, include in _PRIMARY_KEYS:
+        _replace_pk(table, name, columns, include)
+    # gold_prices trước đây dùng PK (timestamp, ...) cho các query quét theo ngày
+    op.create_index(op.f('ix_gold_prices_timestamp'), 'gold_prices', ['timestamp'], unique=False)
+    for name, table, _ in _REDUNDANT:
+        op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, column in _REDUNDANT:
+        op.create_index(name, table, [column], unique=False)
+    op.drop_index(op.f('ix_gold_prices_timestamp'), table_name='gold_prices')
+    for table, name, columns, _, _ in _PRIMARY_KEYS:
+        _replace_pk(table, name, columns)
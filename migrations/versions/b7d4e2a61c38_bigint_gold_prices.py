@@ -0,0 +1,48 @@
+"""bigint gold prices
+
+Revision ID: b7d4e2a61c38
+Revises:
+Depends on: b3e7d1c94a52
+Create Date: 2026-10-18 13:41:27.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e2a61c38'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = ('gold_bigint',)
+depends_on: Union[str, Sequence[str], None] = 'b3e7d1c94a52'
+
+# Nhánh tuỳ chọn "gold_bigint", tách khỏi nhánh chính "market": chỉ chạy khi được gọi rõ
+# (alembic upgrade gold_bigint@head, bỏ bằng alembic downgrade gold_bigint@base), không
+# phụ thuộc cấu hình. Bật nhánh này thì đặt GOLD_PRICE_STORAGE=bigint cho GoldPriceType.
+# ALTER TYPE viết lại mọi partition và build lại PK (INCLUDE giá) dưới ACCESS EXCLUSIVE.
+_COLUMNS = ('buy_price', 'sell_price')
+
+
+def _alter(type_):
+    op.execute('ALTER TABLE gold_prices ' + ', '.join(
+        f'ALTER COLUMN {c} TYPE {type_} USING {c}::{type_}' for c in _COLUMNS
+    ))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Giá VND là số nguyên; không làm tròn ngầm dữ liệu đang có
+    fractional = bind.execute(sa.text(
+        "SELECT count(*) FROM gold_prices WHERE buy_price <> trunc(buy_price) OR sell_price <> trunc(sell_price)"
+    )).scalar()
+    if fractional:
+        raise RuntimeError(f"{fractional} gold_prices rows have fractional prices, cannot store them as BIGINT")
+    _alter('bigint')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _alter('numeric')
@@ -0,0 +1,77 @@
+"""add daily rollup tables
+
+Revision ID: d8acd5bff2fe
+Revises: 57e143b97d11
+Create Date: 2026-10-18 11:47:50.775783
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8acd5bff2fe'
+down_revision: Union[str, Sequence[str], None] = '57e143b97d11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rollup_watermarks',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.create_table('exchange_market_daily',
+    sa.Column('currency_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+    sa.Column('tick_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['currency_id'], ['currency.id'], ),
+    sa.PrimaryKeyConstraint('currency_id', 'day')
+    )
+    op.create_table('financial_index_daily',
+    sa.Column('index_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+    sa.Column('tick_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['index_id'], ['financial_index.id'], ),
+    sa.PrimaryKeyConstraint('index_id', 'day')
+    )
+    op.create_table('gold_price_daily',
+    sa.Column('gold_type_id', sa.Integer(), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('unit_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open', sa.Numeric(), nullable=False),
+    sa.Column('high', sa.Numeric(), nullable=False),
+    sa.Column('low', sa.Numeric(), nullable=False),
+    sa.Column('close', sa.Numeric(), nullable=False),
+    sa.Column('buy_close', sa.Numeric(), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+    sa.Column('tick_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['gold_type_id'], ['gold_types.id'], ),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+    sa.ForeignKeyConstraint(['unit_id'], ['units.id'], ),
+    sa.PrimaryKeyConstraint('gold_type_id', 'location_id', 'unit_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('gold_price_daily')
+    op.drop_table('financial_index_daily')
+    op.drop_table('exchange_market_daily')
+    op.drop_table('rollup_watermarks')
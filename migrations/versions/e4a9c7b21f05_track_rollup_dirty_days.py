@@ -0,0 +1,72 @@
+"""track rollup dirty days
+
+Revision ID: e4a9c7b21f05
+Revises: b3e7d1c94a52
+Create Date: 2026-10-18 15:06:42.318907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c7b21f05'
+down_revision: Union[str, Sequence[str], None] = 'b3e7d1c94a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Trigger FOR EACH STATEMENT trên bảng cha partition (transition table): mỗi câu INSERT/UPDATE/
+# DELETE/COPY ghi một lần các ngày bị chạm vào rollup_dirty_days, gồm cả dòng đi vào partition
+# tạo sau này. Không bắt được câu ghi thẳng vào tên partition (gold_prices_p202610).
+_TICK_TABLES = ('gold_prices', 'exchange_market_rates', 'financial_index_values')
+
+_MARK_FUNCTION = """
+CREATE FUNCTION mark_rollup_dirty_days() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO rollup_dirty_days (table_name, day)
+        SELECT DISTINCT TG_TABLE_NAME, CAST(timestamp AS date) FROM new_rows
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO rollup_dirty_days (table_name, day)
+        SELECT DISTINCT TG_TABLE_NAME, CAST(timestamp AS date) FROM old_rows
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+_TRIGGERS = (
+    ('insert', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('delete', 'DELETE', 'OLD TABLE AS old_rows'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rollup_dirty_days',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name', 'day')
+    )
+    op.execute(_MARK_FUNCTION)
+    for table in _TICK_TABLES:
+        for name, event, referencing in _TRIGGERS:
+            op.execute(
+                f'CREATE TRIGGER {table}_rollup_dirty_{name} AFTER {event} ON {table} '
+                f'REFERENCING {referencing} FOR EACH STATEMENT EXECUTE FUNCTION mark_rollup_dirty_days()'
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _TICK_TABLES:
+        for name, _, _ in _TRIGGERS:
+            op.execute(f'DROP TRIGGER {table}_rollup_dirty_{name} ON {table}')
+    op.execute('DROP FUNCTION mark_rollup_dirty_days()')
+    op.drop_table('rollup_dirty_days')
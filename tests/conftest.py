@@ -0,0 +1,47 @@
+"""Shared fixtures: the tests run against a migrated PostgreSQL (market@head).
+
+DATABASE_URL (như Alembic) trỏ tới database đó; chưa đặt thì các test cần DB được bỏ qua.
+App kết nối qua POSTGRES_* (app.config), nên hai cấu hình phải cùng một database.
+"""
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def db():
+    """Session whose changes are rolled back after the test."""
+    if not os.environ.get("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def capture(db):
+    """Context manager collecting (statement, parameters) of every SQL executed on the session's engine."""
+    engine = db.get_bind()
+
+    @contextmanager
+    def _capture():
+        captured = []
+
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            if not statement.lstrip().upper().startswith("EXPLAIN"):
+                captured.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", _before)
+        try:
+            yield captured
+        finally:
+            event.remove(engine, "before_cursor_execute", _before)
+
+    return _capture
@@ -0,0 +1,225 @@
+"""Index usage, partition pruning and index-only checks for the hot repository queries.
+
+Gọi các query nóng qua repository trên dữ liệu đang có trong DB, EXPLAIN từng câu SQL
+phát sinh và kiểm tra: bảng tick không bị Seq Scan (predicate dùng được index, vd.
+không còn func.date(timestamp) == d), query theo khoảng ngày chỉ đọc các partition
+khoảng đó trải qua, và query theo một series chỉ dùng cột nằm trong PK (có INCLUDE)
+nên đọc được bằng Index Only Scan.
+"""
+import json
+import re
+from datetime import timedelta
+from typing import Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.repository.partition_repo import parent_table
+
+TICK_TABLES = ("gold_prices", "exchange_market_rates", "financial_index_values")
+# Bảng có PK phủ (INCLUDE cột giá trị) cho query theo series
+COVERED_TABLES = TICK_TABLES + ("exchange_central_rates",)
+# Query nóng nhất trải tối đa ~31 ngày, tức là tối đa 2 partition tháng
+MAX_PARTITIONS = 2
+
+
+def explain(db: Session, statement: str, parameters=None) -> dict:
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (VERBOSE, FORMAT JSON) {statement}", parameters or {}).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def seq_scanned_tables(plan: dict, tables=TICK_TABLES) -> List[str]:
+    # Bảng tick đã partition: quy tên partition về bảng cha
+    return [
+        parent_table(n["Relation Name"])
+        for n in plan_nodes(plan)
+        if n["Node Type"] == "Seq Scan" and parent_table(n.get("Relation Name", "")) in tables
+    ]
+
+
+def scanned_partitions(plan: dict) -> List[str]:
+    """Names of the tick-table partitions a plan still reads after pruning."""
+    return sorted({
+        n["Relation Name"]
+        for n in plan_nodes(plan)
+        if n.get("Relation Name") and parent_table(n["Relation Name"]) != n["Relation Name"]
+    })
+
+
+def primary_key_columns(db: Session, table: str) -> set:
+    """Key and INCLUDE columns of the table's primary key."""
+    return set(db.connection().exec_driver_sql(
+        "SELECT a.attname FROM pg_index i"
+        " JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)"
+        " WHERE i.indrelid = CAST(%(table)s AS regclass) AND i.indisprimary",
+        {"table": table},
+    ).scalars())
+
+
+def uncovered_columns(plan: dict, covering: dict) -> List[Tuple[str, str]]:
+    """(table, column) pairs a plan reads or filters on that are outside `covering[table]`."""
+    failures = set()
+    for n in plan_nodes(plan):
+        table = parent_table(n.get("Relation Name", ""))
+        if table not in covering:
+            continue
+        # EXPLAIN VERBOSE ghi cột dạng alias.col hoặc alias."col" trong Output và các điều kiện
+        text = " ".join(n.get("Output", []) + [n.get(k, "") for k in ("Index Cond", "Filter", "Recheck Cond")])
+        columns = set(re.findall(rf'\b{re.escape(n["Alias"])}\."?(\w+)"?', text))
+        failures.update((table, column) for column in columns - covering[table])
+    return sorted(failures)
+
+
+def _hot_queries(db: Session):
+    from app.models.exchange import MarketExchangeRate, FinancialIndexValue
+    from app.models.gold import GoldPrice
+    from app.repository.exchange_repo import ExchangeRepository
+    from app.repository.gold_repo import GoldPriceRepository
+
+    gold = GoldPriceRepository(db)
+    exchange = ExchangeRepository(db)
+    gold_ts = db.query(func.max(GoldPrice.timestamp)).scalar()
+    market_ts = db.query(func.max(MarketExchangeRate.timestamp)).scalar()
+    index_ts = db.query(func.max(FinancialIndexValue.timestamp)).scalar()
+
+    if gold_ts:
+        p = db.query(GoldPrice).filter(GoldPrice.timestamp == gold_ts).first()
+        yield "gold.get_latest_group_by_key", lambda: gold.get_latest_group_by_key(
+            gold_ts.date() - timedelta(days=1), gold_ts.date()
+        )
+        yield "gold.get_latest_of_previous_day", lambda: gold.get_latest_of_previous_day(
+            p.gold_type_id, p.location_id, p.unit_id, gold_ts
+        )
+        yield "gold.get_daily_range", lambda: gold.get_daily_range(
+            [p.gold_type_id], [p.location_id], gold_ts.date() - timedelta(days=30), gold_ts.date()
+        )
+    if market_ts:
+        r = db.query(MarketExchangeRate).filter(MarketExchangeRate.timestamp == market_ts).first()
+        yield "exchange.get_market_daily_range", lambda: exchange.get_market_daily_range(
+            None, market_ts.date() - timedelta(days=1), market_ts.date()
+        )
+        yield "exchange.get_latest_of_prev_day_market", lambda: exchange.get_latest_of_prev_day_market(
+            r.currency_id, market_ts
+        )
+    if index_ts:
+        v = db.query(FinancialIndexValue).filter(FinancialIndexValue.timestamp == index_ts).first()
+        yield "exchange.get_index_daily_range", lambda: exchange.get_index_daily_range(
+            None, index_ts.date() - timedelta(days=1), index_ts.date()
+        )
+        yield "exchange.get_latest_of_prev_day_index", lambda: exchange.get_latest_of_prev_day_index(
+            v.index_id, index_ts
+        )
+
+
+def _series_queries(db: Session):
+    # Query đọc một series theo key + thời gian; query quét cả ngày cho mọi series nằm ở _hot_queries
+    from app.models.exchange import CentralExchangeRate, MarketExchangeRate, FinancialIndexValue
+    from app.models.gold import GoldPrice
+    from app.repository.exchange_repo import ExchangeRepository
+    from app.repository.gold_repo import GoldPriceRepository
+
+    gold = GoldPriceRepository(db)
+    exchange = ExchangeRepository(db)
+    p = db.query(GoldPrice).order_by(GoldPrice.timestamp.desc()).first()
+    r = db.query(MarketExchangeRate).order_by(MarketExchangeRate.timestamp.desc()).first()
+    v = db.query(FinancialIndexValue).order_by(FinancialIndexValue.timestamp.desc()).first()
+    c = db.query(CentralExchangeRate).order_by(CentralExchangeRate.date.desc()).first()
+
+    if p:
+        key, ts = (p.gold_type_id, p.location_id, p.unit_id), p.timestamp
+        yield "gold.get_latest", lambda: gold.get_latest(*key)
+        yield "gold.get_latest_of_previous_day", lambda: gold.get_latest_of_previous_day(*key, ts)
+        yield "gold.get_latest_before", lambda: gold.get_latest_before(*key, ts)
+        yield "gold.get_range", lambda: gold.get_range(*key, ts.date() - timedelta(days=30), ts.date())
+        yield "gold.get_daily_range", lambda: gold.get_daily_range(
+            [p.gold_type_id], [p.location_id], ts.date() - timedelta(days=30), ts.date(), ohlc=True
+        )
+    if r:
+        yield "exchange.get_latest_market", lambda: exchange.get_latest_market(r.currency_id)
+        yield "exchange.get_prev_market", lambda: exchange.get_prev_market(r.currency_id, r.timestamp)
+        yield "exchange.get_latest_of_prev_day_market", lambda: exchange.get_latest_of_prev_day_market(
+            r.currency_id, r.timestamp
+        )
+        yield "exchange.get_market_series", lambda: exchange.get_market_series(
+            r.currency_id, r.timestamp.date() - timedelta(days=30), r.timestamp.date()
+        )
+        yield "exchange.get_market_daily_range", lambda: exchange.get_market_daily_range(
+            [r.currency_id], r.timestamp.date() - timedelta(days=30), r.timestamp.date(), ohlc=True
+        )
+    if v:
+        yield "exchange.get_latest_index", lambda: exchange.get_latest_index(v.index_id)
+        yield "exchange.get_prev_index", lambda: exchange.get_prev_index(v.index_id, v.timestamp)
+        yield "exchange.get_latest_of_prev_day_index", lambda: exchange.get_latest_of_prev_day_index(
+            v.index_id, v.timestamp
+        )
+        yield "exchange.get_index_series", lambda: exchange.get_index_series(
+            v.index_id, v.timestamp.date() - timedelta(days=30), v.timestamp.date()
+        )
+        yield "exchange.get_index_daily_range", lambda: exchange.get_index_daily_range(
+            [v.index_id], v.timestamp.date() - timedelta(days=30), v.timestamp.date(), ohlc=True
+        )
+    if c:
+        yield "exchange.get_latest_central", lambda: exchange.get_latest_central(c.currency_id)
+        yield "exchange.get_prev_central", lambda: exchange.get_prev_central(c.currency_id, c.date)
+        yield "exchange.get_central_range", lambda: exchange.get_central_range(
+            [c.currency_id], c.date - timedelta(days=30), c.date
+        )
+
+
+def _plans(db: Session, capture, queries, *disabled: str) -> List[Tuple[str, dict]]:
+    """EXPLAIN every statement the queries execute, with the given planner methods switched off."""
+    conn = db.connection()
+    for setting in disabled:
+        conn.exec_driver_sql(f"SET LOCAL {setting} = off")
+    plans = []
+    for name, call in queries:
+        with capture() as statements:
+            call()
+        plans += [(name, explain(db, statement, parameters)) for statement, parameters in statements]
+    if not plans:
+        pytest.skip("no ticks in the database")
+    return plans
+
+
+def test_hot_queries_use_an_index(db, capture):
+    failures = [
+        (name, tables)
+        for name, plan in _plans(db, capture, _hot_queries(db), "enable_seqscan")
+        if (tables := seq_scanned_tables(plan))
+    ]
+    assert not failures, "\n".join(f"{name}: Seq Scan on {', '.join(tables)}" for name, tables in failures)
+
+
+def test_range_queries_are_pruned(db, capture):
+    failures = [
+        (name, partitions)
+        for name, plan in _plans(db, capture, _hot_queries(db))
+        if len(partitions := scanned_partitions(plan)) > MAX_PARTITIONS
+    ]
+    assert not failures, "\n".join(
+        f"{name}: reads {len(partitions)} partitions ({', '.join(partitions)})" for name, partitions in failures
+    )
+
+
+def test_series_queries_are_covered_by_the_primary_key(db, capture):
+    # Planner có chọn Index Only Scan hay không còn tuỳ visibility map (VACUUM) và thống kê
+    # của dữ liệu đang có; điều code quyết định là PK phủ đủ mọi cột query đọc/lọc
+    covering = {table: primary_key_columns(db, table) for table in COVERED_TABLES}
+    failures = [
+        (name, missing)
+        for name, plan in _plans(db, capture, _series_queries(db))
+        if (missing := uncovered_columns(plan, covering))
+    ]
+    assert not failures, "\n".join(
+        f"{name}: {', '.join(f'{table}.{column}' for table, column in missing)} not in the primary key"
+        for name, missing in failures
+    )
@@ -0,0 +1,91 @@
+"""Statement-count check for the table endpoints (N+1 guard).
+
+Seed hai tick mỗi series cho một ngày đã chốt (tháng 2000-01, partition tạo trong
+transaction của test rồi rollback), gọi get_gold_table / get_table khi có một series
+và khi có nhiều series, trên cả đường đọc tick lẫn đường rollup: số câu SQL phải
+giống hệt nhau, nếu không là có truy vấn chạy theo từng dòng (vd. lazy-load cur.gold_type).
+"""
+from datetime import date, datetime, time, timedelta
+from itertools import product
+
+import pytest
+
+from app.config import settings
+from app.models.exchange import Currency, FinancialIndexMeta, MarketExchangeRate, FinancialIndexValue
+from app.models.gold import GoldPrice, GoldType, Location, Unit
+from app.repository.gold_repo import GoldPriceRepository
+from app.repository.partition_repo import PartitionRepository, PARTITIONED_TABLES
+from app.repository.rollup_repo import RollupRepository, ROLLUP_TARGETS
+from app.services.exchange_service import ExchangeService
+from app.services.gold_service import GoldPriceService
+
+# Trước watermark của mọi DB có dữ liệu thật: đường rollup đọc bảng rollup, không rơi về tick
+DAY = date(2000, 1, 15)
+TICKS_PER_SERIES = 2
+
+
+def _ticks(kind: str, key, day: date):
+    for i in range(TICKS_PER_SERIES):
+        ts = datetime.combine(day, time(9 + i))
+        if kind == "gold":
+            gold_type_id, location_id, unit_id = key
+            yield GoldPrice(
+                timestamp=ts, buy_price=1, sell_price=2,
+                gold_type_id=gold_type_id, location_id=location_id, unit_id=unit_id,
+            )
+        elif kind == "market":
+            yield MarketExchangeRate(currency_id=key, timestamp=ts, source="test", type="buy", rate=1.0 + i)
+        else:
+            yield FinancialIndexValue(index_id=key, timestamp=ts, source="test", value=1.0 + i)
+
+
+def _seed(db, kind: str, keys):
+    db.add_all(t for key in keys for day in (DAY - timedelta(days=1), DAY) for t in _ticks(kind, key, day))
+    db.flush()
+    rollups = RollupRepository(db)
+    for target in ROLLUP_TARGETS:
+        rollups.refresh(target, DAY - timedelta(days=1), DAY)
+
+
+def _ids(db, model) -> list:
+    return [id_ for id_, in db.query(model.id).order_by(model.id)]
+
+
+def _series(db) -> dict:
+    keys = {
+        "gold": list(product(_ids(db, GoldType), _ids(db, Location), _ids(db, Unit))),
+        "market": _ids(db, Currency),
+        "index": _ids(db, FinancialIndexMeta),
+    }
+    if any(len(k) < 2 for k in keys.values()):
+        pytest.skip("need at least two series of each kind")
+    return keys
+
+
+@pytest.mark.parametrize("rollup_reads", [False, True], ids=["ticks", "rollup"])
+def test_table_endpoints_issue_a_constant_number_of_statements(db, capture, monkeypatch, rollup_reads):
+    monkeypatch.setattr(settings, "rollup_reads", rollup_reads)
+    partitions = PartitionRepository(db)
+    for table in PARTITIONED_TABLES:
+        partitions.ensure_months(table, DAY, DAY)
+    keys = _series(db)
+    gold = GoldPriceService(GoldPriceRepository(db))
+    exchange = ExchangeService(db)
+    calls = {
+        "gold": gold.get_gold_table,
+        "market": lambda d: exchange.get_table("market", d, None),
+        "index": lambda d: exchange.get_table("index", d, None),
+    }
+
+    def count(kind):
+        with capture() as statements:
+            result = calls[kind](DAY)
+        return len(statements), len(result["data"])
+
+    for kind, series in keys.items():
+        _seed(db, kind, series[:1])
+        one = count(kind)
+        _seed(db, kind, series[1:])
+        many = count(kind)
+        assert (one[1], many[1]) == (1, len(series))
+        assert one[0] == many[0], f"{kind}: {one[0]} statements for 1 row vs {many[0]} for {many[1]} rows"